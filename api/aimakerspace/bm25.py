@@ -0,0 +1,119 @@
+import re
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Keep identifiers such as ``ERR-401``, ``user_id`` or ``v2.1`` as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]+(?:[-.][a-z0-9_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ``text`` and split it into word/identifier tokens."""
+
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 keyword index stored as compressed sparse postings.
+
+    Postings are kept in CSR layout: for term ``t`` the matching document ids
+    and term frequencies are ``doc_ids[indptr[t]:indptr[t + 1]]`` and
+    ``term_freqs[...]``. Scoring a query touches only the postings of its
+    terms and accumulates into a dense score array with numpy.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+
+        token_ids: List[np.ndarray] = []
+        lengths = np.zeros(len(self.documents), dtype=np.float32)
+        for doc_id, document in enumerate(self.documents):
+            ids = [self.vocabulary.setdefault(token, len(self.vocabulary)) for token in tokenize(document)]
+            token_ids.append(np.asarray(ids, dtype=np.int64))
+            lengths[doc_id] = len(ids)
+
+        self.doc_lengths = lengths
+        self.avg_doc_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+
+        all_terms = np.concatenate(token_ids) if token_ids else np.zeros(0, dtype=np.int64)
+        all_docs = np.repeat(np.arange(len(self.documents), dtype=np.int64), [len(ids) for ids in token_ids])
+
+        # Unique (term, doc) pairs with their counts, already sorted by term then doc
+        pair_keys, counts = np.unique(all_terms * max(len(self.documents), 1) + all_docs, return_counts=True)
+        terms = pair_keys // max(len(self.documents), 1)
+        self.doc_ids = (pair_keys % max(len(self.documents), 1)).astype(np.int32)
+        self.term_freqs = counts.astype(np.float32)
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.add.at(self.indptr, terms + 1, 1)
+        np.cumsum(self.indptr, out=self.indptr)
+
+        doc_freqs = np.diff(self.indptr).astype(np.float32)
+        count = len(self.documents)
+        self.idf = np.log1p((count - doc_freqs + 0.5) / (doc_freqs + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get_scores(self, query: str, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return the BM25 score of every document for ``query``.
+
+        Documents where ``mask`` is False score zero.
+        """
+
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.indptr[term], self.indptr[term + 1]
+            docs = self.doc_ids[start:end]
+            freqs = self.term_freqs[start:end]
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_doc_length)
+            scores[docs] += self.idf[term] * freqs * (self.k1 + 1) / (freqs + norm)
+        if mask is not None:
+            scores[~mask] = 0.0
+        return scores
+
+    def search(self, query: str, k: int, mask: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (document, score) pairs with a positive score."""
+
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+
+        scores = self.get_scores(query, mask)
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.documents[i], float(scores[i])) for i in top if scores[i] > 0]
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[Hashable]], k: int = 60
+) -> List[Tuple[Hashable, float]]:
+    """Fuse several ranked lists with reciprocal rank fusion.
+
+    Each item scores ``sum(1 / (k + rank))`` over the lists it appears in, with
+    ranks starting at 1. Returns items sorted by fused score, best first.
+    """
+
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda entry: entry[1], reverse=True)
+
+
+if __name__ == "__main__":
+    chunks = [
+        "Login fails with ERR-401 when the session token has expired.",
+        "Checkout shows a banner when payment_status is DECLINED.",
+        "Users can reset their password from the login page.",
+    ]
+    index = BM25Index(chunks)
+    print(index.search("what does ERR-401 mean?", k=2))
+    print(reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]]))
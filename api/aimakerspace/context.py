@@ -0,0 +1,93 @@
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Rough characters-per-token ratio for English prose with Gemini/OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate that avoids a tokenizer or API round-trip."""
+
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _merge_spans(
+    spans: List[Tuple[int, str, float]]
+) -> List[Tuple[int, str, float]]:
+    """Merge overlapping or adjacent ``(offset, text, score)`` spans.
+
+    Overlapping text is kept once; a merged span keeps the best member score.
+    """
+
+    merged: List[Tuple[int, str, float]] = []
+    for start, text, score in sorted(spans, key=lambda span: span[0]):
+        if merged:
+            last_start, last_text, last_score = merged[-1]
+            last_end = last_start + len(last_text)
+            if start <= last_end:
+                tail = text[last_end - start :]
+                merged[-1] = (last_start, last_text + tail, max(last_score, score))
+                continue
+        merged.append((start, text, score))
+    return merged
+
+
+def pack_context(
+    chunks: Sequence[str],
+    token_budget: int,
+    offsets: Optional[Dict[str, int]] = None,
+    scores: Optional[Sequence[float]] = None,
+    separator: str = "\n\n",
+) -> str:
+    """Build a prompt context from retrieved chunks within ``token_budget``.
+
+    Chunks with a known source ``offsets`` entry are merged with any overlapping
+    or adjacent neighbours so shared text appears once; exact duplicates are
+    dropped. Segments are then admitted best score first (``scores`` defaults
+    to retrieval order) until the budget is spent, truncating the last one if
+    it only partly fits, and emitted in document order.
+    """
+
+    if scores is None:
+        scores = [float(len(chunks) - rank) for rank in range(len(chunks))]
+    offsets = offsets or {}
+
+    located: List[Tuple[int, str, float]] = []
+    unlocated: List[Tuple[int, str, float]] = []
+    seen = set()
+    for position, (chunk, score) in enumerate(zip(chunks, scores)):
+        if chunk in seen:
+            continue
+        seen.add(chunk)
+        if chunk in offsets:
+            located.append((offsets[chunk], chunk, score))
+        else:
+            # Keep unlocated chunks after located ones, in retrieval order
+            unlocated.append((position, chunk, score))
+
+    segments = [(0, start, text, score) for start, text, score in _merge_spans(located)]
+    segments += [(1, position, text, score) for position, text, score in unlocated]
+
+    remaining = token_budget
+    selected = []
+    for segment in sorted(segments, key=lambda segment: segment[3], reverse=True):
+        cost = estimate_tokens(segment[2]) + estimate_tokens(separator)
+        if cost <= remaining:
+            selected.append(segment)
+            remaining -= cost
+        elif remaining > estimate_tokens(separator):
+            keep_chars = (remaining - estimate_tokens(separator)) * CHARS_PER_TOKEN
+            selected.append(segment[:2] + (segment[2][:keep_chars],) + segment[3:])
+            remaining = 0
+        if remaining <= 0:
+            break
+
+    selected.sort(key=lambda segment: (segment[0], segment[1]))
+    return separator.join(segment[2] for segment in selected)
+
+
+if __name__ == "__main__":
+    document = "abcdefghij" * 10
+    chunk_offsets = {document[i : i + 30]: i for i in range(0, len(document), 20)}
+    ranked = list(chunk_offsets)[:3]
+    print(pack_context(ranked, token_budget=20, offsets=chunk_offsets))
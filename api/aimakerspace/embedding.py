@@ -0,0 +1,74 @@
+import os
+from typing import Iterable, Optional, Protocol, Sequence, runtime_checkable
+
+from dotenv import load_dotenv
+
+# Selects the default provider: "gemini", "local", or unset for Gemini when an API key is configured
+EMBEDDING_PROVIDER_ENV = "EMBEDDING_PROVIDER"
+
+
+@runtime_checkable
+class EmbeddingProvider(Protocol):
+    """Interface shared by the embedding models used with ``VectorDatabase``.
+
+    Batch methods return one vector per input text, in input order, as a list
+    of lists or a 2-D numpy array. Implementations: ``GeminiEmbeddingModel``,
+    ``LocalEmbeddingModel`` and the OpenAI ``EmbeddingModel``.
+    """
+
+    embeddings_model_name: str
+
+    async def async_get_embeddings(self, list_of_text: Iterable[str]) -> Sequence[Sequence[float]]:
+        ...
+
+    async def async_get_embedding(self, text: str) -> Sequence[float]:
+        ...
+
+    def get_embeddings(self, list_of_text: Iterable[str]) -> Sequence[Sequence[float]]:
+        ...
+
+    def get_embedding(self, text: str) -> Sequence[float]:
+        ...
+
+
+def get_embedding_model(provider: Optional[str] = None, api_key: Optional[str] = None) -> EmbeddingProvider:
+    """Return the embedding model for ``provider``.
+
+    ``provider`` defaults to the ``EMBEDDING_PROVIDER`` environment variable.
+    When neither is set, Gemini is used if an API key is available (argument or
+    ``GEMINI_API_KEY``) and the offline ``LocalEmbeddingModel`` otherwise.
+    """
+
+    load_dotenv()
+    provider = (provider or os.getenv(EMBEDDING_PROVIDER_ENV) or "").lower()
+    if not provider:
+        provider = "gemini" if api_key or os.getenv("GEMINI_API_KEY") else "local"
+
+    if provider == "local":
+        from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+
+        return LocalEmbeddingModel()
+    if provider == "gemini":
+        from aimakerspace.gemini_utils.embedding import GeminiEmbeddingModel
+
+        return GeminiEmbeddingModel(api_key=api_key)
+    raise ValueError(f"Unknown embedding provider: {provider!r} (expected 'gemini' or 'local')")
+
+
+def get_embedding_model_by_name(embeddings_model_name: str, api_key: Optional[str] = None) -> EmbeddingProvider:
+    """Return the model that produces ``embeddings_model_name`` vectors.
+
+    Use this to embed queries against stored vectors (an index, a snapshot),
+    so the provider follows how they were built rather than this process's
+    default.
+    """
+
+    if embeddings_model_name.startswith("local-hash-"):
+        from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+
+        return LocalEmbeddingModel(dimension=int(embeddings_model_name[len("local-hash-"):]))
+    if embeddings_model_name.startswith("models/"):
+        from aimakerspace.gemini_utils.embedding import GeminiEmbeddingModel
+
+        return GeminiEmbeddingModel(embeddings_model_name, api_key=api_key)
+    raise ValueError(f"No embedding provider for model {embeddings_model_name!r}")
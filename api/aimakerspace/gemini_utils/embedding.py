@@ -1,14 +1,26 @@
 import asyncio
+import logging
 import os
+import time
 from typing import Iterable, List
 
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
 
 class GeminiEmbeddingModel:
     """Helper for generating embeddings via the Google Gemini API."""
 
+    # Maximum number of texts per batch embedding request
+    BATCH_SIZE = 100
+    # Batch requests in flight at once; more than a few mostly earns 429s
+    MAX_CONCURRENT_BATCHES = 4
+    # Attempts per batch, and the delay before the first retry (doubled each time)
+    MAX_ATTEMPTS = 4
+    RETRY_DELAY_SECONDS = 1.0
+
     def __init__(self, embeddings_model_name: str = "models/text-embedding-004", api_key: str = None):
         load_dotenv()
         # Use provided API key or fall back to environment variable
@@ -23,54 +35,86 @@ class GeminiEmbeddingModel:
         genai.configure(api_key=self.gemini_api_key)
 
     async def async_get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
-        """Return embeddings for ``list_of_text`` using Gemini API."""
-        embeddings = []
-        
-        # Process each text individually (Gemini API handles one at a time)
-        for text in list_of_text:
-            embedding = await self.async_get_embedding(text)
-            embeddings.append(embedding)
-        
-        return embeddings
+        """Return embeddings for ``list_of_text`` using Gemini API.
+
+        Texts are sent as batch requests of up to ``BATCH_SIZE``, at most
+        ``MAX_CONCURRENT_BATCHES`` at a time. A failed batch is retried with
+        backoff; if it still fails the error is raised, since placeholder
+        vectors would silently corrupt search results.
+        """
+        texts = list(list_of_text)
+        batches = [texts[start:start + self.BATCH_SIZE] for start in range(0, len(texts), self.BATCH_SIZE)]
+        slots = asyncio.Semaphore(self.MAX_CONCURRENT_BATCHES)
+
+        async def embed(batch: List[str]) -> List[List[float]]:
+            async with slots:
+                return await self._async_embed_content(batch)
+
+        results = await asyncio.gather(*(embed(batch) for batch in batches))
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+
+    async def _async_embed_content(self, content):
+        """Embed a text or a batch with one async request, retrying failures."""
+        for attempt in range(self.MAX_ATTEMPTS):
+            try:
+                result = await genai.embed_content_async(
+                    model=self.embeddings_model_name,
+                    content=content,
+                    task_type="retrieval_document"  # Optimize for document retrieval
+                )
+                return result['embedding']
+            except Exception as e:
+                if attempt + 1 == self.MAX_ATTEMPTS:
+                    raise
+                delay = self._retry_delay(attempt, content, e)
+                await asyncio.sleep(delay)
+
+    def _embed_content(self, content):
+        """Embed a text or a batch with one request, retrying failures (sync)."""
+        for attempt in range(self.MAX_ATTEMPTS):
+            try:
+                result = genai.embed_content(
+                    model=self.embeddings_model_name,
+                    content=content,
+                    task_type="retrieval_document"
+                )
+                return result['embedding']
+            except Exception as e:
+                if attempt + 1 == self.MAX_ATTEMPTS:
+                    raise
+                time.sleep(self._retry_delay(attempt, content, e))
+
+    def _retry_delay(self, attempt: int, content, error: Exception) -> float:
+        delay = self.RETRY_DELAY_SECONDS * 2 ** attempt
+        texts = len(content) if isinstance(content, list) else 1
+        logger.warning("Gemini embedding failed, retrying in %.1fs: %s", delay, error, extra={"texts": texts})
+        return delay
 
     async def async_get_embedding(self, text: str) -> List[float]:
-        """Return an embedding for a single text using Gemini API."""
-        try:
-            # Use Gemini's embed_content method
-            result = genai.embed_content(
-                model=self.embeddings_model_name,
-                content=text,
-                task_type="retrieval_document"  # Optimize for document retrieval
-            )
-            return result['embedding']
-        except Exception as e:
-            print(f"Error getting Gemini embedding: {e}")
-            # Return a zero vector as fallback
-            return [0.0] * 768  # Standard embedding dimension
+        """Return an embedding for a single text using Gemini API.
+
+        Failures are retried and then raised, as in :meth:`async_get_embeddings`.
+        """
+        return await self._async_embed_content(text)
 
     def get_embeddings(self, list_of_text: Iterable[str]) -> List[List[float]]:
-        """Return embeddings for ``list_of_text`` using Gemini API (sync)."""
+        """Return embeddings for ``list_of_text`` using Gemini API (sync).
+
+        Texts are sent in batched requests of up to ``BATCH_SIZE`` instead of
+        one request per text. Failed batches are retried and then raised, as in
+        :meth:`async_get_embeddings`.
+        """
+        texts = list(list_of_text)
         embeddings = []
         
-        for text in list_of_text:
-            embedding = self.get_embedding(text)
-            embeddings.append(embedding)
+        for start in range(0, len(texts), self.BATCH_SIZE):
+            embeddings.extend(self._embed_content(texts[start:start + self.BATCH_SIZE]))
         
         return embeddings
 
     def get_embedding(self, text: str) -> List[float]:
         """Return an embedding for a single text using Gemini API (sync)."""
-        try:
-            result = genai.embed_content(
-                model=self.embeddings_model_name,
-                content=text,
-                task_type="retrieval_document"
-            )
-            return result['embedding']
-        except Exception as e:
-            print(f"Error getting Gemini embedding: {e}")
-            # Return a zero vector as fallback
-            return [0.0] * 768
+        return self._embed_content(text)
 
 
 if __name__ == "__main__":
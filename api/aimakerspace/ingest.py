@@ -0,0 +1,426 @@
+"""Offline bulk ingestion of a directory tree of PDFs into a persistent index.
+
+    python -m aimakerspace.ingest path/to/prds --index data/knowledge-base
+
+PDFs are parsed on a process pool, split, and embedded while later files are
+still being parsed. Progress is checkpointed after every file, so an
+interrupted run picks up where it stopped when started again with the same
+arguments. The API loads the result at startup (``RAG_INDEX_PATH``).
+
+Index directory layout:
+
+- ``manifest.json``: format version, embedding model, dimension and chunking
+  settings. Written when the index is created.
+- ``vectors.f32``: row-major float32 embeddings, appended file by file.
+- ``chunks.jsonl``: one ``{"text", "metadata"}`` line per row, in the same order.
+- ``files.jsonl``: the checkpoint log. It gets one line per finished file,
+  appended only after that file's rows are flushed, holding the cumulative row
+  count and ``chunks.jsonl`` size. On resume, data past the last complete line
+  is truncated. A file that changed since it was ingested is ingested again;
+  its new line supersedes the rows of the old one.
+- ``index.vdb``: a ``VectorDatabase`` snapshot of all of the above, rewritten
+  at the end of every run. It is memory-mapped on load. The files above remain
+  the source of truth; a snapshot with fewer rows than the checkpoint is
+  ignored.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aimakerspace.embedding import EmbeddingProvider, get_embedding_model, get_embedding_model_by_name
+from aimakerspace.text_utils import CharacterTextSplitter, PDFLoader, read_pdf, stream_files
+from aimakerspace.vectordatabase import VectorDatabase, read_snapshot_info
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = "aimakerspace-index"
+INDEX_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.f32"
+CHUNKS_FILE = "chunks.jsonl"
+CHECKPOINT_FILE = "files.jsonl"
+SNAPSHOT_FILE = "index.vdb"
+# Everything an index directory owns; ``--rebuild`` deletes only these
+INDEX_FILES = (
+    MANIFEST_FILE, MANIFEST_FILE + ".tmp", VECTORS_FILE, CHUNKS_FILE, CHECKPOINT_FILE,
+    SNAPSHOT_FILE, SNAPSHOT_FILE + ".tmp",
+)
+# Characters left between files in the corpus offset space, so chunks of
+# different files never look adjacent to ``pack_context``
+FILE_OFFSET_GAP = 1
+
+
+def _read_pdf_or_error(file_path: Path) -> Tuple[str, Optional[str]]:
+    """``read_pdf`` that reports failures instead of raising, so one bad file doesn't stop a run."""
+
+    try:
+        return read_pdf(file_path), None
+    except Exception as e:  # PyPDF2 raises a wide range of errors on damaged files
+        return "", f"{type(e).__name__}: {e}"
+
+
+def remove_index(path: Path) -> None:
+    """Delete the index files in ``path``, leaving anything else in the directory alone.
+
+    Refuses to touch a directory that holds index-named files but no manifest
+    written by :class:`IndexWriter`, since those files aren't ours.
+    """
+
+    present = [path / name for name in INDEX_FILES if (path / name).exists()]
+    if not present:
+        return
+    try:
+        manifest = json.loads((path / MANIFEST_FILE).read_text())
+    except (OSError, ValueError):
+        manifest = None
+    if not isinstance(manifest, dict) or manifest.get("format") != INDEX_FORMAT:
+        raise ValueError(f"{path} doesn't look like an index directory; refusing to delete it")
+    for file_path in present:
+        file_path.unlink()
+
+
+def _fsync(file_handle) -> None:
+    file_handle.flush()
+    os.fsync(file_handle.fileno())
+
+
+class IndexWriter:
+    """Appends embedded files to an index directory, resuming from its checkpoint log."""
+
+    def __init__(self, path: Path, settings: Dict[str, Any]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.path / MANIFEST_FILE
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text())
+            mismatched = [
+                key for key, value in settings.items() if self.manifest.get(key) != value
+            ]
+            if mismatched:
+                raise ValueError(
+                    f"Index at {self.path} was built with different settings "
+                    f"({', '.join(mismatched)}); use --rebuild to start over"
+                )
+        else:
+            self.manifest = {"format": INDEX_FORMAT, "version": INDEX_VERSION, "dimension": None, **settings}
+            self._write_manifest()
+
+        self.done, state = read_checkpoint(self.path)
+        self.rows = state["rows"]
+        self.chunk_bytes = state["chunk_bytes"]
+        self.corpus_chars = state["corpus_chars"]
+        # Drop anything written after the last complete checkpoint line
+        self._vectors = self._open_truncated(VECTORS_FILE, self.rows * 4 * (self.manifest["dimension"] or 0))
+        self._chunks = self._open_truncated(CHUNKS_FILE, self.chunk_bytes)
+        self._checkpoint = self._open_truncated(CHECKPOINT_FILE, state["checkpoint_bytes"])
+
+    def _open_truncated(self, name: str, size: int):
+        file_handle = open(self.path / name, "ab")
+        file_handle.truncate(size)
+        return file_handle
+
+    def _write_manifest(self) -> None:
+        temporary = self.path / (MANIFEST_FILE + ".tmp")
+        with temporary.open("w") as file_handle:
+            json.dump(self.manifest, file_handle, indent=2)
+            _fsync(file_handle)
+        os.replace(temporary, self.path / MANIFEST_FILE)
+
+    def is_current(self, relative_path: str, stat: os.stat_result) -> bool:
+        """Whether ``relative_path`` was already ingested and hasn't changed since."""
+
+        entry = self.done.get(relative_path)
+        if entry is None:
+            return False
+        if (entry["size"], entry["mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            logger.info("%s changed since it was ingested; ingesting it again", relative_path)
+            return False
+        return True
+
+    def commit(
+        self,
+        relative_path: str,
+        stat: os.stat_result,
+        text: str,
+        chunks: List[Tuple[int, str]],
+        vectors: np.ndarray,
+    ) -> None:
+        """Append one file's chunks and embeddings, then checkpoint it."""
+
+        if len(chunks):
+            if self.manifest["dimension"] is None:
+                self.manifest["dimension"] = int(vectors.shape[1])
+                self._write_manifest()
+            elif vectors.shape[1] != self.manifest["dimension"]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match the index ({self.manifest['dimension']})"
+                )
+        lines = b"".join(
+            json.dumps({
+                "text": chunk,
+                "metadata": {
+                    "document_id": self.manifest["document_id"],
+                    "source": relative_path,
+                    "chunk_offset": self.corpus_chars + offset,
+                },
+            }).encode("utf-8") + b"\n"
+            for offset, chunk in chunks
+        )
+        self._vectors.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._chunks.write(lines)
+        _fsync(self._vectors)
+        _fsync(self._chunks)
+
+        self.rows += len(chunks)
+        self.chunk_bytes += len(lines)
+        self.corpus_chars += len(text) + FILE_OFFSET_GAP
+        entry = {
+            "path": relative_path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "chunks": len(chunks),
+            "rows": self.rows, "chunk_bytes": self.chunk_bytes, "corpus_chars": self.corpus_chars,
+        }
+        self._checkpoint.write(json.dumps(entry).encode("utf-8") + b"\n")
+        _fsync(self._checkpoint)
+        self.done[relative_path] = entry
+
+    def close(self) -> None:
+        for file_handle in (self._vectors, self._chunks, self._checkpoint):
+            file_handle.close()
+
+
+def read_checkpoint(path: Path) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """Completed files by relative path, and the totals after the last complete checkpoint line.
+
+    ``state["superseded"]`` lists the ``(start, end)`` row ranges of files that
+    were ingested again later.
+    """
+
+    done: Dict[str, Dict[str, Any]] = {}
+    state = {"rows": 0, "chunk_bytes": 0, "corpus_chars": 0, "checkpoint_bytes": 0, "superseded": []}
+    checkpoint_path = Path(path) / CHECKPOINT_FILE
+    if not checkpoint_path.exists():
+        return done, state
+    with checkpoint_path.open("rb") as file_handle:
+        for line in file_handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # Torn final line from an interrupted run
+            if not line.endswith(b"\n"):
+                break
+            previous = done.get(entry["path"])
+            if previous is not None:
+                state["superseded"].append((previous["rows"] - previous["chunks"], previous["rows"]))
+            done[entry["path"]] = entry
+            state.update(rows=entry["rows"], chunk_bytes=entry["chunk_bytes"], corpus_chars=entry["corpus_chars"])
+            state["checkpoint_bytes"] += len(line)
+    return done, state
+
+
+async def ingest_directory(
+    source: str,
+    index_path: str,
+    embedding_model: Optional[EmbeddingProvider] = None,
+    document_id: str = "knowledge-base",
+    chunk_size: int = 500,
+    chunk_overlap: int = 100,
+    workers: Optional[int] = None,
+    max_pending_embeddings: int = 4,
+    rebuild: bool = False,
+    quantize: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Ingest every PDF under ``source`` into the index at ``index_path``.
+
+    Files already recorded in the index's checkpoint are skipped. Parsing runs
+    on ``workers`` processes, up to ``max_pending_embeddings`` files are
+    embedded concurrently, and each file is committed as soon as it's embedded.
+    Files that fail to parse or embed are logged and left unrecorded, so the
+    next run retries them. The snapshot is then rewritten if it is out of date
+    (``quantize="int8"`` makes it about four times smaller).
+    """
+
+    start = time.perf_counter()
+    embedding_model = embedding_model or get_embedding_model()
+    splitter = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if rebuild:
+        remove_index(Path(index_path))
+    writer = IndexWriter(Path(index_path), {
+        "embedding_model": embedding_model.embeddings_model_name,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "document_id": document_id,
+    })
+
+    root = Path(source)
+    base = root if root.is_dir() else root.parent
+    pending_paths = []
+    stats = {"files": 0, "skipped": 0, "failed": 0, "chunks": 0}
+    for path in PDFLoader(source).iter_paths():
+        if writer.is_current(path.relative_to(base).as_posix(), path.stat()):
+            stats["skipped"] += 1
+        else:
+            pending_paths.append(path)
+
+    workers = workers or os.cpu_count() or 1
+    slots = asyncio.Semaphore(max_pending_embeddings)
+    tasks = set()
+
+    async def embed_and_commit(path: Path, text: str) -> None:
+        relative_path = path.relative_to(base).as_posix()
+        try:
+            chunks = splitter.split_with_offsets(text) if text.strip() else []
+            vectors = np.empty((0, 0), dtype=np.float32)
+            if chunks:
+                vectors = np.asarray(
+                    await embedding_model.async_get_embeddings([chunk for _, chunk in chunks]), dtype=np.float32
+                ).reshape(len(chunks), -1)
+                # A zero row means an embedding call failed somewhere; retry the file next run instead
+                if (vectors == 0).all(axis=1).any():
+                    raise ValueError("embedding returned zero vectors")
+            writer.commit(relative_path, path.stat(), text, chunks, vectors)
+            stats["files"] += 1
+            stats["chunks"] += len(chunks)
+            logger.info("Ingested %s", relative_path, extra={"chunks": len(chunks), "rows": writer.rows})
+        except Exception as e:
+            stats["failed"] += 1
+            logger.error("Failed to embed %s: %s", relative_path, e)
+        finally:
+            slots.release()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            async for path, (text, error) in stream_files(pending_paths, _read_pdf_or_error, executor, 2 * workers):
+                if error:
+                    stats["failed"] += 1
+                    logger.error("Failed to parse %s: %s", path.relative_to(base).as_posix(), error)
+                    continue
+                await slots.acquire()
+                task = asyncio.create_task(embed_and_commit(path, text))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+    finally:
+        writer.close()
+
+    snapshot_info = {"rows": writer.rows, "document_id": document_id, "quantize": quantize}
+    if _current_snapshot_info(Path(index_path)) != snapshot_info:
+        database = _load_checkpointed(Path(index_path), writer.manifest, embedding_model)
+        database.save(Path(index_path) / SNAPSHOT_FILE, quantize=quantize, info=snapshot_info)
+    stats.update(rows=writer.rows, seconds=round(time.perf_counter() - start, 3))
+    return stats
+
+
+def read_manifest(index_path: str) -> Dict[str, Any]:
+    """Return an index's manifest, checking that this version can read it."""
+
+    path = Path(index_path)
+    manifest = json.loads((path / MANIFEST_FILE).read_text())
+    if manifest.get("format") != INDEX_FORMAT or manifest.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported index format in {path}: {manifest.get('format')} v{manifest.get('version')}")
+    return manifest
+
+
+def load_index(
+    index_path: str, embedding_model: Optional[EmbeddingProvider] = None, api_key: Optional[str] = None
+) -> VectorDatabase:
+    """Load an index written by :func:`ingest_directory` into a ``VectorDatabase``.
+
+    ``embedding_model`` embeds queries, so it must be the model the index was
+    built with; a different model raises ``ValueError``. By default that model
+    is picked from the manifest (``api_key`` is used if it's Gemini). Uses the
+    snapshot when it covers every checkpointed row, otherwise reads the
+    checkpointed files. Rows past the last checkpoint (an interrupted run) and
+    rows superseded by a later version of their file are ignored.
+    """
+
+    path = Path(index_path)
+    manifest = read_manifest(index_path)
+    embedding_model = embedding_model or get_embedding_model_by_name(manifest["embedding_model"], api_key=api_key)
+    if embedding_model.embeddings_model_name != manifest["embedding_model"]:
+        raise ValueError(
+            f"Index was built with {manifest['embedding_model']}, "
+            f"but queries would use {embedding_model.embeddings_model_name}"
+        )
+
+    snapshot_info = _current_snapshot_info(path)
+    if snapshot_info is not None and snapshot_info["rows"] == read_checkpoint(path)[1]["rows"]:
+        return VectorDatabase.load(path / SNAPSHOT_FILE, embedding_model)
+    return _load_checkpointed(path, manifest, embedding_model)
+
+
+def _current_snapshot_info(path: Path) -> Optional[Dict[str, Any]]:
+    """The snapshot's info block, or None if there is no readable snapshot."""
+
+    try:
+        info = read_snapshot_info(path / SNAPSHOT_FILE)
+    except (OSError, ValueError):
+        return None
+    return {key: info.get(key) for key in ("rows", "document_id", "quantize")}
+
+
+def _load_checkpointed(path: Path, manifest: Dict[str, Any], embedding_model: EmbeddingProvider) -> VectorDatabase:
+    """Build the database from the checkpointed vectors and chunks."""
+
+    _, state = read_checkpoint(path)
+    database = VectorDatabase(embedding_model=embedding_model)
+    if not state["rows"]:
+        return database
+    dimension = manifest["dimension"]
+    vectors = np.fromfile(path / VECTORS_FILE, dtype=np.float32, count=state["rows"] * dimension)
+    vectors = vectors.reshape(state["rows"], dimension)
+    live = np.ones(state["rows"], dtype=bool)
+    for start, end in state["superseded"]:
+        live[start:end] = False
+    with (path / CHUNKS_FILE).open("rb") as file_handle:
+        lines = file_handle.read(state["chunk_bytes"]).splitlines()
+    for line, vector, is_live in zip(lines, vectors, live):
+        if is_live:
+            entry = json.loads(line)
+            database.insert(entry["text"], vector, entry["metadata"])
+    return database
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ingest a directory tree of PDFs into a persistent RAG index")
+    parser.add_argument("source", help="PDF file or directory (searched recursively)")
+    parser.add_argument("--index", required=True, help="Index directory to create or resume")
+    parser.add_argument("--document-id", default="knowledge-base", help="Document ID the API serves the index under")
+    parser.add_argument("--provider", choices=["gemini", "local"], help="Embedding provider (default: EMBEDDING_PROVIDER, then Gemini if GEMINI_API_KEY is set)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--workers", type=int, help="PDF parsing processes (default: CPU count)")
+    parser.add_argument("--max-pending-embeddings", type=int, default=4, help="Files embedded concurrently")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the existing index and start over")
+    parser.add_argument("--quantize", choices=["int8"], help="Store the index snapshot as int8 instead of float32")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        stats = asyncio.run(ingest_directory(
+            args.source,
+            args.index,
+            embedding_model=get_embedding_model(args.provider),
+            document_id=args.document_id,
+            chunk_size=args.chunk_size,
+            chunk_overlap=args.chunk_overlap,
+            workers=args.workers,
+            max_pending_embeddings=args.max_pending_embeddings,
+            rebuild=args.rebuild,
+            quantize=args.quantize,
+        ))
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(stats))
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
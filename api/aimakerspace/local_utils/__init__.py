@@ -0,0 +1 @@
+# Offline, deterministic embedding model
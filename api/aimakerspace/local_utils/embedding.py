@@ -0,0 +1,126 @@
+import asyncio
+import re
+import zlib
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Multipliers for the rolling character n-gram hash (odd, so they mix all bits)
+_NGRAM_BASE = np.uint64(0x100000001B3)
+_MASK_32 = np.uint64(0xFFFFFFFF)
+# Seeds for the independent hashes that place each feature in the output
+_PROJECTION_SEEDS = np.array(
+    [0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F, 0x165667B1, 0xD3A2646C], dtype=np.uint64
+)
+
+
+class LocalEmbeddingModel:
+    """Deterministic, offline embedding model based on hashed n-gram features.
+
+    Each text is described by its lowercase word unigrams and character
+    n-grams. Features are hashed (no vocabulary), weighted by sublinear term
+    frequency, then mapped to ``dimension`` outputs with a sparse random
+    projection: every feature adds ``+-1`` to ``projections`` hashed
+    positions. Rows are L2 normalized, so cosine similarity approximates
+    term-frequency cosine similarity.
+
+    The same text always yields the same vector, in any process, which makes
+    the model usable as an offline fallback and as a test double for API
+    backed models.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        ngram_range: Sequence[int] = (3, 5),
+        projections: int = 4,
+        hash_buckets: int = 1 << 20,
+    ):
+        if not 1 <= projections <= len(_PROJECTION_SEEDS):
+            raise ValueError(f"projections must be between 1 and {len(_PROJECTION_SEEDS)}")
+
+        self.dimension = dimension
+        self.ngram_range = tuple(ngram_range)
+        self.projections = projections
+        self.hash_buckets = hash_buckets
+        self.embeddings_model_name = f"local-hash-{dimension}"
+
+    def _features(self, text: str) -> np.ndarray:
+        """Return the hash bucket of every word and character n-gram in ``text``."""
+
+        normalized = _WHITESPACE.sub(" ", text.lower()).strip()
+        words = [zlib.crc32(word.encode("utf-8")) for word in _WORD_PATTERN.findall(normalized)]
+        hashes = [np.asarray(words, dtype=np.uint64)]
+
+        codes = np.frombuffer(f" {normalized} ".encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            if len(codes) < n:
+                break
+            rolling = np.full(len(codes) - n + 1, n, dtype=np.uint64)
+            for offset in range(n):
+                rolling = rolling * _NGRAM_BASE + codes[offset : len(codes) - n + 1 + offset]
+            hashes.append((rolling ^ (rolling >> np.uint64(32))) & _MASK_32)
+
+        return (np.concatenate(hashes) % np.uint64(self.hash_buckets)).astype(np.int64)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` into an ``(len(texts), dimension)`` float32 matrix."""
+
+        rows, buckets, weights = [], [], []
+        for row, text in enumerate(texts):
+            features, counts = np.unique(self._features(text), return_counts=True)
+            weight = 1.0 + np.log(counts)
+            rows.append(np.full(len(features), row))
+            buckets.append(features)
+            weights.append(weight)
+
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        rows = np.concatenate(rows)
+        buckets = np.concatenate(buckets).astype(np.uint64)
+        weights = np.concatenate(weights).astype(np.float32)
+        flat = np.zeros(len(texts) * self.dimension)
+
+        for seed in _PROJECTION_SEEDS[: self.projections]:
+            mixed = (buckets * seed + np.uint64(0x7F4A7C15)) & _MASK_32
+            columns = (mixed % np.uint64(self.dimension)).astype(np.int64)
+            signs = np.where((mixed >> np.uint64(31)) & np.uint64(1), 1.0, -1.0).astype(np.float32)
+            flat += np.bincount(rows * self.dimension + columns, signs * weights, minlength=flat.size)
+
+        matrix = flat.reshape(len(texts), self.dimension).astype(np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    async def async_get_embeddings(self, list_of_text: Iterable[str]) -> np.ndarray:
+        """Return embeddings for ``list_of_text`` without blocking the event loop."""
+
+        return await asyncio.to_thread(self._embed, list(list_of_text))
+
+    async def async_get_embedding(self, text: str) -> np.ndarray:
+        """Return an embedding for a single text."""
+
+        return (await self.async_get_embeddings([text]))[0]
+
+    def get_embeddings(self, list_of_text: Iterable[str]) -> np.ndarray:
+        """Return embeddings for ``list_of_text`` as an ``(n, dimension)`` array."""
+
+        return self._embed(list(list_of_text))
+
+    def get_embedding(self, text: str) -> np.ndarray:
+        """Return an embedding for a single text."""
+
+        return self._embed([text])[0]
+
+
+if __name__ == "__main__":
+    embedding_model = LocalEmbeddingModel()
+    vectors = embedding_model.get_embeddings(
+        ["Login fails with ERR-401", "login failure ERR-401", "Checkout banner"]
+    )
+    print(vectors.shape, vectors @ vectors[0])
+    print(asyncio.run(embedding_model.async_get_embedding("Hello, world!"))[:8])
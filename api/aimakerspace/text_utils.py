@@ -1,8 +1,92 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, List
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 
 import PyPDF2
 
+# Result type of the read function given to ``stream_files``
+T = TypeVar("T")
+
+
+def read_text_file(file_path: Path, encoding: str = "utf-8") -> str:
+    """Return the contents of a text file."""
+
+    with Path(file_path).open("r", encoding=encoding) as file_handle:
+        return file_handle.read()
+
+
+def read_pdf(file_path: Path) -> str:
+    """Return the text of every page of a PDF, one page per line block.
+
+    Module-level so it can run in a ``ProcessPoolExecutor``.
+    """
+
+    with Path(file_path).open("rb") as file_handle:
+        pdf_reader = PyPDF2.PdfReader(file_handle)
+        extracted_pages = [page.extract_text() or "" for page in pdf_reader.pages]
+    return "\n".join(extracted_pages)
+
+
+async def stream_files(
+    paths: Iterable[Path],
+    read: Callable[[Path], T],
+    executor: Executor,
+    max_in_flight: int,
+) -> AsyncIterator[Tuple[Path, T]]:
+    """Run ``read`` over ``paths`` on ``executor``, yielding ``(path, read(path))`` as reads finish.
+
+    At most ``max_in_flight`` reads are queued at once, so memory stays bounded
+    and a slow consumer (splitting, embedding) applies back-pressure while the
+    pool keeps parsing ahead. Results arrive in completion order; a failed read
+    raises when its result is reached and cancels the reads still queued.
+    """
+
+    loop = asyncio.get_running_loop()
+    remaining = iter(paths)
+    pending: Dict[asyncio.Future, Path] = {}
+
+    def submit_next() -> bool:
+        path = next(remaining, None)
+        if path is None:
+            return False
+        pending[loop.run_in_executor(executor, read, path)] = path
+        return True
+
+    try:
+        while len(pending) < max(1, max_in_flight) and submit_next():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                submit_next()
+                yield path, future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def _stream_with_pool(
+    paths: Iterable[Path],
+    read: Callable[[Path], str],
+    executor: Optional[Executor],
+    make_executor: Callable[[], Executor],
+    max_in_flight: int,
+) -> AsyncIterator[Tuple[Path, str]]:
+    """``stream_files`` on ``executor``, or on a pool created for this stream and shut down after it."""
+
+    owned = executor is None
+    executor = make_executor() if owned else executor
+    try:
+        async for item in stream_files(paths, read, executor, max_in_flight):
+            yield item
+    finally:
+        if owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+
 
 class TextFileLoader:
     """Load plain-text documents from a single file or an entire directory."""
@@ -25,7 +109,9 @@ class TextFileLoader:
     def load_directory(self) -> None:
         """Load all text files contained within ``self.path``."""
 
-        self.documents = list(self._iter_directory(self.path))
+        self.documents = [
+            self._read_text_file(entry) for entry in sorted(self.path.rglob("*.txt")) if entry.is_file()
+        ]
 
     def load_documents(self) -> List[str]:
         """Convenience wrapper returning the loaded documents."""
@@ -33,24 +119,52 @@ class TextFileLoader:
         self.load()
         return self.documents
 
-    def _iter_documents(self) -> Iterable[str]:
+    async def astream(
+        self,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[Path, str]]:
+        """Yield ``(path, text)`` for every file, read concurrently on a thread pool.
+
+        Files arrive in completion order. Pass ``executor`` to share a pool;
+        otherwise one with ``max_workers`` threads is created for this stream.
+        """
+
+        workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        read = functools.partial(read_text_file, encoding=self.encoding)
+        async for item in _stream_with_pool(
+            self.iter_paths(), read, executor,
+            lambda: ThreadPoolExecutor(max_workers=workers, thread_name_prefix="text-loader"),
+            max_in_flight or 2 * workers,
+        ):
+            yield item
+
+    async def aload(self, max_workers: Optional[int] = None) -> List[str]:
+        """Populate ``self.documents`` like :meth:`load`, reading files concurrently."""
+
+        loaded = {path: text async for path, text in self.astream(max_workers)}
+        self.documents = [loaded[path] for path in sorted(loaded)]
+        return self.documents
+
+    def iter_paths(self) -> Iterable[Path]:
+        """Yield the files :meth:`load` reads, in sorted order."""
+
         if self.path.is_dir():
-            yield from self._iter_directory(self.path)
+            yield from (entry for entry in sorted(self.path.rglob("*.txt")) if entry.is_file())
         elif self.path.is_file() and self.path.suffix.lower() == ".txt":
-            yield self._read_text_file(self.path)
+            yield self.path
         else:
             raise ValueError(
                 "Provided path must be a directory or a .txt file: " f"{self.path}"
             )
 
-    def _iter_directory(self, directory: Path) -> Iterable[str]:
-        for entry in sorted(directory.rglob("*.txt")):
-            if entry.is_file():
-                yield self._read_text_file(entry)
+    def _iter_documents(self) -> Iterable[str]:
+        for path in self.iter_paths():
+            yield self._read_text_file(path)
 
     def _read_text_file(self, file_path: Path) -> str:
-        with file_path.open("r", encoding=self.encoding) as file_handle:
-            return file_handle.read()
+        return read_text_file(file_path, self.encoding)
 
 
 class CharacterTextSplitter:
@@ -73,6 +187,12 @@ class CharacterTextSplitter:
         step = self.chunk_size - self.chunk_overlap
         return [text[i : i + self.chunk_size] for i in range(0, len(text), step)]
 
+    def split_with_offsets(self, text: str) -> List[Tuple[int, str]]:
+        """Split ``text`` like :meth:`split`, pairing each chunk with its start offset."""
+
+        step = self.chunk_size - self.chunk_overlap
+        return [(i, text[i : i + self.chunk_size]) for i in range(0, len(text), step)]
+
     def split_texts(self, texts: List[str]) -> List[str]:
         """Split multiple texts and flatten the resulting chunks."""
 
@@ -81,6 +201,19 @@ class CharacterTextSplitter:
             chunks.extend(self.split(text))
         return chunks
 
+    async def asplit_stream(
+        self, documents: AsyncIterable[Tuple[Path, str]]
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Split a ``(path, text)`` stream (e.g. a loader's ``astream``) as documents arrive.
+
+        Yields ``(chunk, metadata)`` with ``source`` and ``chunk_offset``
+        metadata, ready for :meth:`VectorDatabase.abuild_from_stream`.
+        """
+
+        async for path, text in documents:
+            for offset, chunk in self.split_with_offsets(text):
+                yield chunk, {"source": str(path), "chunk_offset": offset}
+
 
 class PDFLoader:
     """Extract text from PDF files stored at a path."""
@@ -102,7 +235,9 @@ class PDFLoader:
     def load_directory(self) -> None:
         """Load all PDF files contained within ``self.path``."""
 
-        self.documents = list(self._iter_directory(self.path))
+        self.documents = [
+            self._read_pdf(entry) for entry in sorted(self.path.rglob("*.pdf")) if entry.is_file()
+        ]
 
     def load_documents(self) -> List[str]:
         """Convenience wrapper returning the loaded documents."""
@@ -110,26 +245,53 @@ class PDFLoader:
         self.load()
         return self.documents
 
-    def _iter_documents(self) -> Iterable[str]:
+    async def astream(
+        self,
+        max_workers: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[Path, str]]:
+        """Yield ``(path, text)`` for every PDF, parsed concurrently on a process pool.
+
+        PDF parsing is CPU-bound pure Python, so processes (not threads) give
+        real parallelism. Files arrive in completion order. Pass ``executor``
+        to share a pool; otherwise one with ``max_workers`` processes is
+        created for this stream.
+        """
+
+        workers = max_workers or os.cpu_count() or 1
+        async for item in _stream_with_pool(
+            self.iter_paths(), read_pdf, executor,
+            lambda: ProcessPoolExecutor(max_workers=workers),
+            max_in_flight or 2 * workers,
+        ):
+            yield item
+
+    async def aload(self, max_workers: Optional[int] = None) -> List[str]:
+        """Populate ``self.documents`` like :meth:`load`, parsing PDFs concurrently."""
+
+        loaded = {path: text async for path, text in self.astream(max_workers)}
+        self.documents = [loaded[path] for path in sorted(loaded)]
+        return self.documents
+
+    def iter_paths(self) -> Iterable[Path]:
+        """Yield the PDFs :meth:`load` reads, in sorted order."""
+
         if self.path.is_dir():
-            yield from self._iter_directory(self.path)
+            yield from (entry for entry in sorted(self.path.rglob("*.pdf")) if entry.is_file())
         elif self.path.is_file() and self.path.suffix.lower() == ".pdf":
-            yield self._read_pdf(self.path)
+            yield self.path
         else:
             raise ValueError(
                 "Provided path must be a directory or a .pdf file: " f"{self.path}"
             )
 
-    def _iter_directory(self, directory: Path) -> Iterable[str]:
-        for entry in sorted(directory.rglob("*.pdf")):
-            if entry.is_file():
-                yield self._read_pdf(entry)
+    def _iter_documents(self) -> Iterable[str]:
+        for path in self.iter_paths():
+            yield self._read_pdf(path)
 
     def _read_pdf(self, file_path: Path) -> str:
-        with file_path.open("rb") as file_handle:
-            pdf_reader = PyPDF2.PdfReader(file_handle)
-            extracted_pages = [page.extract_text() or "" for page in pdf_reader.pages]
-        return "\n".join(extracted_pages)
+        return read_pdf(file_path)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,14 @@
 import asyncio
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 
-from aimakerspace.gemini_utils.embedding import GeminiEmbeddingModel
+from aimakerspace.embedding import EmbeddingProvider, get_embedding_model
 
 
 def cosine_similarity(vector_a: np.ndarray, vector_b: np.ndarray) -> float:
@@ -18,48 +23,395 @@ def cosine_similarity(vector_a: np.ndarray, vector_b: np.ndarray) -> float:
     return float(dot_product / (norm_a * norm_b))
 
 
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, leaving all-zero rows as zeros."""
+
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# Filter operators answered from the numeric column of a metadata field
+_RANGE_OPERATORS = {
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+# Snapshot layout (little-endian): a fixed header holding the section table,
+# then each section at a 64-byte aligned offset so it can be viewed in place:
+#   matrix    rows x dimension float32, or int8 when quantized
+#   scales    per-row float32 scale factors (int8 only)
+#   offsets   rows + 1 uint64 byte offsets of each key in the text arena
+#   text      UTF-8 keys (chunk texts), concatenated
+#   metadata  JSON list of per-row metadata (null when absent)
+#   info      JSON object: embedding model name plus caller-supplied fields
+SNAPSHOT_MAGIC = b"AIMKVDB\x00"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DTYPES = {"float32": 0, "int8": 1}
+_SNAPSHOT_SECTIONS = ("matrix", "scales", "offsets", "text", "metadata", "info")
+_SNAPSHOT_HEADER = struct.Struct("<8sHBxIQ")  # magic, version, dtype code, dimension, rows
+_SNAPSHOT_SECTION = struct.Struct("<QQ")  # offset, length
+_SNAPSHOT_HEADER_SIZE = 128
+_SNAPSHOT_ALIGNMENT = 64
+
+
+def _byte_view(array: np.ndarray) -> memoryview:
+    """Flat byte view of ``array``'s data (copies only if it isn't C-contiguous)."""
+
+    return memoryview(np.ascontiguousarray(array).reshape(-1).view(np.uint8))
+
+
+def _snapshot_layout(buffer: memoryview) -> Tuple[int, int, int, Dict[str, memoryview]]:
+    """Validate a snapshot header; return dtype code, dimension, rows and a view of each section."""
+
+    if len(buffer) < _SNAPSHOT_HEADER_SIZE:
+        raise ValueError("Not a VectorDatabase snapshot: too short")
+    magic, version, dtype_code, dimension, rows = _SNAPSHOT_HEADER.unpack_from(buffer)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Not a VectorDatabase snapshot: bad magic")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+    if dtype_code not in SNAPSHOT_DTYPES.values():
+        raise ValueError(f"Unknown snapshot matrix dtype code {dtype_code}")
+
+    sections = {}
+    for index, name in enumerate(_SNAPSHOT_SECTIONS):
+        offset, length = _SNAPSHOT_SECTION.unpack_from(buffer, _SNAPSHOT_HEADER.size + index * _SNAPSHOT_SECTION.size)
+        if offset + length > len(buffer):
+            raise ValueError(f"Truncated snapshot: {name} section ends past the end of the data")
+        sections[name] = buffer[offset : offset + length]
+    return dtype_code, dimension, rows, sections
+
+
+def read_snapshot_info(path: Union[str, Path]) -> Dict[str, Any]:
+    """Return a snapshot file's info block without loading its vectors."""
+
+    with open(path, "rb") as file_handle:
+        header = memoryview(file_handle.read(_SNAPSHOT_HEADER_SIZE))
+        if len(header) < _SNAPSHOT_HEADER_SIZE or bytes(header[:8]) != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a VectorDatabase snapshot: {path}")
+        info_index = _SNAPSHOT_SECTIONS.index("info")
+        offset, length = _SNAPSHOT_SECTION.unpack_from(header, _SNAPSHOT_HEADER.size + info_index * _SNAPSHOT_SECTION.size)
+        file_handle.seek(offset)
+        return json.loads(file_handle.read(length))
+
+
 class VectorDatabase:
-    """Minimal in-memory vector store backed by numpy arrays."""
+    """Minimal in-memory vector store backed by numpy arrays.
+
+    Each entry may carry a metadata dict (page, section, document_id, ...).
+    Searches accept a ``filter`` expression over that metadata:
 
-    def __init__(self, embedding_model: Optional[GeminiEmbeddingModel] = None):
+    - ``{"document_id": "doc_1"}`` - equality, same as ``{"$eq": ...}``
+    - ``{"section": {"$in": ["Login", "Checkout"]}}`` / ``{"$ne": ...}``
+    - ``{"page": {"$gte": 2, "$lte": 5}}`` - numeric ranges
+    - ``{"$or": [expr, ...]}`` / ``{"$and": [expr, ...]}``
+
+    Field conditions are combined with AND. Filters are evaluated against
+    precomputed boolean masks (one per field value) and numeric columns, and
+    the resulting mask is applied inside the vectorized scoring pass.
+    """
+
+    def __init__(self, embedding_model: Optional[EmbeddingProvider] = None):
         self.vectors: Dict[str, np.ndarray] = {}
-        self.embedding_model = embedding_model or GeminiEmbeddingModel()
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        # Gemini when an API key is configured, otherwise the offline local model
+        self.embedding_model = embedding_model or get_embedding_model()
+        # Row-normalized copy of ``vectors`` and metadata indexes, aligned with
+        # ``_keys`` and rebuilt lazily after inserts
+        self._keys: List[str] = []
+        self._unit_matrix: Optional[np.ndarray] = None
+        self._value_masks: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._numeric_columns: Dict[str, np.ndarray] = {}
+        # Contiguous rows of ``vectors`` in insertion order, when known (after a
+        # snapshot import); saves restacking them, cleared by any insert
+        self._stacked: Optional[np.ndarray] = None
 
-    def insert(self, key: str, vector: Iterable[float]) -> None:
-        """Store ``vector`` so that it can be retrieved with ``key`` later on."""
+    def insert(
+        self,
+        key: str,
+        vector: Iterable[float],
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Store ``vector`` (and optional ``metadata``) under ``key``."""
 
         self.vectors[key] = np.asarray(vector, dtype=float)
+        if metadata is not None:
+            self.metadata[key] = dict(metadata)
+        self._unit_matrix = None
+        self._stacked = None
+
+    def _normalized_matrix(self) -> Tuple[List[str], np.ndarray]:
+        if self._unit_matrix is None:
+            self._keys = list(self.vectors)
+            if self._keys:
+                stacked = self._stacked
+                if stacked is None:
+                    stacked = np.vstack([self.vectors[key] for key in self._keys])
+                self._unit_matrix = _normalize_rows(stacked.astype(np.float32, copy=False))
+            else:
+                self._unit_matrix = np.zeros((0, 0), dtype=np.float32)
+            self._build_metadata_indexes()
+        return self._keys, self._unit_matrix
+
+    def _build_metadata_indexes(self) -> None:
+        count = len(self._keys)
+        positions: Dict[str, Dict[Any, List[int]]] = {}
+        numeric: Dict[str, np.ndarray] = {}
+        for row, key in enumerate(self._keys):
+            for field, value in self.metadata.get(key, {}).items():
+                try:
+                    positions.setdefault(field, {}).setdefault(value, []).append(row)
+                except TypeError:
+                    pass  # Unhashable values can't be matched by equality
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    if field not in numeric:
+                        numeric[field] = np.full(count, np.nan)
+                    numeric[field][row] = value
+
+        self._value_masks = {}
+        for field, rows_by_value in positions.items():
+            masks = {}
+            for value, rows in rows_by_value.items():
+                mask = np.zeros(count, dtype=bool)
+                mask[rows] = True
+                masks[value] = mask
+            self._value_masks[field] = masks
+        self._numeric_columns = numeric
+
+    def filter_mask(self, filter: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Boolean mask over stored entries (in insertion order) matching ``filter``."""
+
+        keys, _ = self._normalized_matrix()
+        mask = np.ones(len(keys), dtype=bool)
+        for field, condition in (filter or {}).items():
+            if field == "$or":
+                any_match = np.zeros(len(keys), dtype=bool)
+                for expression in condition:
+                    any_match |= self.filter_mask(expression)
+                mask &= any_match
+            elif field == "$and":
+                for expression in condition:
+                    mask &= self.filter_mask(expression)
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for operator, operand in condition.items():
+                    mask &= self._condition_mask(field, operator, operand)
+        return mask
+
+    def _condition_mask(self, field: str, operator: str, operand: Any) -> np.ndarray:
+        count = len(self._keys)
+        value_masks = self._value_masks.get(field, {})
+        if operator in ("$eq", "$ne"):
+            try:
+                matched = value_masks.get(operand)
+            except TypeError:
+                matched = None
+            if matched is None:
+                matched = np.zeros(count, dtype=bool)
+            return matched if operator == "$eq" else ~matched
+        if operator == "$in":
+            matched = np.zeros(count, dtype=bool)
+            for value in operand:
+                if value in value_masks:
+                    matched |= value_masks[value]
+            return matched
+        if operator in _RANGE_OPERATORS:
+            if isinstance(operand, bool) or not isinstance(operand, (int, float)):
+                raise ValueError(f"Filter operator {operator} needs a number, got {operand!r}")
+            column = self._numeric_columns.get(field)
+            if column is None:
+                return np.zeros(count, dtype=bool)
+            with np.errstate(invalid="ignore"):
+                return _RANGE_OPERATORS[operator](column, operand)
+        raise ValueError(f"Unsupported filter operator: {operator}")
+
+    def get_metadata(self, key: str) -> Dict[str, Any]:
+        """Return the metadata stored for ``key`` (empty if none)."""
+
+        return self.metadata.get(key, {})
 
     def search(
         self,
         query_vector: Iterable[float],
         k: int,
         distance_measure: Callable[[np.ndarray, np.ndarray], float] = cosine_similarity,
+        filter: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[str, float]]:
-        """Return the ``k`` vectors most similar to ``query_vector``."""
+        """Return the ``k`` vectors most similar to ``query_vector``.
+
+        ``filter`` restricts the search to entries whose metadata matches.
+        """
 
         if k <= 0:
             raise ValueError("k must be a positive integer")
 
         query = np.asarray(query_vector, dtype=float)
+        if distance_measure is cosine_similarity:
+            keys, matrix = self._normalized_matrix()
+            if not keys:
+                return []
+            similarities = matrix @ _normalize_rows(query.astype(np.float32))
+            if filter:
+                similarities = np.where(self.filter_mask(filter), similarities, -np.inf)
+            top = self._top_indices(similarities, k)
+            return [(keys[i], float(similarities[i])) for i in top if similarities[i] > -np.inf]
+
+        if filter:
+            keys, _ = self._normalized_matrix()
+            allowed = [keys[i] for i in np.flatnonzero(self.filter_mask(filter))]
+        else:
+            allowed = list(self.vectors)
         scores = [
-            (key, distance_measure(query, vector))
-            for key, vector in self.vectors.items()
+            (key, distance_measure(query, self.vectors[key]))
+            for key in allowed
         ]
         scores.sort(key=lambda item: item[1], reverse=True)
         return scores[:k]
 
+    @staticmethod
+    def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the ``k`` highest scores, best first."""
+
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return np.zeros(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def search_mmr(
+        self,
+        query_vector: Iterable[float],
+        k: int,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return ``k`` results chosen by maximal marginal relevance.
+
+        The ``fetch_k`` most similar vectors form the candidate pool. Each pick
+        maximises ``lambda_mult * relevance - (1 - lambda_mult) * redundancy``,
+        where redundancy is the highest cosine similarity to anything already
+        picked. All pairwise similarities come from one matrix product over the
+        pool, so each step is a vectorized update. ``lambda_mult=1`` reduces to
+        plain similarity ranking. Scores returned are the query similarities.
+        """
+
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+        if not 0.0 <= lambda_mult <= 1.0:
+            raise ValueError("lambda_mult must be between 0 and 1")
+
+        keys, matrix = self._normalized_matrix()
+        if not keys:
+            return []
+
+        query = _normalize_rows(np.asarray(query_vector, dtype=np.float32))
+        similarities = matrix @ query
+        if filter:
+            similarities = np.where(self.filter_mask(filter), similarities, -np.inf)
+        pool = self._top_indices(similarities, max(k, fetch_k))
+        pool = pool[similarities[pool] > -np.inf]
+        relevance = similarities[pool]
+        pairwise = matrix[pool] @ matrix[pool].T
+
+        redundancy = np.zeros(len(pool), dtype=np.float32)
+        available = np.ones(len(pool), dtype=bool)
+        chosen: List[int] = []
+        for _ in range(min(k, len(pool))):
+            mmr_scores = lambda_mult * relevance - (1.0 - lambda_mult) * redundancy
+            mmr_scores[~available] = -np.inf
+            best = int(np.argmax(mmr_scores))
+            chosen.append(best)
+            available[best] = False
+            redundancy = np.maximum(redundancy, pairwise[best]) if len(chosen) > 1 else pairwise[best].copy()
+
+        return [(keys[pool[i]], float(relevance[i])) for i in chosen]
+
+    def search_multi(
+        self,
+        query_vectors: Iterable[Iterable[float]],
+        k: int,
+        fetch_k: int = 20,
+        filter: Optional[Dict[str, Any]] = None,
+        rrf_k: int = 60,
+    ) -> List[Tuple[str, float]]:
+        """Search with several query vectors at once and fuse their rankings.
+
+        All queries are scored in one matrix-matrix product. Each query's top
+        ``fetch_k`` entries are fused with reciprocal rank fusion
+        (``sum(1 / (rrf_k + rank))``), which is also the returned score.
+        """
+
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+
+        keys, matrix = self._normalized_matrix()
+        queries = np.atleast_2d(np.asarray(list(query_vectors), dtype=np.float32))
+        if not keys or queries.size == 0:
+            return []
+
+        similarities = matrix @ _normalize_rows(queries).T  # (entries, queries)
+        if filter:
+            similarities[~self.filter_mask(filter)] = -np.inf
+
+        pool = min(max(k, fetch_k), len(keys))
+        top = np.argpartition(-similarities, pool - 1, axis=0)[:pool]
+        top_scores = np.take_along_axis(similarities, top, axis=0)
+        order = np.argsort(-top_scores, axis=0, kind="stable")
+        top = np.take_along_axis(top, order, axis=0)
+        top_scores = np.take_along_axis(top_scores, order, axis=0)
+
+        contributions = np.broadcast_to(1.0 / (rrf_k + np.arange(1, pool + 1))[:, None], top.shape)
+        valid = top_scores > -np.inf
+        fused = np.zeros(len(keys))
+        np.add.at(fused, top[valid], contributions[valid])
+
+        best = self._top_indices(fused, k)
+        return [(keys[i], float(fused[i])) for i in best if fused[i] > 0]
+
     def search_by_text(
         self,
         query_text: str,
         k: int,
         distance_measure: Callable[[np.ndarray, np.ndarray], float] = cosine_similarity,
         return_as_text: bool = False,
+        mmr: bool = False,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
     ) -> Union[List[Tuple[str, float]], List[str]]:
-        """Vector search using an embedding generated from ``query_text``."""
+        """Vector search using an embedding generated from ``query_text``.
+
+        With ``mmr=True`` results are diversified with :meth:`search_mmr`;
+        ``filter`` is a metadata filter expression (see the class docstring).
+        """
 
         query_vector = self.embedding_model.get_embedding(query_text)
-        results = self.search(query_vector, k, distance_measure)
+        if mmr:
+            results = self.search_mmr(query_vector, k, fetch_k, lambda_mult, filter=filter)
+        else:
+            results = self.search(query_vector, k, distance_measure, filter=filter)
+        if return_as_text:
+            return [result[0] for result in results]
+        return results
+
+    def multi_search_by_text(
+        self,
+        query_texts: List[str],
+        k: int,
+        return_as_text: bool = False,
+        fetch_k: int = 20,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Union[List[Tuple[str, float]], List[str]]:
+        """Embed ``query_texts`` in one batch and run :meth:`search_multi`."""
+
+        query_vectors = self.embedding_model.get_embeddings(query_texts)
+        results = self.search_multi(query_vectors, k, fetch_k, filter=filter)
         if return_as_text:
             return [result[0] for result in results]
         return results
@@ -69,12 +421,185 @@ class VectorDatabase:
 
         return self.vectors.get(key)
 
-    async def abuild_from_list(self, list_of_text: List[str]) -> "VectorDatabase":
-        """Populate the vector store asynchronously from raw text snippets."""
+    def _snapshot_parts(self, quantize: Optional[str], info: Optional[Dict[str, Any]]) -> List[Any]:
+        """Header and sections of a snapshot, as buffers to write out in order."""
+
+        if quantize not in (None, "int8"):
+            raise ValueError(f"Unsupported quantization: {quantize!r} (expected None or 'int8')")
+        keys = list(self.vectors)
+        if self._stacked is not None and len(self._stacked) == len(keys):
+            matrix = self._stacked.astype("<f4", copy=False)
+        elif keys:
+            matrix = np.vstack([self.vectors[key] for key in keys]).astype("<f4")
+        else:
+            matrix = np.zeros((0, 0), dtype="<f4")
+
+        scales = np.zeros(0, dtype="<f4")
+        if quantize == "int8":
+            # Symmetric per-row scaling keeps each row's direction, which is all cosine search uses
+            scales = (np.abs(matrix).max(axis=1, initial=0.0) / 127).astype("<f4")
+            scales[scales == 0] = 1.0
+            matrix = np.rint(matrix / scales[:, None]).astype(np.int8)
+
+        encoded = [key.encode("utf-8") for key in keys]
+        offsets = np.zeros(len(keys) + 1, dtype="<u8")
+        np.cumsum([len(item) for item in encoded], dtype="<u8", out=offsets[1:])
+        metadata = [self.metadata.get(key) for key in keys]
+        info = dict(info or {}, embedding_model=getattr(self.embedding_model, "embeddings_model_name", None))
+        sections = [
+            _byte_view(matrix),
+            _byte_view(scales),
+            _byte_view(offsets),
+            b"".join(encoded),
+            json.dumps(metadata).encode("utf-8") if any(entry is not None for entry in metadata) else b"",
+            json.dumps(info).encode("utf-8"),
+        ]
+
+        header = bytearray(_SNAPSHOT_HEADER_SIZE)
+        _SNAPSHOT_HEADER.pack_into(
+            header, 0, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_DTYPES[quantize or "float32"],
+            matrix.shape[1], len(keys),
+        )
+        parts: List[Any] = [header]
+        position = _SNAPSHOT_HEADER_SIZE
+        for index, section in enumerate(sections):
+            padding = -position % _SNAPSHOT_ALIGNMENT
+            parts.append(bytes(padding))
+            position += padding
+            _SNAPSHOT_SECTION.pack_into(header, _SNAPSHOT_HEADER.size + index * _SNAPSHOT_SECTION.size, position, len(section))
+            parts.append(section)
+            position += len(section)
+        return parts
+
+    def to_snapshot(self, quantize: Optional[str] = None, info: Optional[Dict[str, Any]] = None) -> bytes:
+        """Serialize keys, vectors and metadata into the binary snapshot format.
+
+        Vectors are stored as float32, or with ``quantize="int8"`` as int8 with
+        a float32 scale per row (about a quarter of the size). ``info`` adds
+        fields to the snapshot's info block (see :func:`read_snapshot_info`).
+        """
+
+        return b"".join(self._snapshot_parts(quantize, info))
+
+    def save(self, path: Union[str, Path], quantize: Optional[str] = None, info: Optional[Dict[str, Any]] = None) -> None:
+        """Write :meth:`to_snapshot` to ``path``, replacing it atomically."""
+
+        temporary = Path(f"{path}.tmp")
+        with temporary.open("wb") as file_handle:
+            for part in self._snapshot_parts(quantize, info):
+                file_handle.write(part)
+            file_handle.flush()
+            os.fsync(file_handle.fileno())
+        os.replace(temporary, path)
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        buffer: Union[bytes, bytearray, memoryview, mmap.mmap],
+        embedding_model: Optional[EmbeddingProvider] = None,
+    ) -> "VectorDatabase":
+        """Rebuild a database from :meth:`to_snapshot` output.
+
+        float32 vectors are ``np.frombuffer`` views of ``buffer`` (read-only,
+        nothing is copied); int8 snapshots are dequantized into a new matrix.
+        ``embedding_model`` embeds text queries, so it must match the model the
+        vectors came from; a different model raises ``ValueError``.
+        """
+
+        dtype_code, dimension, rows, sections = _snapshot_layout(memoryview(buffer).cast("B"))
+        info = json.loads(bytes(sections["info"]))
+        database = cls(embedding_model=embedding_model)
+        expected_model = info.get("embedding_model")
+        actual_model = getattr(database.embedding_model, "embeddings_model_name", None)
+        if expected_model and actual_model and expected_model != actual_model:
+            raise ValueError(f"Snapshot was built with {expected_model}, but queries would use {actual_model}")
+
+        if dtype_code == SNAPSHOT_DTYPES["int8"]:
+            quantized = np.frombuffer(sections["matrix"], dtype=np.int8).reshape(rows, dimension)
+            scales = np.frombuffer(sections["scales"], dtype="<f4")
+            matrix = quantized * scales[:, None]
+        else:
+            matrix = np.frombuffer(sections["matrix"], dtype="<f4").reshape(rows, dimension)
+
+        offsets = np.frombuffer(sections["offsets"], dtype="<u8").tolist()
+        text = sections["text"]
+        arena = str(text, "utf-8")
+        if len(arena) == len(text):
+            # ASCII only, so byte offsets are character offsets: slice the decoded arena
+            keys = [arena[start:end] for start, end in zip(offsets, offsets[1:])]
+        else:
+            keys = [str(text[start:end], "utf-8") for start, end in zip(offsets, offsets[1:])]
+        database.vectors = dict(zip(keys, matrix))
+        if len(sections["metadata"]):
+            metadata = json.loads(bytes(sections["metadata"]))
+            database.metadata = {key: entry for key, entry in zip(keys, metadata) if entry is not None}
+        if len(database.vectors) == rows:
+            database._stacked = matrix
+        return database
+
+    @classmethod
+    def load(cls, path: Union[str, Path], embedding_model: Optional[EmbeddingProvider] = None) -> "VectorDatabase":
+        """Load a snapshot file written by :meth:`save`.
+
+        The file is memory-mapped, so float32 vectors are paged in on first use
+        instead of being read up front.
+        """
+
+        with open(path, "rb") as file_handle:
+            mapped = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_snapshot(mapped, embedding_model)
+
+    async def abuild_from_list(
+        self,
+        list_of_text: List[str],
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> "VectorDatabase":
+        """Populate the vector store asynchronously from raw text snippets.
+
+        ``metadata``, if given, holds one dict per snippet.
+        """
 
         embeddings = await self.embedding_model.async_get_embeddings(list_of_text)
-        for text, embedding in zip(list_of_text, embeddings):
-            self.insert(text, embedding)
+        metadata = metadata or [None] * len(list_of_text)
+        for text, embedding, entry_metadata in zip(list_of_text, embeddings, metadata):
+            self.insert(text, embedding, entry_metadata)
+        return self
+
+    async def abuild_from_stream(
+        self,
+        chunks: AsyncIterable[Tuple[str, Optional[Dict[str, Any]]]],
+        batch_size: int = 128,
+    ) -> "VectorDatabase":
+        """Populate the vector store from a ``(text, metadata)`` stream as it arrives.
+
+        Chunks are embedded in batches of ``batch_size``; one batch is embedded
+        while the next is collected, so loading and splitting upstream (e.g.
+        ``CharacterTextSplitter.asplit_stream``) overlap with embedding.
+        """
+
+        async def embed(batch: List[Tuple[str, Optional[Dict[str, Any]]]]) -> None:
+            texts = [text for text, _ in batch]
+            embeddings = await self.embedding_model.async_get_embeddings(texts)
+            for (text, entry_metadata), embedding in zip(batch, embeddings):
+                self.insert(text, embedding, entry_metadata)
+
+        in_flight: Optional[asyncio.Task] = None
+        batch: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        try:
+            async for item in chunks:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if in_flight is not None:
+                        await in_flight
+                    in_flight, batch = asyncio.create_task(embed(batch)), []
+            if in_flight is not None:
+                await in_flight
+                in_flight = None
+            if batch:
+                await embed(batch)
+        finally:
+            if in_flight is not None:
+                in_flight.cancel()
         return self
 
 
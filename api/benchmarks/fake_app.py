@@ -0,0 +1,74 @@
+"""
+The FastAPI app wired to the fake Gemini backend, for load tests
+
+    cd api
+    FAKE_GEMINI_LATENCY_MS=500 FAKE_GEMINI_ERROR_RATE=0.02 \\
+        uvicorn fake_app:app --app-dir benchmarks --port 8001
+
+Also serves ``GET /api/loadtest/stats`` with the event-loop lag observed in
+this worker since the last call, plus the fake backend's call counters.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List
+
+# Add the api directory to the path so we can import our modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# A key must be present for the app to take the Gemini code paths
+os.environ.setdefault("GEMINI_API_KEY", "fake-gemini-key")
+
+from fake_gemini import install
+
+fake_gemini = install()
+
+from app import app  # noqa: E402  (must be imported after the patch)
+
+# How often the lag monitor wakes up
+LOOP_LAG_INTERVAL_SECONDS = 0.05
+
+loop_lag_samples: List[float] = []
+
+
+async def monitor_loop_lag() -> None:
+    """Record how late each periodic wake-up is; blocking code shows up as lag."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        loop_lag_samples.append(max(0.0, time.perf_counter() - start - LOOP_LAG_INTERVAL_SECONDS))
+
+
+app_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan_with_loop_lag_monitor(application):
+    """Run the app's own lifespan with the lag monitor alongside."""
+    task = asyncio.create_task(monitor_loop_lag())
+    async with app_lifespan(application):
+        yield
+    task.cancel()
+
+
+app.router.lifespan_context = lifespan_with_loop_lag_monitor
+
+
+@app.get("/api/loadtest/stats")
+async def loadtest_stats(reset: bool = True) -> Dict[str, object]:
+    samples = sorted(loop_lag_samples)
+    if reset:
+        loop_lag_samples.clear()
+    lag = {}
+    if samples:
+        lag = {
+            "samples": len(samples),
+            "p50_ms": statistics.median(samples) * 1000,
+            "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+    return {"pid": os.getpid(), "loop_lag": lag, "fake_gemini": dict(fake_gemini.calls)}
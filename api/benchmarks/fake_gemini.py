@@ -0,0 +1,164 @@
+"""
+In-process stand-in for the Gemini API, for load tests and offline runs
+
+``install()`` patches ``google.generativeai`` so text generation and
+embedding calls never leave the process. Each call waits for a configurable
+latency (sync calls block, as the real client does), fails with a
+configurable probability using the same ``google.api_core`` exceptions the
+real client raises, and can stream its answer in chunks.
+
+Responses are shaped after the prompt: test-case prompts get a JSON array of
+test cases, refinement-patch prompts get ``{"operations": []}`` and
+everything else gets a short markdown answer. Embeddings come from the
+deterministic ``LocalEmbeddingModel`` at Gemini's 768 dimensions.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+
+
+@dataclass
+class FakeGeminiConfig:
+    latency_ms: float = 800.0  # Mean generation latency
+    jitter_ms: float = 200.0  # Standard deviation of the generation latency
+    embed_latency_ms: float = 60.0  # Latency of one embed_content request
+    error_rate: float = 0.0  # Probability that a call raises
+    stream_chunks: int = 8  # Chunks yielded when called with stream=True
+    first_chunk_ratio: float = 0.3  # Share of the latency spent before the first chunk
+    test_cases_per_response: int = 12
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "FakeGeminiConfig":
+        """Read ``FAKE_GEMINI_*`` environment variables, e.g. ``FAKE_GEMINI_ERROR_RATE=0.05``."""
+        config = cls()
+        for field, default in vars(cls()).items():
+            value = os.getenv(f"FAKE_GEMINI_{field.upper()}")
+            if value is not None:
+                setattr(config, field, type(default)(value) if default is not None else int(value))
+        return config
+
+
+class FakeResponse:
+    """Mimics ``GenerateContentResponse``: ``.text`` plus iteration over stream chunks."""
+
+    def __init__(self, chunks: List[str], delays: List[float]):
+        self._chunks = chunks
+        self._delays = delays
+        self.text = "".join(chunks)
+
+    def __iter__(self) -> Iterator["FakeResponse"]:
+        for chunk, delay in zip(self._chunks, self._delays):
+            time.sleep(delay)
+            yield FakeResponse([chunk], [0.0])
+
+    async def __aiter__(self) -> AsyncIterator["FakeResponse"]:
+        for chunk, delay in zip(self._chunks, self._delays):
+            await asyncio.sleep(delay)
+            yield FakeResponse([chunk], [0.0])
+
+    def resolve(self) -> None:
+        """No-op, for code that resolves streamed responses."""
+
+
+class FakeGemini:
+    """Holds the configuration and counters behind the patched functions."""
+
+    def __init__(self, config: FakeGeminiConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.embedder = LocalEmbeddingModel(dimension=768)
+        self.calls = {"generate": 0, "embed": 0, "errors": 0}
+
+    def latency(self) -> float:
+        return max(0.0, self.random.gauss(self.config.latency_ms, self.config.jitter_ms)) / 1000
+
+    def maybe_fail(self) -> None:
+        if self.random.random() < self.config.error_rate:
+            self.calls["errors"] += 1
+            error = self.random.choice([google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable])
+            raise error("Fake Gemini injected failure")
+
+    def respond(self, contents: Any) -> str:
+        prompt = contents if isinstance(contents, str) else " ".join(str(part) for part in contents if isinstance(part, str))
+        if '"operations"' in prompt:
+            return json.dumps({"operations": []})
+        if "test case" in prompt.lower() and "JSON" in prompt:
+            return json.dumps([
+                {
+                    "test_case_id": f"TC_{number:03d}",
+                    "feature": f"Feature {number % 4 + 1}",
+                    "scenario": f"Scenario {number} for the uploaded requirements",
+                    "test_steps": "1. Open the page\n2. Perform the action\n3. Check the result",
+                    "expected_result": "The system behaves as the requirement describes",
+                    "priority": ("High", "Medium", "Low")[number % 3],
+                    "category": ("Functional", "Edge", "Negative")[number % 3],
+                }
+                for number in range(1, self.config.test_cases_per_response + 1)
+            ], indent=2)
+        return "## Answer\n\n" + "- **Point**: Generated by the fake Gemini backend.\n" * 6
+
+    def plan(self, contents: Any, stream: bool) -> FakeResponse:
+        """Return the response and how long to wait before (each chunk of) it."""
+        self.calls["generate"] += 1
+        total = self.latency()
+        text = self.respond(contents)
+        if not stream:
+            return FakeResponse([text], [total])
+        count = max(1, self.config.stream_chunks)
+        size = -(-len(text) // count)
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        first = total * self.config.first_chunk_ratio
+        rest = (total - first) / max(len(chunks) - 1, 1)
+        return FakeResponse(chunks, [first] + [rest] * (len(chunks) - 1))
+
+    def embedding(self, content: Any) -> dict:
+        self.calls["embed"] += 1
+        if isinstance(content, str):
+            return {"embedding": self.embedder.get_embedding(content).tolist()}
+        return {"embedding": self.embedder.get_embeddings(list(content)).tolist()}
+
+
+def install(config: Optional[FakeGeminiConfig] = None) -> FakeGemini:
+    """Patch ``google.generativeai`` to use the fake backend and return it."""
+    fake = FakeGemini(config or FakeGeminiConfig.from_env())
+
+    def generate_content(self, contents, *args, stream: bool = False, **kwargs):
+        fake.maybe_fail()
+        response = fake.plan(contents, stream)
+        if not stream:
+            time.sleep(response._delays[0])
+        return response
+
+    async def generate_content_async(self, contents, *args, stream: bool = False, **kwargs):
+        fake.maybe_fail()
+        response = fake.plan(contents, stream)
+        if not stream:
+            await asyncio.sleep(response._delays[0])
+        return response
+
+    def embed_content(model=None, content=None, *args, **kwargs):
+        fake.maybe_fail()
+        time.sleep(fake.config.embed_latency_ms / 1000)
+        return fake.embedding(content)
+
+    async def embed_content_async(model=None, content=None, *args, **kwargs):
+        fake.maybe_fail()
+        await asyncio.sleep(fake.config.embed_latency_ms / 1000)
+        return fake.embedding(content)
+
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel.generate_content = generate_content
+    genai.GenerativeModel.generate_content_async = generate_content_async
+    genai.embed_content = embed_content
+    genai.embed_content_async = embed_content_async
+    return fake
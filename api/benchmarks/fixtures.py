@@ -0,0 +1,72 @@
+"""
+Synthetic, deterministic inputs for the benchmarks (no network, no sample files)
+"""
+import random
+from typing import List
+
+# Small PRD-flavoured vocabulary so BM25 and the local embedder see realistic repetition
+_VOCABULARY = (
+    "user login checkout payment session token error retry timeout banner email password "
+    "account order cart invoice refund status declined approved pending admin report export "
+    "search filter page upload document validate required field display message screen "
+    "must should when then given system api request response latency limit"
+).split()
+
+
+def synthetic_document(words: int, seed: int = 0, sections: int = 10) -> str:
+    """Return a PRD-like document of roughly ``words`` words with numbered sections."""
+    rng = random.Random(seed)
+    section_words = max(words // max(sections, 1), 1)
+    parts = []
+    for number in range(1, sections + 1):
+        parts.append(f"{number}. {rng.choice(_VOCABULARY).upper()} REQUIREMENTS")
+        sentences = []
+        for _ in range(max(section_words // 12, 1)):
+            sentence = " ".join(rng.choice(_VOCABULARY) for _ in range(12))
+            sentences.append(sentence.capitalize() + f" ERR-{rng.randint(100, 599)}.")
+        parts.append(" ".join(sentences))
+    return "\n".join(parts)
+
+
+def synthetic_questions(count: int, seed: int = 1) -> List[str]:
+    """Return ``count`` short questions drawn from the same vocabulary."""
+    rng = random.Random(seed)
+    return [
+        f"What happens to the {rng.choice(_VOCABULARY)} when {rng.choice(_VOCABULARY)} is {rng.choice(_VOCABULARY)}?"
+        for _ in range(count)
+    ]
+
+
+def _escape_pdf_text(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_text_pdf(pages: List[str], line_length: int = 90) -> bytes:
+    """Build a minimal PDF with one Helvetica text page per entry of ``pages``."""
+    objects: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    font_id = 3 + 2 * len(pages)
+    for index, text in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * index} 0 R "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode()
+        )
+        lines = []
+        for paragraph in text.split("\n"):
+            lines.extend(paragraph[i:i + line_length] for i in range(0, max(len(paragraph), 1), line_length))
+        operators = " ".join(f"({_escape_pdf_text(line)}) Tj T*" for line in lines)
+        stream = f"BT /F1 9 Tf 11 TL 36 756 Td {operators} ET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return bytes(output)
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Load generator for the FastAPI endpoints
+
+Drives /api/upload-prd, /api/chat, /api/upload-document and
+/api/chat-with-document at a fixed concurrency and reports p50/p95/p99
+latency, throughput and errors per endpoint, plus the server's event-loop
+lag. With ``--spawn`` it starts the app against the fake Gemini backend
+(benchmarks/fake_app.py), so no key or network is needed:
+
+    python benchmarks/load_test.py --spawn --workers 2 --concurrency 32 --duration 30 \\
+        --latency-ms 800 --error-rate 0.02 --output load.json
+
+Without ``--spawn`` it targets ``--url`` (event-loop lag is only reported when
+the server exposes /api/loadtest/stats, i.e. runs fake_app).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fixtures import make_text_pdf, synthetic_document, synthetic_questions
+
+API_DIR = Path(__file__).resolve().parent.parent
+ENDPOINTS = ("upload-prd", "chat", "upload-document", "chat-with-document")
+DEFAULT_MIX = "upload-prd=1,chat=4,upload-document=1,chat-with-document=4"
+# Any key works with the fake backend; sending one skips the free-tier limits
+LOAD_TEST_API_KEY = "load-test-key"
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], seed: int):
+        self.client = client
+        self.mix = mix
+        self.random = random.Random(seed)
+        self.samples: Dict[str, List[Tuple[float, bool]]] = {endpoint: [] for endpoint in mix}
+        self.status_counts: Dict[str, Dict[str, int]] = {endpoint: {} for endpoint in mix}
+        self.document_id: Optional[str] = None
+        self.questions = synthetic_questions(200)
+        self.sequence = 0
+        self.client_lag: List[float] = []
+
+    def _pdf(self, pages: int) -> bytes:
+        # Unique content per request, so uploads are not coalesced by the single-flight cache
+        self.sequence += 1
+        text = synthetic_document(pages * 300, seed=self.sequence, sections=pages)
+        return make_text_pdf([text[i:i + 1800] for i in range(0, len(text), 1800)][:pages])
+
+    async def call(self, endpoint: str) -> httpx.Response:
+        if endpoint == "upload-prd":
+            return await self.client.post(
+                "/api/upload-prd",
+                files={"file": ("prd.pdf", self._pdf(3), "application/pdf")},
+                data={"user_api_key": LOAD_TEST_API_KEY},
+            )
+        if endpoint == "upload-document":
+            return await self.client.post(
+                "/api/upload-document",
+                files={"file": ("doc.pdf", self._pdf(8), "application/pdf")},
+                data={"user_api_key": LOAD_TEST_API_KEY},
+            )
+        if endpoint == "chat":
+            return await self.client.post("/api/chat", json={
+                "message": self.random.choice(self.questions), "api_key": LOAD_TEST_API_KEY,
+            })
+        return await self.client.post("/api/chat-with-document", json={
+            "question": self.random.choice(self.questions),
+            "document_id": self.document_id,
+            "api_key": LOAD_TEST_API_KEY,
+        })
+
+    async def setup(self) -> None:
+        """Upload the document that chat-with-document requests ask about."""
+        if "chat-with-document" in self.mix:
+            response = await self.call("upload-document")
+            response.raise_for_status()
+            self.document_id = response.json()["document_id"]
+
+    async def worker(self, deadline: float, remaining: List[int]) -> None:
+        endpoints, weights = zip(*self.mix.items())
+        while time.perf_counter() < deadline and remaining[0] != 0:
+            remaining[0] -= 1
+            endpoint = self.random.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await self.call(endpoint)
+                status = str(response.status_code)
+                ok = response.status_code == 200 and response.json().get("success", True) is not False
+            except (httpx.HTTPError, ValueError) as error:
+                status, ok = type(error).__name__, False
+            self.samples[endpoint].append((time.perf_counter() - start, ok))
+            self.status_counts[endpoint][status] = self.status_counts[endpoint].get(status, 0) + 1
+
+    async def monitor_client_lag(self, interval: float = 0.05) -> None:
+        """Lag of the generator's own loop; if high, the generator is the bottleneck."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.client_lag.append(max(0.0, time.perf_counter() - start - interval))
+
+    async def run(self, concurrency: int, duration: float, requests: int) -> float:
+        deadline = time.perf_counter() + duration
+        # Shared countdown; -1 means no request limit
+        remaining = [requests if requests > 0 else -1]
+        monitor = asyncio.create_task(self.monitor_client_lag())
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker(deadline, remaining) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        monitor.cancel()
+        return elapsed
+
+
+def summarize(samples: List[Tuple[float, bool]], elapsed: float) -> Dict[str, Any]:
+    latencies = [latency for latency, _ in samples]
+    if not latencies:
+        return {"requests": 0}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": sum(1 for _, ok in samples if not ok),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        endpoint, _, weight = item.partition("=")
+        if endpoint not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {endpoint!r}; choose from {', '.join(ENDPOINTS)}")
+        if float(weight or 1) > 0:
+            mix[endpoint] = float(weight or 1)
+    return mix
+
+
+def spawn_server(args: argparse.Namespace) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        FAKE_GEMINI_LATENCY_MS=str(args.latency_ms),
+        FAKE_GEMINI_JITTER_MS=str(args.jitter_ms),
+        FAKE_GEMINI_ERROR_RATE=str(args.error_rate),
+        DEVELOPMENT_MODE="false",
+    )
+    command = [
+        sys.executable, "-m", "uvicorn", "fake_app:app", "--app-dir", "benchmarks",
+        "--port", str(args.port), "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    return subprocess.Popen(command, cwd=API_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/api/loadtest/stats")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit("Server did not become ready")
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        if args.spawn:
+            await wait_until_ready(client)
+        test = LoadTest(client, parse_mix(args.mix), args.seed)
+        await test.setup()
+        await client.get("/api/loadtest/stats")  # Reset the lag window before the run
+        elapsed = await test.run(args.concurrency, args.duration, args.requests)
+
+        server = None
+        stats = await client.get("/api/loadtest/stats")
+        if stats.status_code == 200:
+            server = stats.json()
+
+    all_samples = [sample for samples in test.samples.values() for sample in samples]
+    lag = sorted(test.client_lag) or [0.0]
+    return {
+        "config": {
+            "url": args.url, "concurrency": args.concurrency, "duration_s": args.duration,
+            "mix": parse_mix(args.mix), "workers": args.workers if args.spawn else None,
+            "fake_latency_ms": args.latency_ms if args.spawn else None,
+            "fake_error_rate": args.error_rate if args.spawn else None,
+        },
+        "elapsed_s": elapsed,
+        "total": summarize(all_samples, elapsed),
+        "endpoints": {
+            endpoint: dict(summarize(samples, elapsed), status_codes=test.status_counts[endpoint])
+            for endpoint, samples in test.samples.items()
+        },
+        "server": server,
+        "client_loop_lag_max_ms": lag[-1] * 1000,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default=None, help="Target server (default: the spawned one)")
+    parser.add_argument("--spawn", action="store_true", help="Start uvicorn with the fake Gemini backend")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when spawning")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = no limit)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Endpoint weights, e.g. chat=3,upload-prd=1")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Fake Gemini mean latency")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="Fake Gemini latency std deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake Gemini failure probability")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if not args.spawn and not args.url:
+        parser.error("pass --url or --spawn")
+    server = None
+    if args.spawn:
+        args.url = args.url or f"http://127.0.0.1:{args.port}"
+        server = spawn_server(args)
+    try:
+        report = asyncio.run(main_async(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+    for endpoint, summary in report["endpoints"].items():
+        if summary.get("requests"):
+            print(f"{endpoint:>20}: {summary['requests']:5d} req  {summary['throughput_rps']:7.2f} rps  "
+                  f"p50 {summary['p50_ms']:8.1f}ms  p95 {summary['p95_ms']:8.1f}ms  "
+                  f"p99 {summary['p99_ms']:8.1f}ms  errors {summary['errors']}", file=sys.stderr)
+    if report["server"] and report["server"]["loop_lag"]:
+        lag = report["server"]["loop_lag"]
+        print(f"{'server loop lag':>20}: p50 {lag['p50_ms']:.1f}ms  p99 {lag['p99_ms']:.1f}ms  max {lag['max_ms']:.1f}ms",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the aimakerspace RAG stack
+
+Measures CharacterTextSplitter throughput, VectorDatabase insert/search
+latency and memory across corpus sizes, PDF extraction time per page,
+snapshot export/import, sequential vs. streamed directory ingestion and
+end-to-end SimpleRAG ingest/query latency. Embeddings come from the
+deterministic LocalEmbeddingModel, so no API key or network is needed.
+
+Results are written as JSON so runs can be compared between commits:
+
+    python benchmarks/rag_benchmarks.py --output before.json
+    python benchmarks/rag_benchmarks.py --output after.json --compare before.json
+
+Use ``--sizes 1000,10000,100000,1000000 --dimension 128`` for the 1M-vector
+run; sizes that would not fit in available memory are skipped and reported.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Embed with the local model everywhere, including inside the API's SimpleRAG
+os.environ["EMBEDDING_PROVIDER"] = "local"
+
+# Add the api directory to the path so we can import our modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+
+from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+from aimakerspace.text_utils import CharacterTextSplitter, PDFLoader
+from aimakerspace.vectordatabase import VectorDatabase
+from fixtures import make_text_pdf, synthetic_document, synthetic_questions
+
+DEFAULT_SIZES = "1000,10000,100000"
+# Relative change treated as a regression by --compare
+DEFAULT_THRESHOLD = 0.2
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``samples`` (``q`` in 0-100)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_metrics(samples: List[float]) -> Dict[str, float]:
+    """Summarize per-call durations (seconds) as millisecond statistics."""
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "min_ms": min(samples) * 1000,
+        "calls": len(samples),
+    }
+
+
+def time_calls(function: Callable[[], Any], repeat: int) -> List[float]:
+    """Run ``function`` ``repeat`` times and return each call's duration."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def resident_memory_bytes() -> int:
+    """Current resident set size (Linux), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def available_memory_bytes() -> Optional[int]:
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    """Send the app's progress prints to stderr so stdout stays machine-readable."""
+    with contextlib.redirect_stdout(sys.stderr):
+        yield
+
+
+def result(benchmark: str, params: Dict[str, Any], metrics: Dict[str, Any]) -> Dict[str, Any]:
+    print(f"  {benchmark} {params} -> "
+          + ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in metrics.items()),
+          file=sys.stderr)
+    return {"benchmark": benchmark, "params": params, "metrics": metrics}
+
+
+def bench_splitter(document_words: int, repeat: int) -> List[Dict[str, Any]]:
+    text = synthetic_document(document_words)
+    megabytes = len(text.encode("utf-8")) / 1e6
+    results = []
+    for chunk_size, overlap in ((1000, 200), (200, 50)):
+        splitter = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
+        for method in ("split", "split_with_offsets"):
+            samples = time_calls(lambda: getattr(splitter, method)(text), repeat)
+            metrics = latency_metrics(samples)
+            metrics["mb_per_s"] = megabytes / statistics.median(samples)
+            results.append(result(
+                "splitter." + method,
+                {"chunk_size": chunk_size, "chunk_overlap": overlap, "text_mb": round(megabytes, 3)},
+                metrics,
+            ))
+    return results
+
+
+def bench_vector_database(size: int, dimension: int, queries: int, seed: int = 0) -> List[Dict[str, Any]]:
+    params = {"vectors": size, "dimension": dimension}
+    # float64 vectors plus the float32 search matrix, with headroom for the build
+    estimated_bytes = size * dimension * (8 + 4) * 1.5
+    available = available_memory_bytes()
+    if available is not None and estimated_bytes > available:
+        return [result("vectordb.skipped", params, {
+            "estimated_bytes": int(estimated_bytes), "available_bytes": available,
+        })]
+
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, dimension), dtype=np.float32)
+    query_vectors = rng.standard_normal((queries, dimension), dtype=np.float32)
+    database = VectorDatabase(embedding_model=LocalEmbeddingModel(dimension=dimension))
+
+    rss_before = resident_memory_bytes()
+    start = time.perf_counter()
+    for row in range(size):
+        database.insert(f"chunk-{row}", vectors[row], {"page": row % 50, "section": f"s{row % 7}"})
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    database._normalized_matrix()
+    build_seconds = time.perf_counter() - start
+    rss_after = resident_memory_bytes()
+
+    stored_bytes = sum(vector.nbytes for vector in database.vectors.values())
+    results = [result("vectordb.insert", params, {
+        "total_s": insert_seconds,
+        "per_insert_us": insert_seconds / size * 1e6,
+        "index_build_s": build_seconds,
+        "vector_bytes": stored_bytes,
+        "matrix_bytes": int(database._unit_matrix.nbytes),
+        "rss_delta_bytes": rss_after - rss_before,
+    })]
+
+    query_iter = iter(range(10 ** 9))
+    next_query = lambda: query_vectors[next(query_iter) % queries]
+    searches = {
+        "vectordb.search": lambda: database.search(next_query(), k=5),
+        "vectordb.search_filtered": lambda: database.search(
+            next_query(), k=5, filter={"page": {"$gte": 10, "$lt": 20}, "section": "s3"}
+        ),
+        "vectordb.search_mmr": lambda: database.search_mmr(next_query(), k=5, fetch_k=20),
+        "vectordb.search_multi": lambda: database.search_multi(query_vectors[:4], k=5),
+    }
+    for name, function in searches.items():
+        function()  # Warm-up
+        results.append(result(name, params, latency_metrics(time_calls(function, queries))))
+
+    for quantize in (None, "int8"):
+        start = time.perf_counter()
+        snapshot = database.to_snapshot(quantize=quantize)
+        export_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        restored = VectorDatabase.from_snapshot(snapshot, embedding_model=database.embedding_model)
+        import_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        restored.search(query_vectors[0], k=5)
+        first_search_seconds = time.perf_counter() - start
+        results.append(result("vectordb.snapshot", dict(params, quantize=quantize or "float32"), {
+            "export_s": export_seconds,
+            "import_ms": import_seconds * 1000,
+            "first_search_ms": first_search_seconds * 1000,
+            "snapshot_bytes": len(snapshot),
+        }))
+        del snapshot, restored
+
+    del database, vectors
+    return results
+
+
+def bench_pdf_extraction(page_counts: List[int], repeat: int) -> List[Dict[str, Any]]:
+    with quiet():
+        from prd_api.extraction import extract_pages_from_pdf
+    results = []
+    for pages in page_counts:
+        text = synthetic_document(pages * 350, seed=pages, sections=pages)
+        page_texts = [text[i:i + 2000] for i in range(0, len(text), 2000)][:pages]
+        pdf = make_text_pdf(page_texts)
+        with quiet():
+            samples = time_calls(lambda: extract_pages_from_pdf(pdf, "benchmark.pdf"), repeat)
+        metrics = latency_metrics(samples)
+        metrics["per_page_ms"] = statistics.median(samples) / len(page_texts) * 1000
+        results.append(result("pdf.extract_pages", {"pages": len(page_texts), "pdf_bytes": len(pdf)}, metrics))
+    return results
+
+
+def bench_directory_ingest(files: int, pages: int) -> List[Dict[str, Any]]:
+    """Load, split and embed a directory of PDFs phase by phase, then as one stream."""
+    splitter = CharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+    with tempfile.TemporaryDirectory() as directory:
+        for index in range(files):
+            text = synthetic_document(pages * 350, seed=index, sections=pages)
+            page_texts = [text[i:i + 2000] for i in range(0, len(text), 2000)][:pages]
+            Path(directory, f"prd_{index:04d}.pdf").write_bytes(make_text_pdf(page_texts))
+
+        async def sequential() -> VectorDatabase:
+            loader = PDFLoader(directory)
+            loader.load()
+            chunks = splitter.split_texts(loader.documents)
+            return await VectorDatabase(LocalEmbeddingModel()).abuild_from_list(chunks)
+
+        async def streamed() -> VectorDatabase:
+            stream = splitter.asplit_stream(PDFLoader(directory).astream())
+            return await VectorDatabase(LocalEmbeddingModel()).abuild_from_stream(stream)
+
+        results = []
+        params = {"files": files, "pages_per_file": pages}
+        for name, build in (("ingest.sequential", sequential), ("ingest.streamed", streamed)):
+            start = time.perf_counter()
+            database = asyncio.run(build())
+            elapsed = time.perf_counter() - start
+            results.append(result(name, params, {
+                "total_s": elapsed, "chunks": len(database.vectors), "chunks_per_s": len(database.vectors) / elapsed,
+            }))
+    return results
+
+
+def bench_simple_rag(document_words: List[int], queries: int) -> List[Dict[str, Any]]:
+    with quiet():
+        from prd_api.config import RAG_CONTEXT_TOKEN_BUDGET
+        from prd_api.dependencies import document_store
+        from prd_api.rag import decompose_question
+        rag_system = document_store.get_rag_system()
+    if rag_system is None:
+        return [result("rag.skipped", {}, {"rag_available": 0})]
+
+    from aimakerspace.context import pack_context
+
+    results = []
+    questions = synthetic_questions(queries)
+    for words in document_words:
+        text = synthetic_document(words, seed=words)
+        document_id = f"bench_{words}"
+        params = {"document_words": words, "document_chars": len(text)}
+
+        with quiet():
+            start = time.perf_counter()
+            chunks = asyncio.run(rag_system.process_document(text, document_id))
+            ingest_seconds = time.perf_counter() - start
+        results.append(result("rag.ingest", params, {
+            "total_s": ingest_seconds, "chunks": chunks, "chunks_per_s": chunks / ingest_seconds,
+        }))
+
+        question_iter = iter(range(10 ** 9))
+        next_question = lambda: questions[next(question_iter) % len(questions)]
+
+        def retrieve_and_pack() -> str:
+            found = rag_system.search_document(next_question(), document_id, k=3)
+            return pack_context(found, token_budget=RAG_CONTEXT_TOKEN_BUDGET)
+
+        retrieve_and_pack()  # Warm-up builds the search matrix
+        results.append(result("rag.query", params, latency_metrics(time_calls(retrieve_and_pack, queries))))
+        results.append(result("rag.query_multi", params, latency_metrics(time_calls(
+            lambda: rag_system.search_document(
+                next_question(), document_id, k=3,
+                queries=decompose_question("Compare the login and checkout error handling")
+            ),
+            queries,
+        ))))
+
+        document_store.remove(document_id)
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _result_key(entry: Dict[str, Any]) -> str:
+    return entry["benchmark"] + json.dumps(entry["params"], sort_keys=True)
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Return a line for each metric that regressed by more than ``threshold``."""
+    previous = {_result_key(entry): entry["metrics"] for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in current["results"]:
+        old_metrics = previous.get(_result_key(entry))
+        if not old_metrics:
+            continue
+        for metric, value in entry["metrics"].items():
+            old = old_metrics.get(metric)
+            if metric == "calls" or not isinstance(value, (int, float)) or not old:
+                continue
+            change = (value - old) / abs(old)
+            if _higher_is_better(metric):
+                change = -change
+            if change > threshold:
+                regressions.append(
+                    f"{entry['benchmark']} {entry['params']} {metric}: {old:.4g} -> {value:.4g} ({change:+.0%} worse)"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated VectorDatabase corpus sizes")
+    parser.add_argument("--dimension", type=int, default=768, help="Vector dimension (Gemini text-embedding-004 is 768)")
+    parser.add_argument("--queries", type=int, default=50, help="Timed queries per search benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions for splitter and PDF benchmarks")
+    parser.add_argument("--pdf-pages", default="10,50", help="Comma-separated page counts for PDF extraction")
+    parser.add_argument("--ingest-files", type=int, default=24, help="PDFs in the directory ingestion benchmark")
+    parser.add_argument("--rag-words", default="5000,50000", help="Comma-separated document sizes for SimpleRAG")
+    parser.add_argument("--only", help="Comma-separated subset: splitter,vectordb,pdf,ingest,rag")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON; exit 1 if any metric regressed beyond --threshold")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    suites = set((args.only or "splitter,vectordb,pdf,ingest,rag").split(","))
+    as_ints = lambda value: [int(item) for item in value.split(",") if item]
+
+    results: List[Dict[str, Any]] = []
+    if "splitter" in suites:
+        results += bench_splitter(200_000, args.repeat)
+    if "vectordb" in suites:
+        for size in as_ints(args.sizes):
+            results += bench_vector_database(size, args.dimension, args.queries)
+    if "pdf" in suites:
+        results += bench_pdf_extraction(as_ints(args.pdf_pages), args.repeat)
+    if "ingest" in suites:
+        results += bench_directory_ingest(args.ingest_files, pages=5)
+    if "rag" in suites:
+        results += bench_simple_rag(as_ints(args.rag_words), args.queries)
+
+    report = {"environment": environment(), "results": results}
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
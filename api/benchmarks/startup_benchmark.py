@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the FastAPI app
+
+Each run starts a fresh interpreter with ``python -X importtime`` and
+imports app.py, so the numbers reflect what a serverless cold start pays.
+Reports the median import time, the packages that cost the most, and (in a
+separate fresh process) the latency of the first request to a cheap endpoint
+and of the first RAG system initialization:
+
+    python benchmarks/startup_benchmark.py --output before.json
+    python benchmarks/startup_benchmark.py --output after.json --compare before.json
+
+The report uses the same result shape as rag_benchmarks.py, so ``--compare``
+flags import-cost regressions the same way.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from rag_benchmarks import DEFAULT_THRESHOLD, compare, environment, result
+
+API_DIR = Path(__file__).resolve().parent.parent
+# "import time:       self [us] |  cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# Runs in a fresh process: first request and first RAG initialization, in milliseconds
+_FIRST_REQUEST_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.app) as client:
+    ready = time.perf_counter()
+    response = client.get("/api/usage-info")
+    responded = time.perf_counter()
+    response.raise_for_status()
+rag_start = time.perf_counter()
+from prd_api.dependencies import document_store
+rag_available = document_store.get_rag_system() is not None
+rag_ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (responded - ready) * 1000,
+    "until_first_response_ms": (responded - start) * 1000,
+    "rag_init_ms": (rag_ready - rag_start) * 1000,
+    "rag_available": int(rag_available),
+}))
+"""
+
+
+def child_environment() -> Dict[str, str]:
+    # The benchmark measures the app itself, so no background warmup and no noisy logs
+    return dict(os.environ, WARMUP_ON_STARTUP="false", LOG_LEVEL="WARNING", PYTHONDONTWRITEBYTECODE="1")
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into ``{"module", "self_us", "cumulative_us", "depth"}`` rows."""
+    rows = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return rows
+
+
+def measure_import(module: str) -> List[Dict[str, Any]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=API_DIR, env=child_environment(), capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def package_costs(rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Total self time per top-level package, in milliseconds."""
+    costs: Dict[str, float] = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        costs[package] = costs.get(package, 0.0) + row["self_us"] / 1000
+    return costs
+
+
+def bench_import(module: str, runs: int, top: int) -> List[Dict[str, Any]]:
+    totals: List[float] = []
+    per_package: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        rows = measure_import(module)
+        totals.append(next(row["cumulative_us"] for row in reversed(rows) if row["module"] == module) / 1000)
+        for package, cost in package_costs(rows).items():
+            per_package.setdefault(package, []).append(cost)
+
+    results = [result("startup.import", {"module": module}, {
+        "median_ms": statistics.median(totals), "min_ms": min(totals), "max_ms": max(totals),
+        "modules": len(per_package), "runs": runs,
+    })]
+    medians = {package: statistics.median(costs) for package, costs in per_package.items()}
+    for package, cost in sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top]:
+        results.append(result("startup.package", {"module": module, "package": package}, {"self_ms": cost}))
+    return results
+
+
+def bench_first_request(runs: int) -> List[Dict[str, Any]]:
+    samples: List[Dict[str, float]] = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", _FIRST_REQUEST_SCRIPT],
+            cwd=API_DIR, env=child_environment(), capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    metrics = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+    return [result("startup.first_request", {"endpoint": "/api/usage-info"}, metrics)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app", help="Module to import (run from the api directory)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive packages to report")
+    parser.add_argument("--skip-request", action="store_true", help="Only measure the import")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON; exit 1 if any metric regressed beyond --threshold")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = bench_import(args.module, args.runs, args.top)
+    if not args.skip_request:
+        results += bench_first_request(args.runs)
+
+    report = {"environment": environment(), "results": results}
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
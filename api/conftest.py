@@ -0,0 +1,3 @@
+# The test suite lives in tests/. These are runnable scripts or app modules whose
+# names happen to match pytest's test file pattern.
+collect_ignore = ["test_rag.py", "test_gemini_rag.py", "prd_api/test_cases.py"]
@@ -0,0 +1,4 @@
+"""
+PRD to Test Case Generator API, split into routers that can be deployed together or apart
+"""
+from prd_api.application import ROUTER_MODULES, create_app
@@ -0,0 +1,99 @@
+"""
+Application factory: mounts any subset of the routers behind the shared middleware
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import time
+from contextlib import asynccontextmanager
+from typing import Iterable, Union
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+
+from prd_api.config import API_ROUTERS, RAG_INDEX_PATH, WARMUP_ON_STARTUP
+from prd_api.dependencies import document_store
+from prd_api.lazy import HEAVY_MODULES, load
+from prd_api.observability import logger, record_request_metrics
+from prd_api.services import install_default_executor
+
+# Modules under prd_api.routers, in mounting order
+ROUTER_MODULES = ("generation", "chat", "rag", "usage", "export")
+
+def warm_up(build_rag: bool = True) -> None:
+    """Import the heavy dependencies and build the RAG system ahead of the first request"""
+    start = time.perf_counter()
+    for module in HEAVY_MODULES:
+        try:
+            load(module)
+        except ImportError as e:
+            logger.warning("Warmup import failed: %s", e)
+    if build_rag:
+        document_store.get_rag_system()
+    logger.info("Warmup finished", extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1)})
+
+def load_rag_index(index_path: str) -> None:
+    """Load the prebuilt RAG index so it is served like an uploaded document"""
+    start = time.perf_counter()
+    try:
+        document_id = document_store.load_index(index_path)
+    except Exception as e:
+        logger.error("Failed to load RAG index %s: %s", index_path, e)
+        return
+    logger.info("Loaded RAG index", extra={
+        "index_path": index_path,
+        "document_id": document_id,
+        "chunks": len(document_store.documents[document_id].vectors),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+    })
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background warmup, index load and diagnostics without delaying startup"""
+    routers = app.state.routers
+    # A counting pool, so diagnostics can report thread pool saturation
+    install_default_executor(asyncio.get_running_loop())
+    tasks = []
+    if "usage" in routers:
+        from prd_api.diagnostics import run_diagnostics_periodically
+        tasks.append(asyncio.create_task(run_diagnostics_periodically()))
+    if RAG_INDEX_PATH and "rag" in routers:
+        tasks.append(asyncio.create_task(asyncio.to_thread(load_rag_index, RAG_INDEX_PATH)))
+    if WARMUP_ON_STARTUP:
+        tasks.append(asyncio.create_task(asyncio.to_thread(warm_up, "rag" in routers)))
+    yield
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+
+def create_app(routers: Union[str, Iterable[str]] = API_ROUTERS) -> FastAPI:
+    """Build the API with the given routers (names from ``ROUTER_MODULES``, or a comma-separated string).
+    
+    Only the chosen router modules are imported, so a deployment serving the
+    cheap endpoints never loads the PDF, OCR or RAG code paths.
+    """
+    if isinstance(routers, str):
+        routers = [name.strip() for name in routers.split(",") if name.strip()]
+    routers = tuple(routers)
+    unknown = [name for name in routers if name not in ROUTER_MODULES]
+    if unknown:
+        raise ValueError(f"Unknown routers: {', '.join(unknown)}. Choose from: {', '.join(ROUTER_MODULES)}")
+    
+    # Initialize FastAPI application
+    app = FastAPI(title="PRD to Test Case Generator API", lifespan=lifespan)
+    app.state.routers = routers
+    
+    # Configure CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(record_request_metrics)
+    
+    for name in routers:
+        app.include_router(importlib.import_module(f"prd_api.routers.{name}").router)
+    return app
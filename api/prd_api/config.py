@@ -0,0 +1,77 @@
+"""
+Settings shared by every router, read from the environment once at import
+"""
+import os
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Development mode configuration - Auto-detect Vercel production
+is_vercel_production = os.getenv("VERCEL_ENV") == "production"
+DEVELOPMENT_MODE = os.getenv("DEVELOPMENT_MODE", "false" if is_vercel_production else "true").lower() == "true"
+
+SERVICE_NAME = "PRD to Test Case Generator"
+STARTED_AT = time.monotonic()
+
+# Routers mounted by app.py, comma-separated; a deployment can serve a subset (see create_app)
+API_ROUTERS = os.getenv("API_ROUTERS", "generation,chat,rag,usage,export")
+
+# Logging: level, "json" or "text" lines, queue bound, and 1-in-N sampling of per-page/per-chunk messages
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEVELOPMENT_MODE else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = 10000
+LOG_SAMPLE_EVERY = max(1, int(os.getenv("LOG_SAMPLE_EVERY", "1" if DEVELOPMENT_MODE else "50")))
+# Loggers that get LOG_LEVEL; third-party libraries only log warnings and above
+APP_LOGGERS = ("prd_api", "aimakerspace")
+
+# Import heavy dependencies and build the RAG system in the background at startup
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+
+# Deep diagnostics run in the background; /api/health only reads their cached result
+DIAGNOSTICS_INTERVAL_SECONDS = float(os.getenv("DIAGNOSTICS_INTERVAL_SECONDS", "60"))
+
+# Built-in API key for free tier (limited usage)
+BUILT_IN_GEMINI_KEY = os.getenv("GEMINI_API_KEY", "")
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+
+# Rate limiting configuration - STRICT limits for free tier
+FREE_TIER_DAILY_LIMIT = 2  # Only 2 free uses per day to control costs
+UNLIMITED_DEV_LIMIT = 999999  # Unlimited for development
+
+# Upload limits - uploads are spooled to disk in chunks so memory stays bounded
+MAX_UPLOAD_SIZE = 15 * 1024 * 1024  # 15MB limit for upload
+UPLOAD_CHUNK_SIZE = 256 * 1024
+ALLOWED_PRD_TYPES = ['application/pdf', 'image/jpeg', 'image/jpg', 'image/png']
+BATCH_MAX_FILES = 20
+
+# Image preprocessing for vision OCR - text stays legible well below phone-camera resolution
+OCR_MAX_DIMENSION = 2048
+OCR_JPEG_QUALITY = 80
+
+# Server-side test case sessions - bounded by TTL, session count and approximate size
+SESSION_TTL_SECONDS = 2 * 60 * 60
+SESSION_MAX_COUNT = 500
+SESSION_MAX_TOTAL_BYTES = 64 * 1024 * 1024
+
+# Patch-based refinement - only the test cases closest to the feedback go to the model
+REFINE_PATCH_CONTEXT_SIZE = 8
+EMBEDDING_CACHE_MAX_ENTRIES = 10000
+
+# Semantic deduplication - cosine similarity at or above the threshold counts as a duplicate
+DEDUPE_SIMILARITY_THRESHOLD = 0.92
+DEDUPE_BLOCK_SIZE = 1024
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+
+# RAG prompt context budget (estimated tokens) after merging overlapping chunks
+RAG_CONTEXT_TOKEN_BUDGET = 1500
+# Upper bound on sub-queries per question for multi-query retrieval
+MULTI_QUERY_MAX_QUERIES = 4
+# Prebuilt index (python -m aimakerspace.ingest) loaded at startup and served under its document ID
+RAG_INDEX_PATH = os.getenv("RAG_INDEX_PATH", "")
+
+# Metrics: histogram bucket upper bounds (seconds) and opt-in Server-Timing response headers
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING", "true" if DEVELOPMENT_MODE else "false").lower() == "true"
@@ -0,0 +1,30 @@
+"""
+Process-wide service instances and the FastAPI dependencies that provide them
+
+Routers receive services through ``Depends``, so an app (or a test) can swap
+any of them with ``app.dependency_overrides``.
+"""
+from prd_api.rag import DocumentStore
+from prd_api.services import LLMClient, SingleFlight, TestCaseSessionStore, UsageLimiter
+
+llm_client = LLMClient()
+usage_limiter = UsageLimiter()
+test_case_sessions = TestCaseSessionStore()
+document_store = DocumentStore(llm_client)
+# Shared across endpoints; keys are namespaced by endpoint name
+inflight_requests = SingleFlight()
+
+def get_llm_client() -> LLMClient:
+    return llm_client
+
+def get_usage_limiter() -> UsageLimiter:
+    return usage_limiter
+
+def get_session_store() -> TestCaseSessionStore:
+    return test_case_sessions
+
+def get_document_store() -> DocumentStore:
+    return document_store
+
+def get_single_flight() -> SingleFlight:
+    return inflight_requests
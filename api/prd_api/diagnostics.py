@@ -0,0 +1,160 @@
+"""
+Deep health diagnostics, refreshed in the background and cached between reads
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from prd_api.config import BUILT_IN_GEMINI_KEY, DIAGNOSTICS_INTERVAL_SECONDS, EMBEDDING_CACHE_MAX_ENTRIES
+from prd_api.dependencies import document_store, inflight_requests, test_case_sessions
+from prd_api.lazy import Image, PyPDF2, pypdf
+from prd_api.observability import log_queue_handler, logger, timed
+from prd_api.services import SingleFlight, default_executor_for
+from prd_api.test_cases import embedding_cache, embedding_cache_stats
+
+# Minimal valid PDF used to check that both PDF libraries still parse
+DIAGNOSTICS_TEST_PDF = b"%PDF-1.4\n1 0 obj\n<<\n/Type /Catalog\n/Pages 2 0 R\n>>\nendobj\n2 0 obj\n<<\n/Type /Pages\n/Kids [3 0 R]\n/Count 1\n>>\nendobj\nxref\n0 4\n0000000000 65535 f \n0000000009 00000 n \n0000000058 00000 n \ntrailer\n<<\n/Size 4\n/Root 1 0 R\n>>\nstartxref\n109\n%%EOF"
+
+# Latest deep diagnostics; replaced as a whole so readers never see a partial result
+diagnostics_snapshot: Dict[str, Any] = {}
+# Concurrent refreshes (stale reads, the background loop) share one run of the checks
+diagnostics_refreshes = SingleFlight()
+
+def check_processing_libraries() -> Dict[str, Any]:
+    """Parse a test PDF with both PDF libraries and create a PIL image (blocking)"""
+    pdf_test: Dict[str, Any] = {"status": "unknown", "error": None}
+    for name, reader in (("pypdf2", lambda data: PyPDF2.PdfReader(data)), ("pypdf", lambda data: pypdf.PdfReader(data))):
+        try:
+            reader(io.BytesIO(DIAGNOSTICS_TEST_PDF))
+            pdf_test[name] = "ok"
+        except Exception as e:
+            pdf_test[name] = f"error: {str(e)}"
+    pdf_test["status"] = "ok" if "ok" in (pdf_test["pypdf2"], pdf_test["pypdf"]) else "error"
+    
+    image_test: Dict[str, Any] = {"status": "unknown", "error": None}
+    try:
+        Image.new('RGB', (1, 1), color='white')
+        image_test["status"] = "ok"
+    except Exception as e:
+        image_test = {"status": "error", "error": str(e)}
+    return {"pdf_processing": pdf_test, "image_processing": image_test}
+
+def process_memory() -> Dict[str, Any]:
+    """Resident and peak memory of this worker process, in bytes"""
+    memory: Dict[str, Any] = {}
+    try:
+        with open("/proc/self/statm") as statm:
+            memory["rss_bytes"] = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        memory["peak_rss_bytes"] = peak if sys.platform == "darwin" else peak * 1024  # Linux reports KiB
+    except ImportError:
+        pass
+    return memory
+
+def hit_rate(hits: int, misses: int) -> Optional[float]:
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+def runtime_saturation(loop: asyncio.AbstractEventLoop) -> Dict[str, Any]:
+    """Thread pool, queue and in-flight call pressure; must run on the event loop"""
+    # asyncio.to_thread runs on the loop's default executor, installed at startup
+    executor = default_executor_for(loop)
+    thread_pool: Dict[str, Any] = {"started": executor is not None}
+    if executor is not None:
+        thread_pool.update(executor.stats())
+    log_queue = log_queue_handler.queue
+    return {
+        "thread_pool": thread_pool,
+        "log_queue": {
+            "size": log_queue.qsize(),
+            "max_size": log_queue.maxsize,
+            "utilization": round(log_queue.qsize() / log_queue.maxsize, 4) if log_queue.maxsize else None,
+            "dropped": log_queue_handler.dropped,
+        },
+        "single_flight": {"in_flight": len(inflight_requests), **inflight_requests.stats},
+        "tasks": len(asyncio.all_tasks(loop)),
+    }
+
+async def collect_diagnostics() -> Dict[str, Any]:
+    """Run the deep checks and gather runtime statistics"""
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    # How long a callback waits for the loop right now; blocking work shows up here
+    tick = time.perf_counter()
+    await asyncio.sleep(0)
+    loop_lag_ms = (time.perf_counter() - tick) * 1000
+    
+    checks = await asyncio.to_thread(check_processing_libraries)
+    saturation = runtime_saturation(loop)
+    single_flight = saturation["single_flight"]
+    healthy = all(check["status"] == "ok" for check in checks.values())
+    return {
+        "status": "ok" if healthy else "degraded",
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "checks": checks,
+        "saturation": dict(saturation, event_loop_lag_ms=round(loop_lag_ms, 2)),
+        "caches": {
+            "single_flight": {
+                "coalesced_rate": hit_rate(single_flight["coalesced"], single_flight["started"]),
+            },
+            "embedding_cache": {
+                "entries": len(embedding_cache),
+                "max_entries": EMBEDDING_CACHE_MAX_ENTRIES,
+                "hits": embedding_cache_stats["hits"],
+                "misses": embedding_cache_stats["misses"],
+                "hit_rate": hit_rate(embedding_cache_stats["hits"], embedding_cache_stats["misses"]),
+            },
+            "test_case_sessions": {
+                "sessions": len(test_case_sessions),
+                "bytes": test_case_sessions.total_bytes,
+                "max_bytes": test_case_sessions.max_total_bytes,
+            },
+            "rag_documents": len(document_store.documents),
+        },
+        "memory": process_memory(),
+        "rag_available": document_store.available,
+        "environment": {
+            "has_api_key": bool(BUILT_IN_GEMINI_KEY),
+            "vercel_env": os.getenv("VERCEL_ENV", "local"),
+            "python_version": sys.version,
+            "platform": os.name,
+            "cwd": os.getcwd()
+        },
+    }
+
+async def refresh_diagnostics() -> Dict[str, Any]:
+    """Run the deep checks now and cache the result; callers arriving meanwhile share the run"""
+    async def collect_and_store() -> Dict[str, Any]:
+        global diagnostics_snapshot
+        with timed("diagnostics"):
+            diagnostics_snapshot = await collect_diagnostics()
+        return diagnostics_snapshot
+    
+    return await diagnostics_refreshes.run("diagnostics", collect_and_store)
+
+async def run_diagnostics_periodically() -> None:
+    """Refresh the cached diagnostics every DIAGNOSTICS_INTERVAL_SECONDS"""
+    while True:
+        try:
+            snapshot = await refresh_diagnostics()
+            if snapshot["status"] != "ok":
+                logger.warning("Diagnostics degraded", extra={"checks": snapshot["checks"]})
+        except Exception as e:
+            logger.error("Diagnostics failed: %s", e)
+        await asyncio.sleep(DIAGNOSTICS_INTERVAL_SECONDS)
+
+def diagnostics_age_seconds() -> Optional[float]:
+    if not diagnostics_snapshot:
+        return None
+    generated_at = datetime.fromisoformat(diagnostics_snapshot["generated_at"])
+    return round((datetime.now(timezone.utc) - generated_at).total_seconds(), 1)
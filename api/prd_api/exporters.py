@@ -0,0 +1,157 @@
+"""
+Streaming CSV, JSONL and XLSX encoders for test case exports
+"""
+from __future__ import annotations
+
+import csv
+import io
+import re
+import zipfile
+import zlib
+from typing import Iterable, Iterator, List
+from xml.sax.saxutils import escape as xml_escape
+
+from prd_api.models import TestCase
+
+# Export configuration - rows are encoded incrementally and flushed in chunks
+EXPORT_FIELDNAMES = ['Test Case ID', 'Feature', 'Scenario', 'Test Steps', 'Expected Result', 'Priority', 'Category']
+EXPORT_FLUSH_SIZE = 64 * 1024
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "test_cases.csv"),
+    "jsonl": ("application/x-ndjson", "test_cases.jsonl"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "test_cases.xlsx"),
+}
+
+def test_case_row(tc: TestCase) -> List[str]:
+    """Return the export row for a test case, in EXPORT_FIELDNAMES order"""
+    return [tc.test_case_id, tc.feature, tc.scenario, tc.test_steps, tc.expected_result, tc.priority, tc.category]
+
+def iter_csv_export(test_cases: Iterable[TestCase]) -> Iterator[bytes]:
+    """Yield the CSV export as UTF-8 chunks, starting with the header row"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDNAMES)
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    
+    for tc in test_cases:
+        writer.writerow(test_case_row(tc))
+        if buffer.tell() >= EXPORT_FLUSH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def iter_jsonl_export(test_cases: Iterable[TestCase]) -> Iterator[bytes]:
+    """Yield one JSON object per line, flushed in chunks"""
+    lines: List[str] = []
+    size = 0
+    for tc in test_cases:
+        line = tc.model_dump_json() + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= EXPORT_FLUSH_SIZE:
+            yield "".join(lines).encode("utf-8")
+            lines.clear()
+            size = 0
+    if lines:
+        yield "".join(lines).encode("utf-8")
+
+class _StreamSink:
+    """Non-seekable write target whose contents are drained between yields"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+# Characters that are not allowed anywhere in an XML 1.0 document
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Test Cases" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+def _xlsx_row(values: List[str]) -> str:
+    cells = "".join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{xml_escape(_XML_INVALID_CHARS.sub("", value))}</t></is></c>'
+        for value in values
+    )
+    return f"<row>{cells}</row>"
+
+def iter_xlsx_export(test_cases: Iterable[TestCase]) -> Iterator[bytes]:
+    """Yield a single-sheet XLSX workbook, streaming the worksheet row by row.
+    
+    Cells use inline strings so no shared-string table has to be built up front,
+    and the zip is written to a non-seekable sink so entries stream out as they
+    are compressed.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        
+        with archive.open("xl/worksheets/sheet1.xml", mode="w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_FIELDNAMES).encode("utf-8"))
+            for tc in test_cases:
+                sheet.write(_xlsx_row(test_case_row(tc)).encode("utf-8"))
+                if sink.size >= EXPORT_FLUSH_SIZE:
+                    yield sink.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield sink.drain()
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
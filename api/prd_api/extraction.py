@@ -0,0 +1,208 @@
+"""
+Text extraction from uploaded PDFs (PyPDF2 with a pypdf fallback) and images (Gemini Vision)
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import mmap
+import re
+from typing import Any, Dict, List, Tuple, Union
+
+from fastapi import HTTPException
+
+from prd_api.config import OCR_JPEG_QUALITY, OCR_MAX_DIMENSION
+from prd_api.lazy import Image, ImageOps, PyPDF2
+from prd_api.observability import instrumented, logger, timed
+from prd_api.uploads import as_stream
+
+@instrumented("extraction")
+def extract_pages_from_pdf(file_content: Union[bytes, mmap.mmap], filename: str = "unknown") -> List[Tuple[int, str]]:
+    """Extract (page number, text) for every page with text, with fallback options"""
+    
+    # Check file size (limit to 10MB for serverless)
+    max_file_size = 10 * 1024 * 1024  # 10MB
+    if len(file_content) > max_file_size:
+        raise HTTPException(
+            status_code=413, 
+            detail=f"PDF file too large ({len(file_content)/1024/1024:.1f}MB). Maximum size is 10MB for serverless processing."
+        )
+    
+    logger.debug("Processing PDF", extra={"file_name": filename, "size_kb": round(len(file_content) / 1024, 1)})
+    
+    pages: List[Tuple[int, str]] = []
+    errors = []
+    
+    # Method 1: Try PyPDF2 first (more reliable for most PDFs)
+    try:
+        logger.debug("Attempting PDF extraction", extra={"parser": "PyPDF2"})
+        
+        pdf_reader = PyPDF2.PdfReader(as_stream(file_content))
+        
+        # Check if PDF is encrypted
+        if pdf_reader.is_encrypted:
+            raise Exception("PDF is password-protected")
+        
+        for page_num, page in enumerate(pdf_reader.pages):
+            try:
+                page_text = page.extract_text()
+                if page_text.strip():  # Only add if there's actual text
+                    pages.append((page_num + 1, page_text))
+                    logger.debug("Extracted PDF page", extra={"parser": "PyPDF2", "page": page_num + 1, "sampled": True})
+            except Exception as page_error:
+                logger.debug("PDF page extraction failed: %s", page_error,
+                             extra={"parser": "PyPDF2", "page": page_num + 1, "sampled": True})
+                continue
+                
+        if pages:
+            logger.debug("PDF extraction succeeded", extra={
+                "parser": "PyPDF2", "pages": len(pages), "characters": sum(len(page_text) for _, page_text in pages)
+            })
+            return pages
+        else:
+            raise Exception("PyPDF2 extracted no readable text")
+            
+    except Exception as e:
+        errors.append(f"PyPDF2: {str(e)}")
+        logger.debug("PDF parser failed: %s", e, extra={"parser": "PyPDF2"})
+    
+    # Method 2: Try pypdf as fallback
+    try:
+        logger.debug("Attempting PDF extraction", extra={"parser": "pypdf"})
+            
+        from pypdf import PdfReader
+        pdf_reader = PdfReader(as_stream(file_content))
+        
+        for page_num, page in enumerate(pdf_reader.pages):
+            try:
+                page_text = page.extract_text()
+                if page_text.strip():
+                    pages.append((page_num + 1, page_text))
+                    logger.debug("Extracted PDF page", extra={"parser": "pypdf", "page": page_num + 1, "sampled": True})
+            except Exception as page_error:
+                logger.debug("PDF page extraction failed: %s", page_error,
+                             extra={"parser": "pypdf", "page": page_num + 1, "sampled": True})
+                continue
+                
+        if pages:
+            logger.debug("PDF extraction succeeded", extra={
+                "parser": "pypdf", "pages": len(pages), "characters": sum(len(page_text) for _, page_text in pages)
+            })
+            return pages
+        else:
+            raise Exception("pypdf extracted no readable text")
+            
+    except Exception as e:
+        errors.append(f"pypdf: {str(e)}")
+        logger.debug("PDF parser failed: %s", e, extra={"parser": "pypdf"})
+    
+    # If both methods failed
+    logger.warning("All PDF parsers failed", extra={"file_name": filename, "errors": errors})
+    
+    # Provide detailed error message
+    error_details = "; ".join(errors)
+    raise HTTPException(
+        status_code=400, 
+        detail=f"Unable to extract text from PDF '{filename}'. This could be due to: 1) Scanned PDF without OCR text, 2) Complex formatting, 3) Corrupted file, or 4) Unsupported PDF format. Errors: {error_details}. Try uploading as an image (JPG/PNG) for better results."
+    )
+
+def join_pdf_pages(pages: List[Tuple[int, str]]) -> Tuple[str, List[Tuple[int, int]]]:
+    """Join extracted pages into one text, returning (page number, start offset) per page"""
+    raw = "".join(page_text + "\n" for _, page_text in pages)
+    leading = len(raw) - len(raw.lstrip())
+    page_starts = []
+    position = 0
+    for page_number, page_text in pages:
+        page_starts.append((page_number, max(0, position - leading)))
+        position += len(page_text) + 1
+    return raw.strip(), page_starts
+
+def extract_text_from_pdf(file_content: Union[bytes, mmap.mmap], filename: str = "unknown") -> str:
+    """Extract text content from PDF file with fallback options"""
+    text, _ = join_pdf_pages(extract_pages_from_pdf(file_content, filename))
+    return text
+
+# Lines that look like section headings: numbered ("2.1 Login"), markdown ("## Login")
+# or short all-caps lines ("ERROR HANDLING")
+SECTION_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]+\S[^\n]{0,80}|\d+(?:\.\d+)*\.?[ \t]+[A-Z][^\n]{0,80}|[A-Z][A-Z0-9 &/()\-]{3,60})[ \t]*$",
+    re.MULTILINE
+)
+
+def find_section_headings(text: str) -> List[Tuple[int, str]]:
+    """Return (offset, heading) for each heading-like line in ``text``"""
+    return [
+        (match.start(), match.group(0).strip().lstrip("#").strip())
+        for match in SECTION_HEADING_PATTERN.finditer(text)
+    ]
+
+@instrumented("image_preprocessing")
+def preprocess_image_for_ocr(
+    file_content: Union[bytes, mmap.mmap],
+    max_dimension: int = OCR_MAX_DIMENSION,
+    quality: int = OCR_JPEG_QUALITY
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Downscale, grayscale and recompress an image before sending it to Gemini Vision.
+    
+    Returns the inline image part for ``generate_content`` and stats with the
+    payload bytes before and after preprocessing.
+    """
+    image = Image.open(as_stream(file_content))
+    original_format = image.format
+    original_size = image.size
+    
+    # Target size keeping aspect ratio, with the long side capped at max_dimension
+    scale = min(1.0, max_dimension / max(original_size))
+    target_size = (max(1, int(original_size[0] * scale)), max(1, int(original_size[1] * scale)))
+    
+    # JPEG draft mode decodes straight to grayscale at a reduced DCT scale,
+    # skipping most of the full-resolution decode work
+    if original_format == "JPEG":
+        image.draft("L", target_size)
+    
+    image = ImageOps.exif_transpose(image)
+    # Flatten transparency onto white first; a plain convert("L") drops alpha, which
+    # turns transparent backgrounds black and can hide dark text
+    if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+        image = Image.alpha_composite(Image.new("RGBA", image.size, "white"), image.convert("RGBA"))
+    image = image.convert("L")
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    processed = output.getvalue()
+    
+    # Small screenshots can already be tighter than a re-encode; send those untouched
+    if len(processed) >= len(file_content) and scale == 1.0:
+        part = {"mime_type": Image.MIME.get(original_format, "image/png"), "data": bytes(file_content)}
+    else:
+        part = {"mime_type": "image/jpeg", "data": processed}
+    
+    stats = {
+        "original_format": original_format,
+        "original_size": original_size,
+        "processed_size": image.size,
+        "bytes_before": len(file_content),
+        "bytes_after": len(part["data"]),
+    }
+    return part, stats
+
+async def extract_text_from_image(file_content: Union[bytes, mmap.mmap], gemini_model) -> str:
+    """Extract text content from image using Gemini Vision"""
+    try:
+        # Downscale and recompress off the event loop before the vision call
+        image_part, stats = await asyncio.to_thread(preprocess_image_for_ocr, file_content)
+        
+        logger.debug("Preprocessed image for OCR", extra=stats)
+        
+        # Use Gemini to extract text from image
+        prompt = """
+        Please extract all text content from this image. This appears to be a Product Requirements Document (PRD).
+        Return only the extracted text content, maintaining the structure and formatting as much as possible.
+        """
+        
+        with timed("ocr"):
+            response = await gemini_model.generate_content_async([prompt, image_part])
+        return response.text
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
@@ -0,0 +1,60 @@
+"""
+Deferred imports for the heavy third-party dependencies
+"""
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+# Serializes first loads: packages with circular submodules (numpy) can still
+# hand a partially initialized module to a second thread importing them at once
+_load_lock = threading.RLock()
+
+
+class _DeferredModule(types.ModuleType):
+    """Stand-in that imports the real module on first attribute access and forwards to it.
+    
+    Concurrent first use from several threads is safe: the first thread imports
+    under ``_load_lock`` and the others wait for the finished module
+    (``LazyLoader`` exposes half-initialized modules to other threads before
+    Python 3.12).
+    """
+    
+    def __getattr__(self, attr: str):
+        module = self.__dict__.get("_module")
+        if module is None:
+            with _load_lock:
+                module = self._module = importlib.import_module(self.__name__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str):
+    """Return module ``name``, deferring its execution until an attribute is first used.
+
+    Keeps heavy dependencies off the cold-start path for requests that never
+    touch them; modules that are already imported are returned as is. Raises
+    ``ModuleNotFoundError`` right away if the module does not exist.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _DeferredModule(name)
+
+
+def load(module) -> None:
+    """Import a ``lazy_import`` module now (no-op if it is already loaded)"""
+    with _load_lock:
+        importlib.import_module(module.__name__)
+
+
+# Heavy dependencies (google.generativeai alone takes about a second to import)
+Image = lazy_import("PIL.Image")
+ImageOps = lazy_import("PIL.ImageOps")
+np = lazy_import("numpy")
+PyPDF2 = lazy_import("PyPDF2")
+pypdf = lazy_import("pypdf")
+genai = lazy_import("google.generativeai")
+
+HEAVY_MODULES = (genai, np, PyPDF2, pypdf, Image, ImageOps)
@@ -0,0 +1,115 @@
+"""
+Request and response models for every router
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from prd_api.config import DEDUPE_SIMILARITY_THRESHOLD
+
+# API Key tiers
+class APIKeyTier:
+    FREE = "free"           # 2 uses/day with built-in key
+    USER_PROVIDED = "user"  # Unlimited with user's own key
+
+# Data models
+class TestCase(BaseModel):
+    test_case_id: str
+    feature: str
+    scenario: str
+    test_steps: str
+    expected_result: str
+    priority: str
+    category: str
+
+class ProcessResponse(BaseModel):
+    success: bool
+    message: str
+    test_cases: List[TestCase]
+    usage_info: Dict[str, Any]
+    session_id: Optional[str] = None
+
+# Test case session models
+class TestCaseSessionCreate(BaseModel):
+    test_cases: List[TestCase]
+
+class TestCaseSessionDelta(BaseModel):
+    upsert_test_cases: Optional[List[TestCase]] = None  # Added or replaced by test_case_id
+    delete_test_case_ids: Optional[List[str]] = None
+
+class TestCaseSessionResponse(BaseModel):
+    success: bool
+    session_id: str
+    test_cases: List[TestCase]
+    expires_at: datetime
+
+# RAG Data Models
+class RAGUploadResponse(BaseModel):
+    success: bool
+    message: str
+    document_id: str
+    chunks_count: int
+    usage_info: Dict[str, Any]
+
+class RAGChatRequest(BaseModel):
+    question: str
+    document_id: Optional[str] = None
+    api_key: Optional[str] = None
+    filter: Optional[Dict[str, Any]] = None  # Metadata filter, e.g. {"page": {"$gte": 2, "$lte": 4}}
+    multi_query: bool = False  # Split compound questions into sub-queries
+    query_variants: Optional[List[str]] = None  # Caller-provided rephrasings, implies multi_query
+
+class RAGChatResponse(BaseModel):
+    success: bool
+    message: str
+    answer: str
+    sources: List[str]
+    usage_info: Dict[str, Any]
+
+# Additional data models for prompting tool
+class ChatMessage(BaseModel):
+    role: str  # "user" or "assistant" 
+    content: str
+    timestamp: Optional[datetime] = None
+
+class PromptRequest(BaseModel):
+    message: str
+    context: Optional[str] = None  # Current test cases context
+    test_cases: Optional[List[TestCase]] = None  # Current test cases for refinement
+    api_key: Optional[str] = None
+    session_id: Optional[str] = None  # Use stored test cases instead of test_cases
+    upsert_test_cases: Optional[List[TestCase]] = None  # Deltas applied to the session first
+    delete_test_case_ids: Optional[List[str]] = None
+
+class PromptResponse(BaseModel):
+    success: bool
+    message: str
+    response: str
+    updated_test_cases: Optional[List[TestCase]] = None
+    usage_info: Dict[str, Any]
+
+class DeduplicateRequest(BaseModel):
+    test_cases: Optional[List[TestCase]] = None  # Optional when session_id is given
+    session_id: Optional[str] = None
+    threshold: float = DEDUPE_SIMILARITY_THRESHOLD
+    action: str = "flag"  # "flag" reports clusters, "merge" keeps one test case per cluster
+    api_key: Optional[str] = None
+
+class DeduplicateResponse(BaseModel):
+    success: bool
+    message: str
+    test_cases: List[TestCase]
+    clusters: List[Dict[str, Any]]
+    coverage: Dict[str, Any]
+
+class RefineTestCasesRequest(BaseModel):
+    test_cases: Optional[List[TestCase]] = None  # Optional when session_id is given
+    refinement_prompt: str
+    api_key: Optional[str] = None
+    mode: str = "suggest"  # "suggest" for markdown advice, "patch" to apply structured edits
+    session_id: Optional[str] = None
+    upsert_test_cases: Optional[List[TestCase]] = None
+    delete_test_case_ids: Optional[List[str]] = None
@@ -0,0 +1,263 @@
+"""
+Structured logging, latency metrics and the request middleware tying them together
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Request
+
+from prd_api.config import (
+    APP_LOGGERS, LATENCY_BUCKETS, LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE, LOG_SAMPLE_EVERY, SERVER_TIMING_ENABLED
+)
+
+# Correlates every log record with the request that produced it
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_LOG_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "request_id"}
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request_id and any ``extra`` fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _LOG_RECORD_FIELDS and key != "sampled":
+                entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request ID and sample high-volume messages.
+    
+    Runs on the caller's thread, where the request context is visible. Records
+    logged with ``extra={"sampled": True}`` are kept once every
+    ``LOG_SAMPLE_EVERY`` occurrences of the same message template.
+    """
+    
+    def __init__(self, sample_every: int = LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.sample_every = sample_every
+        self._occurrences: Counter = Counter()
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if getattr(record, "sampled", False) and self.sample_every > 1:
+            key = (record.name, record.msg)
+            self._occurrences[key] += 1
+            if (self._occurrences[key] - 1) % self.sample_every:
+                return False
+            record.sample_every = self.sample_every
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the caller: records are dropped when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def configure_logging() -> DroppingQueueHandler:
+    """Route all logging through a bounded queue drained by a background thread"""
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            return handler  # Already configured (module reloaded)
+    
+    output = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "text":
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+    else:
+        output.setFormatter(JsonLogFormatter())
+    
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(RequestContextFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(logging.WARNING)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(LOG_LEVEL)
+    
+    listener = logging.handlers.QueueListener(queue_handler.queue, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return queue_handler
+
+log_queue_handler = configure_logging()
+logger = logging.getLogger("prd_api")
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values, Prometheus style"""
+    
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *label_values: str) -> None:
+        # Observations arrive from worker threads too (asyncio.to_thread)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = [(labels, [list(series[0]), series[1], series[2]]) for labels, series in sorted(self._series.items())]
+        for label_values, (counts, total, count) in series_items:
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+class Counters:
+    """Monotonic counters keyed by label values"""
+    
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Counter = Counter()
+        self._lock = threading.Lock()
+    
+    def inc(self, *label_values: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[label_values] += amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+            lines.append(f"{self.name}{{{labels}}} {value}")
+        return lines
+
+request_duration_seconds = Histogram(
+    "prd_api_request_duration_seconds", "HTTP request latency until response headers are sent",
+    ("method", "route", "status")
+)
+stage_duration_seconds = Histogram(
+    "prd_api_stage_duration_seconds", "Time spent in each processing stage", ("stage",)
+)
+stage_errors_total = Counters("prd_api_stage_errors_total", "Stages that raised an exception", ("stage",))
+
+# Stage timings of the current request, for the Server-Timing header. asyncio tasks and
+# asyncio.to_thread copy the context, so the same list collects timings from both.
+request_stage_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_stage_timings", default=None
+)
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Record the duration of the enclosed block as ``stage``"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors_total.inc(stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_duration_seconds.observe(elapsed, stage)
+        timings = request_stage_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+def instrumented(stage: str):
+    """Decorator timing every call of a sync or async function as ``stage``"""
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Format stage timings (summed per stage, in first-seen order) as a Server-Timing value"""
+    totals: Dict[str, float] = {}
+    for stage, elapsed in timings:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    entries = [f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+# Client-supplied request IDs are accepted only if short and header-safe
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+async def record_request_metrics(request: Request, call_next):
+    """Time every request by route template, tag its logs with a request ID and
+    optionally expose stage timings"""
+    incoming_id = request.headers.get("x-request-id", "")
+    request_id = incoming_id if _REQUEST_ID_PATTERN.fullmatch(incoming_id) else secrets.token_hex(8)
+    id_token = request_id_var.set(request_id)
+    timings: List[Tuple[str, float]] = []
+    token = request_stage_timings.set(timings)
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    finally:
+        elapsed = time.perf_counter() - start
+        request_stage_timings.reset(token)
+        # Route templates (not raw paths) keep label cardinality bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        request_duration_seconds.observe(elapsed, request.method, route, status)
+        logger.info("Request handled", extra={
+            "method": request.method, "route": route, "status": int(status), "duration_ms": round(elapsed * 1000, 1)
+        })
+        request_id_var.reset(id_token)
+    response.headers["X-Request-ID"] = request_id
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
@@ -0,0 +1,256 @@
+"""
+Retrieval-augmented chat over uploaded documents, built on the aimakerspace library
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import re
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from prd_api.config import MULTI_QUERY_MAX_QUERIES, RAG_CONTEXT_TOKEN_BUDGET
+from prd_api.extraction import find_section_headings
+from prd_api.lazy import lazy_import
+from prd_api.observability import instrumented, logger, timed
+from prd_api.services import LLMClient
+
+# RAG components, loaded with the RAG system on first use (see DocumentStore.get_rag_system)
+try:
+    text_utils = lazy_import("aimakerspace.text_utils")
+    vectordatabase = lazy_import("aimakerspace.vectordatabase")
+    bm25 = lazy_import("aimakerspace.bm25")
+    context_packing = lazy_import("aimakerspace.context")
+    embedding_providers = lazy_import("aimakerspace.embedding")
+    ingest = lazy_import("aimakerspace.ingest")
+    RAG_IMPORTS_AVAILABLE = True
+except ImportError as e:
+    logger.error("RAG imports failed: %s", e)
+    RAG_IMPORTS_AVAILABLE = False
+
+# "login and checkout error handling" -> "login error handling", "checkout error handling"
+_CONJUNCTION_PATTERN = re.compile(
+    r"\b(?P<a>[\w-]+) (?:and|or|vs\.?|versus) (?P<b>[\w-]+)(?P<tail>[^,;?]*)", re.IGNORECASE
+)
+_CLAUSE_SPLIT_PATTERN = re.compile(r"[?;]\s*|\s*,?\s*\band also\b\s*", re.IGNORECASE)
+
+def decompose_question(question: str, max_queries: int = MULTI_QUERY_MAX_QUERIES) -> List[str]:
+    """Cheaply split a compound question into retrieval sub-queries.
+    
+    The original question always comes first. Separate clauses become their own
+    queries, and a conjunction such as "A and B <tail>" is distributed into
+    "A <tail>" and "B <tail>". No LLM call is made.
+    """
+    queries = [question.strip()]
+    clauses = [clause.strip() for clause in _CLAUSE_SPLIT_PATTERN.split(question) if clause.strip()]
+    if len(clauses) > 1:
+        queries.extend(clauses)
+    for clause in clauses:
+        match = _CONJUNCTION_PATTERN.search(clause)
+        if match:
+            tail = match.group("tail").rstrip()
+            queries.extend([f"{match.group('a')}{tail}", f"{match.group('b')}{tail}"])
+    
+    unique = list(dict.fromkeys(query for query in queries if query))
+    return unique[:max_queries]
+
+class SimpleRAG:
+    """Simple RAG system using the aimakerspace library"""
+    
+    def __init__(self, store: DocumentStore, llm: LLMClient, context_token_budget: int = RAG_CONTEXT_TOKEN_BUDGET):
+        if not RAG_IMPORTS_AVAILABLE:
+            raise Exception("RAG components not available")
+        self.store = store
+        self.llm = llm
+        # Use smaller chunks for better retrieval precision
+        self.text_splitter = text_utils.CharacterTextSplitter(chunk_size=500, chunk_overlap=100)
+        self.context_token_budget = context_token_budget
+    
+    def chunk_metadata(self, text: str, document_id: str, offsets: List[int],
+                       page_starts: Optional[List[Tuple[int, int]]] = None) -> List[Dict[str, Any]]:
+        """Metadata for chunks starting at ``offsets``: page, section heading, document and upload time"""
+        headings = find_section_headings(text)
+        heading_offsets = [offset for offset, _ in headings]
+        page_offsets = [offset for _, offset in page_starts or []]
+        uploaded_at = datetime.now().timestamp()
+        
+        metadata = []
+        for offset in offsets:
+            heading_index = bisect.bisect_right(heading_offsets, offset) - 1
+            page_index = bisect.bisect_right(page_offsets, offset) - 1
+            metadata.append({
+                "document_id": document_id,
+                "chunk_offset": offset,
+                "page": page_starts[page_index][0] if page_index >= 0 else None,
+                "section": headings[heading_index][1] if heading_index >= 0 else None,
+                "uploaded_at": uploaded_at,
+            })
+        return metadata
+    
+    async def process_document(self, text: str, document_id: str, api_key: str = None,
+                               page_starts: Optional[List[Tuple[int, int]]] = None) -> int:
+        """Process a document and store it in the vector database.
+        
+        ``page_starts`` holds (page number, start offset) pairs so each chunk can
+        be tagged with the page it starts on.
+        """
+        try:
+            # Split text into chunks, remembering where each one starts
+            with timed("chunking"):
+                chunks_with_offsets = self.text_splitter.split_with_offsets(text)
+                chunks = [chunk for _, chunk in chunks_with_offsets]
+                metadata = self.chunk_metadata(text, document_id, [offset for offset, _ in chunks_with_offsets], page_starts)
+            
+            # Gemini embeddings with the provided API key; the local model when no key is configured
+            embedding_model = embedding_providers.get_embedding_model(api_key=api_key or None)
+            vector_db = vectordatabase.VectorDatabase(embedding_model=embedding_model)
+            
+            # Build embeddings and populate vector database
+            with timed("embedding"):
+                vector_db = await vector_db.abuild_from_list(chunks, metadata)
+            
+            # Store in memory (in production, use persistent storage)
+            self.store.documents[document_id] = vector_db
+            with timed("indexing"):
+                self.store.keyword_indexes[document_id] = bm25.BM25Index(list(vector_db.vectors))
+            
+            return len(chunks)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
+    
+    @instrumented("search")
+    def search_document(self, question: str, document_id: str, k: int = 3, candidates: int = 20,
+                        filter: Optional[Dict[str, Any]] = None,
+                        queries: Optional[List[str]] = None) -> List[str]:
+        """Search for relevant chunks in a document.
+        
+        Combines embedding similarity with BM25 keyword matching (so exact IDs,
+        field names and error codes are found) using reciprocal rank fusion.
+        ``filter`` is a VectorDatabase metadata filter (page, section, ...).
+        
+        When ``queries`` holds more than one query (see ``decompose_question``),
+        they are embedded in one batch and scored together with a single
+        matrix product; their vector and keyword rankings are all fused.
+        """
+        if document_id not in self.store.documents:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        vector_db = self.store.documents[document_id]
+        pool = max(k, candidates)
+        queries = queries or [question]
+        if len(queries) > 1:
+            vector_results = vector_db.multi_search_by_text(
+                queries, k=pool, return_as_text=True, fetch_k=pool, filter=filter
+            )
+        else:
+            # MMR keeps near-identical overlapping chunks from filling the candidate list
+            vector_results = vector_db.search_by_text(
+                queries[0], k=pool, return_as_text=True, mmr=True, fetch_k=pool * 2, lambda_mult=0.7, filter=filter
+            )
+        
+        keyword_index = self.store.keyword_indexes.get(document_id)
+        if keyword_index is None:
+            return vector_results[:k]
+        
+        mask = vector_db.filter_mask(filter) if filter else None
+        keyword_results = [
+            [text for text, _ in keyword_index.search(query, k=pool, mask=mask)] for query in queries
+        ]
+        fused = bm25.reciprocal_rank_fusion([vector_results, *keyword_results])
+        return [text for text, _ in fused[:k]]
+    
+    async def generate_answer(self, question: str, context_chunks: List[str], api_key: str = "",
+                              document_id: Optional[str] = None) -> str:
+        """Generate an answer using the context chunks, packed to the context token budget"""
+        offsets = None
+        if document_id in self.store.documents:
+            vector_db = self.store.documents[document_id]
+            offsets = {
+                chunk: vector_db.get_metadata(chunk)["chunk_offset"]
+                for chunk in context_chunks if "chunk_offset" in vector_db.get_metadata(chunk)
+            }
+        context = context_packing.pack_context(context_chunks, token_budget=self.context_token_budget, offsets=offsets)
+        
+        # Use provided API key or built-in key
+        gemini_key = api_key if api_key else self.llm.built_in_key
+        if not gemini_key:
+            return "API key required for RAG functionality."
+        
+        model = self.llm.model(gemini_key)
+        
+        prompt = f"""You are a document analysis assistant. Answer questions about the document content provided below.
+
+INSTRUCTIONS:
+- Use the document context below to answer the user's question
+- Be helpful and informative when the information IS available in the context
+- Extract and summarize relevant information from the provided context
+- Do NOT generate test cases, requirements, or structured outputs unless specifically asked about what's IN the document
+- If the question asks to generate/create new content, say: "I can only answer questions about the existing document content. For generating new content like test cases, please use the appropriate generation tool."
+- Only say you cannot find information if it's truly not present in any of the provided context chunks
+
+DOCUMENT CONTEXT:
+{context}
+
+USER QUESTION: {question}
+
+RESPONSE (based on the document context above):"""
+        
+        with timed("generation"):
+            response = await model.generate_content_async(prompt)
+        return response.text
+
+class DocumentStore:
+    """In-memory RAG documents plus the shared SimpleRAG, which is built on first use.
+    
+    ``keyword_indexes`` holds the BM25 index built at ingest time for each entry
+    of ``documents``, aligned with the vector store's insertion order so metadata
+    filter masks apply to both.
+    """
+    
+    def __init__(self, llm: LLMClient):
+        self.llm = llm
+        # In production, use persistent storage
+        self.documents: Dict[str, vectordatabase.VectorDatabase] = {}
+        self.keyword_indexes: Dict[str, bm25.BM25Index] = {}
+        self.available = RAG_IMPORTS_AVAILABLE
+        self._rag_system: Optional[SimpleRAG] = None
+        self._lock = threading.Lock()
+    
+    def get_rag_system(self) -> Optional[SimpleRAG]:
+        """Load the RAG components and build the shared SimpleRAG once; None if unavailable"""
+        if self._rag_system is not None or not self.available:
+            return self._rag_system
+        with self._lock:
+            if self._rag_system is None and self.available:
+                try:
+                    # Touch every module so import errors surface here, not mid-request
+                    (vectordatabase.VectorDatabase, bm25.BM25Index, context_packing.pack_context,
+                     embedding_providers.get_embedding_model)
+                    self._rag_system = SimpleRAG(self, self.llm)
+                    logger.info("RAG system initialized successfully")
+                except Exception as e:
+                    logger.error("RAG system failed to initialize: %s", e)
+                    self.available = False
+        return self._rag_system
+    
+    async def aget_rag_system(self) -> Optional[SimpleRAG]:
+        """``get_rag_system`` that loads off the event loop when not yet initialized"""
+        if self._rag_system is not None or not self.available:
+            return self._rag_system
+        return await asyncio.to_thread(self.get_rag_system)
+    
+    def load_index(self, index_path: str) -> str:
+        """Load a prebuilt index (``python -m aimakerspace.ingest``) as a document and return its ID"""
+        document_id = ingest.read_manifest(index_path)["document_id"]
+        # Queries are embedded by the model the index was built with, not this deployment's default
+        vector_db = ingest.load_index(index_path, api_key=self.llm.built_in_key or None)
+        self.documents[document_id] = vector_db
+        self.keyword_indexes[document_id] = bm25.BM25Index(list(vector_db.vectors))
+        return document_id
+    
+    def remove(self, document_id: str) -> None:
+        self.documents.pop(document_id, None)
+        self.keyword_indexes.pop(document_id, None)
@@ -0,0 +1 @@
+# Each module defines one ``router``; mount any subset with prd_api.create_app
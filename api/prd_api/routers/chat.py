@@ -0,0 +1,296 @@
+"""
+Chat with the model about the current test cases, and feedback-driven refinement
+"""
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from prd_api.dependencies import get_llm_client, get_session_store, get_usage_limiter
+from prd_api.models import PromptRequest, PromptResponse, RefineTestCasesRequest
+from prd_api.observability import timed
+from prd_api.services import LLMClient, TestCaseSessionStore, UsageLimiter
+from prd_api.test_cases import apply_test_case_patch, generate_refinement_patch
+
+router = APIRouter(tags=["chat"])
+
+async def generate_llm_response(llm: LLMClient, prompt: str, context: str = "", api_key: str = "") -> str:
+    """Generate response from Gemini LLM"""
+    try:
+        # Use provided API key or built-in key
+        gemini_key = api_key if api_key else llm.built_in_key
+        if not gemini_key:
+            return """## ⚠️ API Key Required
+
+To use the chatbot functionality, you need to provide a Google Gemini API key.
+
+### How to get an API key:
+1. Visit [Google AI Studio](https://aistudio.google.com/app/apikey)
+2. Sign in with your Google account
+3. Create a new API key
+4. Copy the key and paste it in the API key field
+
+### Alternative:
+You can also set the `GEMINI_API_KEY` environment variable in the backend for automatic usage."""
+        
+        model = llm.model(gemini_key)
+        
+        # Construct the full prompt with context
+        full_prompt = f"""You are a helpful AI assistant. You MUST format your response using markdown syntax.
+
+CRITICAL: Your response MUST start with ## and use proper markdown formatting throughout.
+
+FORMATTING REQUIREMENTS:
+- Start with ## for the main topic
+- Use ### for subtopics
+- Use **bold** for important terms
+- Use - for bullet points
+- Use 1. 2. 3. for numbered lists
+- Use `backticks` for code/technical terms
+
+CONTEXT: {context}
+
+USER QUERY: {prompt}
+
+RESPONSE FORMAT (copy this structure):
+## [Main Topic Title]
+
+### [Subtopic 1]
+- **Key point 1**: Explanation
+- **Key point 2**: More details
+
+### [Subtopic 2]
+1. **Step 1**: Description
+2. **Step 2**: More details
+
+Remember: Start with ## and use markdown formatting throughout your entire response."""
+        with timed("generation"):
+            response = await model.generate_content_async(full_prompt)
+        response_text = response.text
+        
+        # Post-process to ensure proper markdown formatting
+        if not response_text.startswith('##'):
+            # Restructure the response with proper markdown formatting
+            lines = response_text.strip().split('\n')
+            formatted_lines = []
+            
+            # Add main heading
+            formatted_lines.append("## Object-Oriented Programming Explanation")
+            formatted_lines.append("")
+            
+            # Process the content
+            current_section = None
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                    
+                # Check if this looks like a section header
+                if any(keyword in line.lower() for keyword in ['objects:', 'properties:', 'methods:', 'the power', 'in short', 'let\'s say']):
+                    if current_section:
+                        formatted_lines.append("")
+                    formatted_lines.append(f"### {line}")
+                    current_section = line
+                else:
+                    # Regular content line
+                    if line.startswith('* '):
+                        formatted_lines.append(line)
+                    else:
+                        formatted_lines.append(f"- {line}")
+            
+            response_text = '\n'.join(formatted_lines)
+        
+        return response_text
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+
+@router.post("/api/chat")
+async def chat_with_llm(
+    request: PromptRequest,
+    http_request: Request,
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Chat with LLM for test case guidance and refinement"""
+    try:
+        client_id = limiter.client_identifier(http_request)
+        
+        # Check usage limits
+        usage_info = limiter.check_free_tier(client_id)
+        
+        # Use provided API key or check free tier
+        if not request.api_key and not usage_info["can_use"]:
+            return PromptResponse(
+                success=False,
+                message="Daily free tier limit reached. Please provide your own API key.",
+                response="",
+                usage_info=usage_info
+            )
+        
+        # Prepare context from current test cases
+        test_cases = sessions.resolve(
+            request.session_id, request.test_cases, request.upsert_test_cases, request.delete_test_case_ids
+        )
+        context = ""
+        if test_cases:
+            context = f"Current test cases:\n"
+            for i, tc in enumerate(test_cases[:5], 1):  # Limit to first 5 for context
+                context += f"{i}. Feature: {tc.feature}\n   Scenario: {tc.scenario}\n   Priority: {tc.priority}\n\n"
+        
+        if request.context:
+            context += f"\nAdditional context: {request.context}"
+        
+        # Generate LLM response
+        response_text = await generate_llm_response(
+            llm,
+            request.message, 
+            context, 
+            request.api_key or llm.built_in_key
+        )
+        
+        # Increment usage if using free tier
+        if not request.api_key:
+            limiter.increment(client_id)
+            usage_info = limiter.check_free_tier(client_id)
+        
+        return PromptResponse(
+            success=True,
+            message="Response generated successfully",
+            response=response_text,
+            usage_info=usage_info
+        )
+        
+    except HTTPException:
+        # Expired sessions (404) and bad requests (400) keep their status codes
+        raise
+    except Exception as e:
+        return PromptResponse(
+            success=False,
+            message=f"Error: {str(e)}",
+            response="",
+            usage_info=usage_info if 'usage_info' in locals() else {}
+        )
+
+@router.post("/api/refine-test-cases")
+async def refine_test_cases(
+    request: RefineTestCasesRequest,
+    http_request: Request,
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Refine existing test cases based on user feedback"""
+    try:
+        client_id = limiter.client_identifier(http_request)
+        
+        # Check usage limits
+        usage_info = limiter.check_free_tier(client_id)
+        
+        # Use provided API key or check free tier
+        if not request.api_key and not usage_info["can_use"]:
+            return PromptResponse(
+                success=False,
+                message="Daily free tier limit reached. Please provide your own API key.",
+                response="",
+                usage_info=usage_info
+            )
+        
+        # Prepare context with current test cases
+        test_cases = sessions.resolve(
+            request.session_id, request.test_cases, request.upsert_test_cases, request.delete_test_case_ids
+        )
+        if not test_cases:
+            raise HTTPException(status_code=400, detail="No test cases provided. Send test_cases or a session_id.")
+        
+        if request.mode == "patch":
+            gemini_key = request.api_key or llm.built_in_key
+            if not gemini_key:
+                raise HTTPException(status_code=400, detail="API key required for structured refinement.")
+            
+            operations, summary = await generate_refinement_patch(request.refinement_prompt, test_cases, gemini_key, llm)
+            updated_test_cases, applied = apply_test_case_patch(test_cases, operations)
+            
+            # Persist only the changed test cases back into the session
+            if request.session_id:
+                changed = set(applied["added"]) | set(applied["modified"])
+                sessions.apply_delta(
+                    request.session_id,
+                    [tc for tc in updated_test_cases if tc.test_case_id in changed],
+                    applied["deleted"]
+                )
+            
+            if not request.api_key:
+                limiter.increment(client_id)
+                usage_info = limiter.check_free_tier(client_id)
+            
+            response_text = "## Test Case Updates\n\n" + (f"{summary}\n\n" if summary else "")
+            for label, key in (("Added", "added"), ("Modified", "modified"), ("Deleted", "deleted")):
+                if applied[key]:
+                    response_text += f"- **{label}**: {', '.join(f'`{tc_id}`' for tc_id in applied[key])}\n"
+            if not any(applied.values()):
+                response_text += "- No changes were needed for this feedback.\n"
+            
+            return PromptResponse(
+                success=True,
+                message=f"Applied {sum(len(ids) for ids in applied.values())} test case changes",
+                response=response_text,
+                updated_test_cases=updated_test_cases,
+                usage_info=usage_info
+            )
+        
+        context = "Current test cases to refine:\n"
+        for i, tc in enumerate(test_cases, 1):
+            context += f"{i}. ID: {tc.test_case_id}\n"
+            context += f"   Feature: {tc.feature}\n"
+            context += f"   Scenario: {tc.scenario}\n"
+            context += f"   Test Steps: {tc.test_steps}\n"
+            context += f"   Expected Result: {tc.expected_result}\n"
+            context += f"   Priority: {tc.priority}\n"
+            context += f"   Category: {tc.category}\n\n"
+        
+        # Create refinement prompt
+        refinement_prompt = f"""Please help improve these test cases based on this feedback: "{request.refinement_prompt}"
+
+{context}
+
+RESPONSE FORMATTING REQUIREMENTS:
+- Use clear markdown formatting with ## headings
+- Organize suggestions into logical sections
+- Use bullet points (-) for individual suggestions
+- Use numbered lists (1.) for step-by-step improvements
+- Use **bold** for important points
+- Provide specific, actionable recommendations
+
+Provide helpful suggestions for making these test cases clearer, more comprehensive, and more effective."""
+
+        # Generate LLM response
+        response_text = await generate_llm_response(
+            llm,
+            refinement_prompt, 
+            "", 
+            request.api_key or llm.built_in_key
+        )
+        
+        # Increment usage if using free tier
+        if not request.api_key:
+            limiter.increment(client_id)
+            usage_info = limiter.check_free_tier(client_id)
+        
+        return PromptResponse(
+            success=True,
+            message="Test cases refined successfully",
+            response=response_text,
+            usage_info=usage_info
+        )
+        
+    except HTTPException:
+        # Expired sessions (404) and bad requests (400) keep their status codes
+        raise
+    except Exception as e:
+        return PromptResponse(
+            success=False,
+            message=f"Error refining test cases: {str(e)}",
+            response="",
+            usage_info=usage_info if 'usage_info' in locals() else {}
+        )
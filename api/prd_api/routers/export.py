@@ -0,0 +1,81 @@
+"""
+Test case exports and the server-side test case sessions they can read from
+"""
+from __future__ import annotations
+
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from prd_api.dependencies import get_session_store
+from prd_api.exporters import EXPORT_FORMATS, gzip_chunks, iter_csv_export, iter_jsonl_export, iter_xlsx_export
+from prd_api.models import TestCase, TestCaseSessionCreate, TestCaseSessionDelta, TestCaseSessionResponse
+from prd_api.services import TestCaseSessionStore
+
+router = APIRouter(tags=["export"])
+
+@router.post("/api/download-csv")
+async def download_csv(
+    test_cases: Optional[List[TestCase]] = Body(None),
+    session_id: Optional[str] = Query(None),
+    export_format: str = Query("csv", alias="format"),
+    compress: bool = Query(False, alias="gzip"),
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Download test cases as CSV (default), JSONL or XLSX, streamed as it is encoded.
+    
+    Pass ``session_id`` to export a stored session instead of sending the list.
+    """
+    test_cases = sessions.resolve(session_id, test_cases)
+    
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format. Choose one of: {', '.join(EXPORT_FORMATS)}")
+    
+    media_type, filename = EXPORT_FORMATS[export_format]
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    
+    if export_format == "xlsx":
+        chunks = iter_xlsx_export(test_cases)
+    elif export_format == "jsonl":
+        chunks = iter_jsonl_export(test_cases)
+    else:
+        chunks = iter_csv_export(test_cases)
+    
+    # XLSX is already a zip archive, so only compress the text formats
+    if compress and export_format != "xlsx":
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+def session_response(sessions: TestCaseSessionStore, session_id: str, test_cases: List[TestCase]) -> TestCaseSessionResponse:
+    expires_at = sessions.expires_at(session_id)
+    if expires_at is None:
+        raise HTTPException(status_code=404, detail="Test case session not found or expired. Please resend the test cases.")
+    return TestCaseSessionResponse(success=True, session_id=session_id, test_cases=test_cases, expires_at=expires_at)
+
+@router.post("/api/test-case-sessions", response_model=TestCaseSessionResponse)
+async def create_test_case_session(
+    request: TestCaseSessionCreate,
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Store a set of test cases server-side so later requests can refer to it by ID"""
+    session_id = sessions.create(request.test_cases)
+    return session_response(sessions, session_id, request.test_cases)
+
+@router.get("/api/test-case-sessions/{session_id}", response_model=TestCaseSessionResponse)
+async def get_test_case_session(session_id: str, sessions: TestCaseSessionStore = Depends(get_session_store)):
+    """Return the test cases stored in a session"""
+    test_cases = sessions.resolve(session_id)
+    return session_response(sessions, session_id, test_cases)
+
+@router.patch("/api/test-case-sessions/{session_id}", response_model=TestCaseSessionResponse)
+async def update_test_case_session(
+    session_id: str,
+    delta: TestCaseSessionDelta,
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Apply added, modified or deleted test cases to a stored session"""
+    test_cases = sessions.resolve(session_id, None, delta.upsert_test_cases, delta.delete_test_case_ids)
+    return session_response(sessions, session_id, test_cases)
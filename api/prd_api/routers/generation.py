@@ -0,0 +1,335 @@
+"""
+Test case generation from uploaded PRDs, plus near-duplicate cleanup
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+
+from prd_api.config import ALLOWED_PRD_TYPES, BATCH_MAX_FILES, DEVELOPMENT_MODE, MAX_UPLOAD_SIZE
+from prd_api.dependencies import get_llm_client, get_session_store, get_single_flight, get_usage_limiter
+from prd_api.extraction import extract_text_from_image, extract_text_from_pdf
+from prd_api.models import DeduplicateRequest, DeduplicateResponse, ProcessResponse, TestCase
+from prd_api.observability import logger
+from prd_api.services import LLMClient, SingleFlight, TestCaseSessionStore, UsageLimiter, make_flight_key
+from prd_api.test_cases import deduplicate_test_cases, generate_test_cases
+from prd_api.uploads import SpooledUpload, spool_upload
+
+router = APIRouter(tags=["generation"])
+
+@router.post("/api/upload-prd", response_model=ProcessResponse)
+async def upload_prd(
+    request: Request,
+    file: UploadFile = File(...),
+    user_api_key: Optional[str] = Form(None),
+    deduplicate: bool = Form(False),
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    sessions: TestCaseSessionStore = Depends(get_session_store),
+    flights: SingleFlight = Depends(get_single_flight)
+):
+    """Upload PRD file and generate test cases - supports both free tier and user API keys"""
+    
+    logger.info("Received PRD upload", extra={
+        "file_name": file.filename, "content_type": file.content_type, "size": getattr(file, "size", None)
+    })
+    
+    # Validate file type
+    if file.content_type not in ALLOWED_PRD_TYPES:
+        raise HTTPException(
+            status_code=400, 
+            detail="Unsupported file type. Please upload PDF, JPEG, JPG, or PNG files."
+        )
+    
+    # Validate filename
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="Filename is required.")
+    
+    # Early rejection on the declared size; the real limit is enforced while spooling
+    if hasattr(file, 'size') and file.size:
+        if file.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large ({file.size/1024/1024:.1f}MB). Maximum size is 15MB."
+            )
+    
+    # Determine which API key to use
+    has_user_key = bool(user_api_key and user_api_key.strip())
+    api_key_to_use = user_api_key.strip() if has_user_key else llm.built_in_key
+    
+    # Check if any API key is available
+    if not api_key_to_use:
+        raise HTTPException(
+            status_code=400,
+            detail="No API key available. Please provide your Gemini API key or try again later."
+        )
+    
+    # Check usage limits based on tier
+    client_id = limiter.client_identifier(request)
+    usage_info = limiter.check(client_id, has_user_api_key=has_user_key)
+    
+    if not usage_info["can_use"]:
+        if has_user_key:
+            # This shouldn't happen with user keys, but just in case
+            raise HTTPException(status_code=500, detail="Error with provided API key")
+        else:
+            # Free tier limit reached
+            raise HTTPException(
+                status_code=429,
+                detail=f"Free tier limit reached ({limiter.daily_limit} uses/day). Provide your own Gemini API key for unlimited usage!"
+            )
+
+    try:
+        # Configure Gemini with appropriate API key
+        model = llm.model(api_key_to_use)
+        
+        # Spool file content to disk and map it instead of buffering it in memory
+        async with spool_upload(file) as upload:
+            async def extract_and_generate() -> List[TestCase]:
+                # Extract text based on file type
+                if file.content_type == 'application/pdf':
+                    prd_text = await asyncio.to_thread(extract_text_from_pdf, upload.data, file.filename)
+                else:  # Image files
+                    prd_text = await extract_text_from_image(upload.data, model)
+                
+                if not prd_text.strip():
+                    raise HTTPException(status_code=400, detail="No text content found in the uploaded file")
+                
+                # Generate test cases
+                test_cases = await generate_test_cases(prd_text, model)
+                if deduplicate:
+                    test_cases = (await deduplicate_test_cases(test_cases, api_key_to_use, action="merge"))["test_cases"]
+                return test_cases
+            
+            # Identical uploads arriving together share one extraction + generation call. The
+            # shared task holds its own reference to the spool, so it survives this request.
+            flight_key = make_flight_key(
+                "upload-prd", api_key_to_use, file.content_type, llm.model_name, deduplicate, upload.sha256
+            )
+            test_cases = await flights.run(flight_key, lambda: upload.share(extract_and_generate))
+        
+        # Update usage tracking (only for free tier)
+        if not has_user_key:
+            limiter.increment(client_id)
+        
+        # Get updated usage info
+        updated_usage_info = limiter.check(client_id, has_user_api_key=has_user_key)
+        
+        # Set success message based on tier
+        if has_user_key:
+            updated_usage_info["message"] = f"✅ Success! Using your API key - unlimited usage"
+        elif DEVELOPMENT_MODE:
+            updated_usage_info["message"] = f"✅ Success! Development mode (call #{updated_usage_info['used_today']})"
+        else:
+            updated_usage_info["message"] = f"✅ Success! {updated_usage_info['remaining_today']} free uses remaining today"
+        
+        return ProcessResponse(
+            success=True,
+            message=f"Successfully generated {len(test_cases)} test cases",
+            test_cases=test_cases,
+            usage_info=updated_usage_info,
+            session_id=sessions.create(test_cases)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
+
+@router.post("/api/upload-prd-batch")
+async def upload_prd_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    user_api_key: Optional[str] = Form(None),
+    mode: str = Form("combined"),
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Upload several PRD files (PDF pages or screenshots) and stream results as NDJSON.
+    
+    Files are extracted concurrently. In ``combined`` mode the extracted text is
+    merged into one generation pass; in ``per_file`` mode each file gets its own
+    test cases. One JSON event is emitted per file as soon as it finishes, then a
+    final ``done`` event with usage info.
+    """
+    
+    if mode not in ("combined", "per_file"):
+        raise HTTPException(status_code=400, detail="Mode must be 'combined' or 'per_file'.")
+    
+    if not files:
+        raise HTTPException(status_code=400, detail="At least one file is required.")
+    
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files. Maximum is {BATCH_MAX_FILES} per batch.")
+    
+    # Validate every file up front so a bad upload doesn't waste the others' work
+    for file in files:
+        if file.content_type not in ALLOWED_PRD_TYPES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type for '{file.filename}'. Please upload PDF, JPEG, JPG, or PNG files."
+            )
+        if not file.filename:
+            raise HTTPException(status_code=400, detail="Filename is required.")
+    
+    # Determine which API key to use
+    has_user_key = bool(user_api_key and user_api_key.strip())
+    api_key_to_use = user_api_key.strip() if has_user_key else llm.built_in_key
+    
+    if not api_key_to_use:
+        raise HTTPException(
+            status_code=400,
+            detail="No API key available. Please provide your Gemini API key or try again later."
+        )
+    
+    client_id = limiter.client_identifier(request)
+    usage_info = limiter.check(client_id, has_user_api_key=has_user_key)
+    
+    if not usage_info["can_use"]:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Free tier limit reached ({limiter.daily_limit} uses/day). Provide your own Gemini API key for unlimited usage!"
+        )
+    
+    # Each generation pass counts as one use on the free tier
+    planned_passes = len(files) if mode == "per_file" else 1
+    remaining = usage_info["remaining_today"]
+    if isinstance(remaining, int) and planned_passes > remaining:
+        raise HTTPException(
+            status_code=429,
+            detail=f"This batch needs {planned_passes} free uses but only {remaining} remain today. "
+                   f"Upload fewer files, use combined mode, or provide your own Gemini API key."
+        )
+    
+    model = llm.model(api_key_to_use)
+    
+    async def generate_counted(text: str) -> List[TestCase]:
+        # Reserve the use before calling upstream so concurrent passes can't overrun the limit
+        if not has_user_key and not limiter.reserve(client_id):
+            raise HTTPException(status_code=429, detail=f"Free tier limit reached ({limiter.daily_limit} uses/day).")
+        try:
+            return await generate_test_cases(text, model)
+        except BaseException:
+            if not has_user_key:
+                limiter.release(client_id)
+            raise
+    
+    # Spool every file before streaming starts so size errors still return a proper status
+    stack = AsyncExitStack()
+    try:
+        uploads = [
+            (index, file.filename, file.content_type, await stack.enter_async_context(spool_upload(file)))
+            for index, file in enumerate(files)
+        ]
+    except BaseException:
+        await stack.aclose()
+        raise
+    
+    async def process_file(index: int, filename: str, content_type: str, upload: SpooledUpload):
+        event = {"type": "file", "index": index, "filename": filename}
+        try:
+            if content_type == 'application/pdf':
+                text = await asyncio.to_thread(extract_text_from_pdf, upload.data, filename)
+            else:
+                text = await extract_text_from_image(upload.data, model)
+            
+            if not text.strip():
+                raise HTTPException(status_code=400, detail="No text content found in the uploaded file")
+            
+            event.update(success=True, characters=len(text))
+            test_cases: List[TestCase] = []
+            if mode == "per_file":
+                test_cases = await generate_counted(text)
+                event["test_cases"] = [tc.model_dump() for tc in test_cases]
+            return event, text, test_cases
+        except HTTPException as e:
+            event.update(success=False, error=e.detail)
+        except Exception as e:
+            event.update(success=False, error=str(e))
+        return event, "", []
+    
+    async def batch_events():
+        async with stack:
+            tasks = [asyncio.ensure_future(process_file(*upload)) for upload in uploads]
+            try:
+                texts: Dict[int, str] = {}
+                generated: List[TestCase] = []
+                generation_passes = 0
+                for next_done in asyncio.as_completed(tasks):
+                    event, text, test_cases = await next_done
+                    texts[event["index"]] = text
+                    if test_cases:
+                        generation_passes += 1
+                        generated.extend(test_cases)
+                    yield json.dumps(event) + "\n"
+                
+                if mode == "combined":
+                    # Keep document order in the merged text, not completion order
+                    combined_text = "\n\n".join(
+                        f"=== {filename} ===\n{texts[index]}"
+                        for index, filename, _, _ in uploads if texts.get(index)
+                    )
+                    event = {"type": "test_cases"}
+                    if not combined_text:
+                        event.update(success=False, error="No text content found in any uploaded file")
+                    else:
+                        try:
+                            test_cases = await generate_counted(combined_text)
+                            event.update(success=True, test_cases=[tc.model_dump() for tc in test_cases])
+                            generated.extend(test_cases)
+                            generation_passes += 1
+                        except HTTPException as e:
+                            event.update(success=False, error=e.detail)
+                    yield json.dumps(event) + "\n"
+                
+                yield json.dumps({
+                    "type": "done",
+                    "files": len(uploads),
+                    "generation_passes": generation_passes,
+                    "session_id": sessions.create(generated) if generated else None,
+                    "usage_info": limiter.check(client_id, has_user_api_key=has_user_key)
+                }) + "\n"
+            finally:
+                # Client went away mid-stream: don't keep burning upstream calls
+                for task in tasks:
+                    task.cancel()
+    
+    return StreamingResponse(batch_events(), media_type="application/x-ndjson")
+
+@router.post("/api/deduplicate-test-cases", response_model=DeduplicateResponse)
+async def deduplicate_test_cases_endpoint(
+    request: DeduplicateRequest,
+    llm: LLMClient = Depends(get_llm_client),
+    sessions: TestCaseSessionStore = Depends(get_session_store)
+):
+    """Flag or merge near-duplicate test cases and report coverage per feature and category"""
+    if request.action not in ("flag", "merge"):
+        raise HTTPException(status_code=400, detail="Action must be 'flag' or 'merge'.")
+    
+    gemini_key = request.api_key or llm.built_in_key
+    if not gemini_key:
+        raise HTTPException(status_code=400, detail="API key required for deduplication.")
+    
+    test_cases = sessions.resolve(request.session_id, request.test_cases)
+    try:
+        result = await deduplicate_test_cases(test_cases, gemini_key, request.threshold, request.action)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deduplicating test cases: {str(e)}")
+    
+    # Merging updates the stored session so later requests see the deduplicated set
+    if request.session_id and request.action == "merge":
+        removed = [tc_id for cluster in result["clusters"] for tc_id in cluster["duplicates"]]
+        sessions.apply_delta(request.session_id, delete_ids=removed)
+    
+    duplicates = sum(len(cluster["duplicates"]) for cluster in result["clusters"])
+    return DeduplicateResponse(
+        success=True,
+        message=f"Found {len(result['clusters'])} clusters with {duplicates} near-duplicates",
+        **result
+    )
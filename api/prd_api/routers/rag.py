@@ -0,0 +1,290 @@
+"""
+Document upload and question answering over uploaded documents (RAG)
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
+
+from prd_api.config import DEVELOPMENT_MODE, MAX_UPLOAD_SIZE, MULTI_QUERY_MAX_QUERIES
+from prd_api.dependencies import get_document_store, get_llm_client, get_single_flight, get_usage_limiter
+from prd_api.extraction import extract_pages_from_pdf, join_pdf_pages
+from prd_api.models import RAGChatRequest, RAGChatResponse, RAGUploadResponse
+from prd_api.observability import logger
+from prd_api.rag import DocumentStore, decompose_question
+from prd_api.services import LLMClient, SingleFlight, UsageLimiter, make_flight_key
+from prd_api.uploads import spool_upload
+
+router = APIRouter(tags=["rag"])
+
+@router.post("/api/upload-document", response_model=RAGUploadResponse)
+async def upload_document_for_rag(
+    request: Request,
+    file: UploadFile = File(...),
+    user_api_key: Optional[str] = Form(None),
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    store: DocumentStore = Depends(get_document_store),
+    flights: SingleFlight = Depends(get_single_flight)
+):
+    """Upload and process a document for RAG - supports both free tier and user API keys"""
+    
+    # Check if RAG system is available
+    rag_system = await store.aget_rag_system()
+    if rag_system is None:
+        raise HTTPException(
+            status_code=503,
+            detail="RAG functionality is temporarily unavailable due to dependency issues. Please try the PRD generation feature instead."
+        )
+    
+    logger.info("Received RAG document upload", extra={
+        "file_name": file.filename, "content_type": file.content_type, "size": getattr(file, "size", None)
+    })
+    
+    # Validate file type
+    if file.content_type != 'application/pdf':
+        raise HTTPException(
+            status_code=400,
+            detail="Only PDF files are supported for RAG functionality."
+        )
+    
+    # Validate filename
+    if not file.filename:
+        raise HTTPException(status_code=400, detail="Filename is required.")
+    
+    # Early rejection on the declared size; the real limit is enforced while spooling
+    if hasattr(file, 'size') and file.size:
+        if file.size > MAX_UPLOAD_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large ({file.size/1024/1024:.1f}MB). Maximum size is 15MB."
+            )
+    
+    # Determine API key tier
+    has_user_key = bool(user_api_key and user_api_key.strip())
+    api_key_to_use = user_api_key.strip() if has_user_key else llm.built_in_key
+    
+    # Check if any API key is available
+    if not api_key_to_use:
+        raise HTTPException(
+            status_code=400,
+            detail="No API key available. Please provide your Gemini API key or try again later."
+        )
+    
+    # Check usage limits based on tier
+    client_id = limiter.client_identifier(request)
+    usage_info = limiter.check(client_id, has_user_api_key=has_user_key)
+    
+    if not usage_info["can_use"]:
+        if has_user_key:
+            raise HTTPException(status_code=500, detail="Error with provided API key")
+        else:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Free tier limit reached ({limiter.daily_limit} uses/day). Provide your own Gemini API key for unlimited usage!"
+            )
+    
+    try:
+        # Spool the PDF to disk and extract text from the mapped file
+        async with spool_upload(file) as upload:
+            async def extract_and_index() -> Dict[str, Any]:
+                pages = await asyncio.to_thread(extract_pages_from_pdf, upload.data, file.filename)
+                text_content, page_starts = join_pdf_pages(pages)
+                
+                if not text_content.strip():
+                    raise HTTPException(status_code=400, detail="No text content found in the PDF")
+                
+                # Generate unique document ID
+                document_id = f"doc_{int(datetime.now().timestamp())}_{hash(text_content[:100]) % 10000}"
+                
+                # Process document with RAG
+                chunks_count = await rag_system.process_document(text_content, document_id, api_key_to_use, page_starts)
+                return {"document_id": document_id, "chunks_count": chunks_count}
+            
+            # Identical uploads arriving together are indexed once and share the document ID
+            flight_key = make_flight_key("upload-document", api_key_to_use, upload.sha256)
+            indexed = await flights.run(flight_key, lambda: upload.share(extract_and_index))
+        document_id = indexed["document_id"]
+        chunks_count = indexed["chunks_count"]
+        
+        # Update usage tracking (only for free tier)
+        if not has_user_key:
+            limiter.increment(client_id)
+        
+        updated_usage_info = limiter.check(client_id, has_user_api_key=has_user_key)
+        
+        # Set success message based on tier
+        if has_user_key:
+            updated_usage_info["message"] = f"✅ Document processed! Using your API key - unlimited usage"
+        elif DEVELOPMENT_MODE:
+            updated_usage_info["message"] = f"✅ Document processed! Development mode"
+        else:
+            updated_usage_info["message"] = f"✅ Document processed! {updated_usage_info['remaining_today']} free uses remaining today"
+        
+        return RAGUploadResponse(
+            success=True,
+            message=f"Document processed successfully into {chunks_count} chunks",
+            document_id=document_id,
+            chunks_count=chunks_count,
+            usage_info=updated_usage_info
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
+
+@router.post("/api/chat-with-document", response_model=RAGChatResponse)
+async def chat_with_document(
+    request: RAGChatRequest,
+    http_request: Request,
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    store: DocumentStore = Depends(get_document_store),
+    flights: SingleFlight = Depends(get_single_flight)
+):
+    """Chat with an uploaded document using RAG"""
+    
+    # Check if RAG system is available
+    rag_system = await store.aget_rag_system()
+    if rag_system is None:
+        return RAGChatResponse(
+            success=False,
+            message="RAG functionality is temporarily unavailable due to dependency issues.",
+            answer="RAG system is not available. Please use the PRD generation feature for now.",
+            sources=[],
+            usage_info={}
+        )
+    
+    # Check rate limiting
+    client_id = limiter.client_identifier(http_request)
+    usage_info = limiter.check_free_tier(client_id)
+    
+    # Use provided API key or check free tier
+    if not request.api_key and not usage_info["can_use"]:
+        return RAGChatResponse(
+            success=False,
+            message="Daily free tier limit reached. Please provide your own API key.",
+            answer="",
+            sources=[],
+            usage_info=usage_info
+        )
+    
+    try:
+        # If no document_id specified, check if there's any document available
+        if not request.document_id:
+            if not store.documents:
+                raise HTTPException(status_code=400, detail="No document uploaded. Please upload a document first.")
+            # Use the most recent document
+            request.document_id = list(store.documents.keys())[-1]
+        
+        api_key_to_use = request.api_key or llm.built_in_key
+        queries = None
+        if request.query_variants:
+            queries = list(dict.fromkeys([request.question, *request.query_variants]))[:MULTI_QUERY_MAX_QUERIES]
+        elif request.multi_query:
+            queries = decompose_question(request.question)
+        
+        async def search_and_answer() -> Dict[str, Any]:
+            # Search for relevant chunks with better parameters
+            relevant_chunks = rag_system.search_document(
+                request.question, 
+                request.document_id, 
+                k=3,  # Hybrid retrieval is precise enough for a smaller context
+                filter=request.filter,
+                queries=queries
+            )
+            
+            logger.debug("Retrieved document chunks", extra={
+                "document_id": request.document_id,
+                "question": request.question,
+                "chunks": len(relevant_chunks),
+                "first_chunk_preview": relevant_chunks[0][:100] if relevant_chunks else None,
+            })
+            
+            if not relevant_chunks:
+                return {"chunks": [], "answer": None}
+            
+            # Generate answer using RAG
+            answer = await rag_system.generate_answer(
+                request.question,
+                relevant_chunks,
+                api_key_to_use,
+                document_id=request.document_id
+            )
+            return {"chunks": relevant_chunks, "answer": answer}
+        
+        # The same question against the same document shares one search + generation
+        flight_key = make_flight_key(
+            "chat-with-document", api_key_to_use, request.document_id, request.question,
+            json.dumps(request.filter, sort_keys=True), json.dumps(queries)
+        )
+        result = await flights.run(flight_key, search_and_answer)
+        relevant_chunks = result["chunks"]
+        answer = result["answer"]
+        
+        if not relevant_chunks:
+            return RAGChatResponse(
+                success=True,
+                message="No relevant information found",
+                answer="I cannot find relevant information in the document to answer your question.",
+                sources=[],
+                usage_info=usage_info
+            )
+        
+        # Update usage if using free tier
+        if not request.api_key:
+            limiter.increment(client_id)
+            usage_info = limiter.check_free_tier(client_id)
+        
+        return RAGChatResponse(
+            success=True,
+            message="Answer generated successfully",
+            answer=answer,
+            sources=relevant_chunks[:2],  # Return top 2 source chunks
+            usage_info=usage_info
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return RAGChatResponse(
+            success=False,
+            message=f"Error: {str(e)}",
+            answer="",
+            sources=[],
+            usage_info=usage_info if 'usage_info' in locals() else {}
+        )
+
+@router.get("/api/list-documents")
+async def list_documents(store: DocumentStore = Depends(get_document_store)):
+    """List all uploaded documents"""
+    rag_system = await store.aget_rag_system()
+    if rag_system is None:
+        return {
+            "success": False,
+            "message": "RAG functionality is temporarily unavailable",
+            "documents": [],
+            "total_documents": 0
+        }
+    
+    documents = []
+    for doc_id in store.documents.keys():
+        try:
+            documents.append({
+                "document_id": doc_id,
+                "chunks_count": len(store.documents[doc_id].vectors) if hasattr(store.documents[doc_id], 'vectors') else 0
+            })
+        except:
+            # Skip documents that might have issues
+            continue
+    
+    return {
+        "success": True,
+        "documents": documents,
+        "total_documents": len(documents)
+    }
@@ -0,0 +1,96 @@
+"""
+Cheap operational endpoints: usage info, liveness, cached diagnostics and metrics
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import PlainTextResponse
+
+from prd_api import diagnostics
+from prd_api.config import DEVELOPMENT_MODE, DIAGNOSTICS_INTERVAL_SECONDS, SERVICE_NAME, STARTED_AT
+from prd_api.dependencies import get_document_store, get_llm_client, get_session_store, get_single_flight, get_usage_limiter
+from prd_api.observability import log_queue_handler, request_duration_seconds, stage_duration_seconds, stage_errors_total
+from prd_api.rag import DocumentStore
+from prd_api.services import LLMClient, SingleFlight, TestCaseSessionStore, UsageLimiter
+from prd_api.test_cases import embedding_cache, embedding_cache_stats
+
+router = APIRouter(tags=["usage"])
+
+@router.get("/api/usage-info")
+async def get_usage_info(
+    request: Request,
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter)
+):
+    """Get current usage information for the client"""
+    client_id = limiter.client_identifier(request)
+    usage_info = limiter.check_free_tier(client_id)
+    
+    return {
+        "service_available": bool(llm.built_in_key),
+        "free_tier_available": bool(llm.built_in_key),
+        "development_mode": DEVELOPMENT_MODE,
+        **usage_info
+    }
+
+@router.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics(
+    sessions: TestCaseSessionStore = Depends(get_session_store),
+    store: DocumentStore = Depends(get_document_store),
+    flights: SingleFlight = Depends(get_single_flight)
+):
+    """Request and stage latency histograms plus cache gauges, in Prometheus text format"""
+    gauges = [
+        ("prd_api_single_flight_started_total", "counter", "Upstream calls started by the single-flight layer",
+         flights.stats["started"]),
+        ("prd_api_single_flight_coalesced_total", "counter", "Requests that joined an in-flight call",
+         flights.stats["coalesced"]),
+        ("prd_api_embedding_cache_entries", "gauge", "Cached test case embeddings", len(embedding_cache)),
+        ("prd_api_embedding_cache_hits_total", "counter", "Embeddings served from the cache",
+         embedding_cache_stats["hits"]),
+        ("prd_api_embedding_cache_misses_total", "counter", "Embeddings that had to be computed",
+         embedding_cache_stats["misses"]),
+        ("prd_api_test_case_sessions", "gauge", "Live test case sessions", len(sessions)),
+        ("prd_api_test_case_session_bytes", "gauge", "Estimated size of stored sessions", sessions.total_bytes),
+        ("prd_api_rag_documents", "gauge", "Documents held in the RAG store", len(store.documents)),
+        ("prd_api_log_records_dropped_total", "counter", "Log records dropped because the log queue was full",
+         log_queue_handler.dropped),
+    ]
+    lines = request_duration_seconds.render() + stage_duration_seconds.render() + stage_errors_total.render()
+    for name, kind, help_text, value in gauges:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@router.get("/api/health")
+async def health_check(
+    llm: LLMClient = Depends(get_llm_client),
+    limiter: UsageLimiter = Depends(get_usage_limiter),
+    store: DocumentStore = Depends(get_document_store)
+):
+    """Liveness check: constant time, never touches the PDF or image libraries"""
+    return {
+        "status": "ok",
+        "service": SERVICE_NAME,
+        "timestamp": datetime.now().isoformat(),
+        "uptime_seconds": round(time.monotonic() - STARTED_AT, 1),
+        "free_tier_available": bool(llm.built_in_key),
+        "daily_free_limit": "unlimited" if DEVELOPMENT_MODE else limiter.daily_limit,
+        "development_mode": DEVELOPMENT_MODE,
+        "tier": "development" if DEVELOPMENT_MODE else "production",
+        "rag_available": store.available,
+        "diagnostics_status": diagnostics.diagnostics_snapshot.get("status", "pending"),
+        "diagnostics_age_seconds": diagnostics.diagnostics_age_seconds(),
+    }
+
+@router.get("/api/health/diagnostics")
+async def health_diagnostics():
+    """Deep diagnostics from the background checks"""
+    age = diagnostics.diagnostics_age_seconds()
+    # Serverless workers may be frozen between requests, so a stale snapshot is refreshed on read
+    if age is None or age > 2 * DIAGNOSTICS_INTERVAL_SECONDS:
+        await diagnostics.refresh_diagnostics()
+        age = 0.0
+    return {"service": SERVICE_NAME, "age_seconds": age, **diagnostics.diagnostics_snapshot}
@@ -0,0 +1,354 @@
+"""
+Shared services handed to the routers through FastAPI dependencies (see prd_api.dependencies)
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import secrets
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from prd_api.config import (
+    BUILT_IN_GEMINI_KEY, DEVELOPMENT_MODE, FREE_TIER_DAILY_LIMIT, GEMINI_MODEL_NAME,
+    SESSION_MAX_COUNT, SESSION_MAX_TOTAL_BYTES, SESSION_TTL_SECONDS
+)
+from prd_api.lazy import genai
+from prd_api.models import APIKeyTier, TestCase
+from prd_api.observability import logger
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight upstream call.
+
+    The first caller for a key starts the work; callers arriving while it is still
+    running await the same task and receive the same result (or exception). Once
+    the task settles the key is released, so later calls start fresh.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"started": 0, "coalesced": 0}
+    
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            self.stats["started"] += 1
+            future.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.stats["coalesced"] += 1
+            logger.debug("Joining in-flight call", extra={"flight_key": key[:12]})
+        # Shield so one client disconnecting doesn't cancel the shared call
+        return await asyncio.shield(future)
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not future.cancelled():
+            future.exception()
+
+def make_flight_key(*parts: Any) -> str:
+    """Build a single-flight key by hashing content bytes and request parameters
+
+    Callers include the Gemini API key the work runs with, so requests billed to
+    different keys never share an upstream call. Only the digest is kept.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+class CountingThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool that counts its own running and queued work.
+
+    Installed as the event loop's default executor (see ``install_default_executor``)
+    so diagnostics can report thread pool saturation without reading the private
+    attributes of ``ThreadPoolExecutor``.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, thread_name_prefix: str = ""):
+        # Same default as ThreadPoolExecutor, resolved here so it can be reported
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        super().__init__(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self._counts_lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        def run():
+            with self._counts_lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counts_lock:
+                    self.running -= 1
+
+        with self._counts_lock:
+            self.queued += 1
+        try:
+            future = super().submit(run)
+        except BaseException:
+            with self._counts_lock:
+                self.queued -= 1
+            raise
+        future.add_done_callback(self._forget_cancelled)
+        return future
+
+    def _forget_cancelled(self, future: Future) -> None:
+        # A future cancelled while queued never runs, so ``run`` can't uncount it
+        if future.cancelled():
+            with self._counts_lock:
+                self.queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counts_lock:
+            running, queued = self.running, self.queued
+        return {
+            "max_workers": self.max_workers,
+            "running": running,
+            "queued": queued,
+            "saturated": running >= self.max_workers and queued > 0,
+        }
+
+# Default executor installed on each event loop, for diagnostics
+_default_executors: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, CountingThreadPoolExecutor]" = (
+    weakref.WeakKeyDictionary()
+)
+
+def install_default_executor(
+    loop: asyncio.AbstractEventLoop, max_workers: Optional[int] = None
+) -> CountingThreadPoolExecutor:
+    """Make a ``CountingThreadPoolExecutor`` the loop's default (``asyncio.to_thread``) executor"""
+    executor = _default_executors.get(loop)
+    if executor is None:
+        executor = CountingThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prd-api")
+        loop.set_default_executor(executor)
+        _default_executors[loop] = executor
+    return executor
+
+def default_executor_for(loop: asyncio.AbstractEventLoop) -> Optional[CountingThreadPoolExecutor]:
+    """The executor ``install_default_executor`` put on ``loop``, if any"""
+    return _default_executors.get(loop)
+
+class LLMClient:
+    """Picks the Gemini API key for a request and hands out configured models"""
+    
+    def __init__(self, built_in_key: str = BUILT_IN_GEMINI_KEY, model_name: str = GEMINI_MODEL_NAME):
+        self.built_in_key = built_in_key
+        self.model_name = model_name
+    
+    def model(self, api_key: str):
+        """Return a ``GenerativeModel`` that calls Gemini with ``api_key``"""
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(self.model_name)
+
+class UsageLimiter:
+    """Daily per-client usage counts that enforce the free tier limit"""
+    
+    def __init__(self, daily_limit: int = FREE_TIER_DAILY_LIMIT, development_mode: bool = DEVELOPMENT_MODE):
+        self.daily_limit = daily_limit
+        self.development_mode = development_mode
+        self.usage: Dict[str, Dict[str, int]] = {}  # In production, use Redis or database
+    
+    @staticmethod
+    def client_identifier(request: Request) -> str:
+        """Get a unique identifier for rate limiting (IP + User Agent)"""
+        client_ip = request.client.host
+        user_agent = request.headers.get("user-agent", "")
+        return f"{client_ip}_{hash(user_agent)}"
+    
+    def _used_today(self, client_id: str) -> int:
+        today = datetime.now().date().isoformat()
+        return self.usage.setdefault(client_id, {}).setdefault(today, 0)
+    
+    def check(self, client_id: str, has_user_api_key: bool = False) -> Dict[str, Any]:
+        """Check usage limits based on API key tier"""
+        # User-provided API key = unlimited usage
+        if has_user_api_key:
+            return {
+                "tier": APIKeyTier.USER_PROVIDED,
+                "daily_limit": "unlimited",
+                "used_today": 0,
+                "remaining_today": "unlimited", 
+                "can_use": True,
+                "message": "Using your API key - unlimited usage!"
+            }
+        
+        current_usage = self._used_today(client_id)
+        
+        # Development mode with built-in key
+        if self.development_mode:
+            return {
+                "tier": "development",
+                "daily_limit": "unlimited",
+                "used_today": current_usage,
+                "remaining_today": "unlimited",
+                "can_use": True,
+                "development_mode": True
+            }
+        
+        # Free tier with built-in key (STRICT limits)
+        remaining = max(0, self.daily_limit - current_usage)
+        return {
+            "tier": APIKeyTier.FREE,
+            "daily_limit": self.daily_limit,
+            "used_today": current_usage,
+            "remaining_today": remaining,
+            "can_use": remaining > 0,
+            "development_mode": False,
+            "message": f"Free tier: {remaining} uses remaining today"
+        }
+    
+    def check_free_tier(self, client_id: str) -> Dict[str, Any]:
+        return self.check(client_id, has_user_api_key=False)
+    
+    def increment(self, client_id: str) -> None:
+        """Increment free tier usage counter"""
+        today = datetime.now().date().isoformat()
+        self._used_today(client_id)
+        self.usage[client_id][today] += 1
+        
+        logger.debug("Usage recorded", extra={"client": client_id[:10], "calls_today": self.usage[client_id][today]})
+    
+    def reserve(self, client_id: str) -> bool:
+        """Record one free tier use up front if the daily limit still allows it"""
+        if not self.check(client_id)["can_use"]:
+            return False
+        self.increment(client_id)
+        return True
+    
+    def release(self, client_id: str) -> None:
+        """Give back a use taken with ``reserve`` when the work it was for failed"""
+        today = datetime.now().date().isoformat()
+        if self._used_today(client_id) > 0:
+            self.usage[client_id][today] -= 1
+
+class TestCaseSessionStore:
+    """In-memory store of generated test cases keyed by session ID.
+    
+    Sessions expire after ``ttl_seconds`` of inactivity. When the session count
+    or the approximate total size goes over its bound, the least recently used
+    sessions are evicted first. Test cases are kept as validated ``TestCase``
+    objects, so reading a session never re-runs pydantic validation.
+    """
+    
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS, max_sessions: int = SESSION_MAX_COUNT,
+                 max_total_bytes: int = SESSION_MAX_TOTAL_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_total_bytes = max_total_bytes
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.total_bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    @staticmethod
+    def _estimate_size(test_cases: Dict[str, TestCase]) -> int:
+        return sum(
+            len(tc.test_case_id) + len(tc.feature) + len(tc.scenario) + len(tc.test_steps)
+            + len(tc.expected_result) + len(tc.priority) + len(tc.category)
+            for tc in test_cases.values()
+        )
+    
+    def _store(self, session_id: str, test_cases: Dict[str, TestCase]) -> None:
+        previous = self._sessions.pop(session_id, None)
+        if previous:
+            self.total_bytes -= previous["size"]
+        size = self._estimate_size(test_cases)
+        # Make room first, so the session being stored is never the one evicted
+        self._evict(incoming_bytes=size, incoming_sessions=1)
+        self._sessions[session_id] = {
+            "test_cases": test_cases,
+            "size": size,
+            "expires_at": time.monotonic() + self.ttl_seconds,
+        }
+        self.total_bytes += size
+    
+    def _evict(self, incoming_bytes: int = 0, incoming_sessions: int = 0) -> None:
+        now = time.monotonic()
+        for session_id in [key for key, entry in self._sessions.items() if entry["expires_at"] <= now]:
+            self.total_bytes -= self._sessions.pop(session_id)["size"]
+        # Least recently used sessions sit at the front of the ordered dict. The most
+        # recent one is kept even if it alone exceeds the byte budget.
+        keep = 0 if incoming_sessions else 1
+        while len(self._sessions) > keep and (
+            len(self._sessions) + incoming_sessions > self.max_sessions
+            or self.total_bytes + incoming_bytes > self.max_total_bytes
+        ):
+            _, entry = self._sessions.popitem(last=False)
+            self.total_bytes -= entry["size"]
+    
+    def create(self, test_cases: List[TestCase]) -> str:
+        """Store ``test_cases`` under a new session ID and return it"""
+        session_id = secrets.token_urlsafe(16)
+        self._store(session_id, {tc.test_case_id: tc for tc in test_cases})
+        return session_id
+    
+    def get(self, session_id: str) -> Optional[List[TestCase]]:
+        """Return the session's test cases, refreshing its TTL, or None if unknown/expired"""
+        entry = self._sessions.get(session_id)
+        if entry is None or entry["expires_at"] <= time.monotonic():
+            self._evict()
+            return None
+        entry["expires_at"] = time.monotonic() + self.ttl_seconds
+        self._sessions.move_to_end(session_id)
+        return list(entry["test_cases"].values())
+    
+    def apply_delta(self, session_id: str, upsert: Optional[List[TestCase]] = None,
+                    delete_ids: Optional[List[str]] = None) -> Optional[List[TestCase]]:
+        """Upsert and delete test cases by ID; returns the updated list or None if unknown"""
+        if self.get(session_id) is None:
+            return None
+        test_cases = dict(self._sessions[session_id]["test_cases"])
+        for test_case_id in delete_ids or []:
+            test_cases.pop(test_case_id, None)
+        for tc in upsert or []:
+            test_cases[tc.test_case_id] = tc
+        self._store(session_id, test_cases)
+        return list(test_cases.values())
+    
+    def expires_at(self, session_id: str) -> Optional[datetime]:
+        """Wall-clock expiry of the session, or None if it is unknown or already evicted"""
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        remaining = entry["expires_at"] - time.monotonic()
+        return datetime.now() + timedelta(seconds=max(0.0, remaining))
+    
+    def resolve(
+        self,
+        session_id: Optional[str],
+        test_cases: Optional[List[TestCase]] = None,
+        upsert: Optional[List[TestCase]] = None,
+        delete_ids: Optional[List[str]] = None
+    ) -> List[TestCase]:
+        """Return the test cases for a request: from the session (with deltas applied) or the body"""
+        if session_id:
+            if upsert or delete_ids:
+                resolved = self.apply_delta(session_id, upsert, delete_ids)
+            else:
+                resolved = self.get(session_id)
+            if resolved is None:
+                raise HTTPException(status_code=404, detail="Test case session not found or expired. Please resend the test cases.")
+            return resolved
+        return test_cases or []
@@ -0,0 +1,463 @@
+"""
+Test case generation, parsing, embedding-based deduplication and patch-based refinement
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from prd_api.config import (
+    DEDUPE_BLOCK_SIZE, DEDUPE_SIMILARITY_THRESHOLD, EMBEDDING_CACHE_MAX_ENTRIES, PRIORITY_RANK,
+    REFINE_PATCH_CONTEXT_SIZE
+)
+from prd_api.lazy import lazy_import, np
+from prd_api.models import TestCase
+from prd_api.observability import instrumented, logger, timed
+from prd_api.services import LLMClient
+
+embedding_providers = lazy_import("aimakerspace.embedding")
+
+# Structural characters for the JSON object scanner, and the remainder of a JSON
+# string after its opening quote (unrolled so it matches in linear time)
+_JSON_STRUCTURAL = re.compile(r'[{}"]')
+_JSON_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# The summary of a refinement patch whose wrapper object was cut off
+_PATCH_SUMMARY = re.compile(r'"summary"\s*:\s*("[^"\\]*(?:\\.[^"\\]*)*")', re.DOTALL)
+
+def iter_json_objects(text: str):
+    """Yield the source of each balanced top-level ``{...}`` object in ``text``.
+    
+    Single pass over the text: string literals are skipped with one regex match
+    each, so braces inside strings are ignored. Anything around the objects
+    (prose, code fences) is ignored. If the text ends inside an object, as with
+    truncated model output, the complete objects nested in it are yielded
+    instead, e.g. the finished items of ``{"test_cases": [{...}, {...}, {"fe``.
+    """
+    open_objects: List[int] = []  # Start index of each unclosed object, outermost first
+    nested: List[Tuple[int, int]] = []  # Closed objects inside the unclosed ones, outermost only
+    pos = 0
+    while True:
+        match = _JSON_STRUCTURAL.search(text, pos)
+        if match is None:
+            break
+        index = match.start()
+        char = match.group()
+        
+        if char == '"':
+            string_end = _JSON_STRING_TAIL.match(text, index + 1)
+            if string_end is None:
+                break  # Unterminated string - the output was cut off
+            pos = string_end.end()
+            continue
+        
+        if char == '{':
+            open_objects.append(index)
+        elif open_objects:
+            start = open_objects.pop()
+            if open_objects:
+                # Objects inside this one are no longer outermost
+                while nested and nested[-1][0] > start:
+                    nested.pop()
+                nested.append((start, index + 1))
+            else:
+                nested.clear()
+                yield text[start:index + 1]
+        pos = index + 1
+    
+    for start, end in nested:
+        yield text[start:end]
+
+@instrumented("parsing")
+def parse_test_cases(response_text: str) -> Tuple[List[TestCase], int]:
+    """Extract valid test cases from model output, skipping malformed entries.
+    
+    Returns the parsed test cases and the number of entries that were skipped.
+    """
+    test_cases: List[TestCase] = []
+    skipped = 0
+    
+    def collect(candidate: Any) -> None:
+        nonlocal skipped
+        if isinstance(candidate, list):
+            for item in candidate:
+                collect(item)
+        elif isinstance(candidate, dict) and "test_case_id" in candidate:
+            try:
+                test_cases.append(TestCase(**candidate))
+            except (ValidationError, TypeError):
+                skipped += 1
+        elif isinstance(candidate, dict):
+            # Wrapper objects such as {"test_cases": [...]}
+            for value in candidate.values():
+                if isinstance(value, list):
+                    collect(value)
+        else:
+            skipped += 1
+    
+    # Fast path: the whole response (minus code fences) is valid JSON
+    cleaned = response_text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else ""
+    if cleaned.endswith("```"):
+        cleaned = cleaned[:-3]
+    try:
+        collect(json.loads(cleaned))
+        return test_cases, skipped
+    except json.JSONDecodeError:
+        pass
+    
+    # Slow path: decode each balanced object on its own
+    for source in iter_json_objects(response_text):
+        try:
+            collect(json.loads(source))
+        except json.JSONDecodeError:
+            skipped += 1
+    return test_cases, skipped
+
+async def generate_test_cases(prd_content: str, gemini_model) -> List[TestCase]:
+    """Generate test cases from PRD content using Gemini AI"""
+    try:
+        prompt = f"""
+        You are a senior QA engineer. Based on the following Product Requirements Document (PRD), generate comprehensive test cases.
+
+        PRD Content:
+        {prd_content}
+
+        Please generate test cases covering:
+        1. Functional testing scenarios
+        2. UI/UX testing scenarios  
+        3. Edge cases and error handling
+        4. Performance considerations
+        5. Security testing scenarios
+        6. Integration testing scenarios
+
+        For each test case, provide:
+        - test_case_id: A unique identifier (TC001, TC002, etc.)
+        - feature: The feature being tested
+        - scenario: Brief description of the test scenario
+        - test_steps: Detailed step-by-step instructions
+        - expected_result: What should happen when the test is executed
+        - priority: High, Medium, or Low
+        - category: Functional, UI/UX, Performance, Security, Integration, or Edge Case
+
+        Return the response as a JSON array with exactly this structure:
+        [
+            {{
+                "test_case_id": "TC001",
+                "feature": "Feature name",
+                "scenario": "Test scenario description",
+                "test_steps": "1. Step one\\n2. Step two\\n3. Step three",
+                "expected_result": "Expected outcome",
+                "priority": "High",
+                "category": "Functional"
+            }}
+        ]
+
+        Generate at least 10-15 comprehensive test cases. Ensure the JSON is valid and properly formatted.
+        """
+        
+        with timed("generation"):
+            response = await gemini_model.generate_content_async(prompt)
+        
+        # Parse the JSON response, keeping every well-formed test case
+        test_cases, skipped = parse_test_cases(response.text)
+        
+        if skipped:
+            logger.info("Skipped malformed test case entries", extra={"skipped": skipped, "parsed": len(test_cases)})
+        
+        if not test_cases:
+            raise HTTPException(status_code=500, detail="Error parsing AI response: no valid test cases found")
+        
+        return test_cases
+            
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating test cases: {str(e)}")
+
+def test_case_embedding_text(tc: TestCase) -> str:
+    """Text used to embed a test case: what it covers and how it is exercised"""
+    return f"{tc.feature}\n{tc.scenario}\n{tc.test_steps}"
+
+# Embeddings keyed by SHA-256 of the model name and embedded text, least recently used first
+embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+embedding_cache_stats = {"hits": 0, "misses": 0}
+
+async def embed_texts_cached(texts: List[str], api_key: str = "") -> np.ndarray:
+    """Embed ``texts`` in one batch, reusing cached vectors; returns an (n, dim) matrix"""
+    embedding_model = embedding_providers.get_embedding_model(api_key=api_key or None)
+    # Vectors from different models are not comparable, so the model is part of the key
+    model_name = embedding_model.embeddings_model_name
+    keys = [hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest() for text in texts]
+    missing = [i for i, key in enumerate(keys) if key not in embedding_cache]
+    embedding_cache_stats["hits"] += len(keys) - len(missing)
+    embedding_cache_stats["misses"] += len(missing)
+    
+    fresh: Dict[str, np.ndarray] = {}
+    if missing:
+        with timed("embedding"):
+            vectors = await embedding_model.async_get_embeddings([texts[i] for i in missing])
+        for i, vector in zip(missing, vectors):
+            vector = np.asarray(vector, dtype=np.float32)
+            fresh[keys[i]] = vector
+            embedding_cache[keys[i]] = vector
+        while len(embedding_cache) > EMBEDDING_CACHE_MAX_ENTRIES:
+            embedding_cache.popitem(last=False)
+    
+    rows = []
+    for key in keys:
+        if key in embedding_cache:
+            embedding_cache.move_to_end(key)
+            rows.append(embedding_cache[key])
+        else:
+            rows.append(fresh[key])
+    return np.vstack(rows)
+
+async def select_relevant_test_cases(
+    feedback: str,
+    test_cases: List[TestCase],
+    api_key: str = "",
+    k: int = REFINE_PATCH_CONTEXT_SIZE
+) -> List[TestCase]:
+    """Pick the ``k`` test cases most similar to the feedback, plus any it names by ID"""
+    if len(test_cases) <= k:
+        return list(test_cases)
+    
+    matrix = await embed_texts_cached([feedback] + [test_case_embedding_text(tc) for tc in test_cases], api_key)
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    matrix = matrix / norms[:, None]
+    scores = matrix[1:] @ matrix[0]
+    
+    selected = set(np.argpartition(-scores, k - 1)[:k].tolist())
+    selected.update(i for i, tc in enumerate(test_cases) if tc.test_case_id in feedback)
+    return [tc for i, tc in enumerate(test_cases) if i in selected]
+
+@instrumented("deduplication")
+def near_duplicate_labels(
+    matrix: np.ndarray,
+    threshold: float = DEDUPE_SIMILARITY_THRESHOLD,
+    block_size: int = DEDUPE_BLOCK_SIZE
+) -> np.ndarray:
+    """Label rows of ``matrix`` so that rows in the same near-duplicate cluster share a label.
+    
+    Similarities are computed block by block (``block_size`` rows at a time
+    against the whole matrix) so memory stays at block_size x n, and clusters are
+    the connected components of the above-threshold graph, found by vectorized
+    label propagation. Each label is the smallest row index in its cluster.
+    """
+    count = matrix.shape[0]
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    normalized = (matrix / norms[:, None]).astype(np.float32)
+    
+    left_parts, right_parts = [], []
+    for start in range(0, count, block_size):
+        block = normalized[start:start + block_size] @ normalized.T
+        rows, cols = np.nonzero(block >= threshold)
+        rows += start
+        upper = rows < cols  # Each pair once, no self-pairs
+        left_parts.append(rows[upper])
+        right_parts.append(cols[upper])
+    
+    labels = np.arange(count)
+    if not left_parts:
+        return labels
+    left = np.concatenate(left_parts)
+    right = np.concatenate(right_parts)
+    if left.size == 0:
+        return labels
+    
+    while True:
+        pair_min = np.minimum(labels[left], labels[right])
+        updated = labels.copy()
+        np.minimum.at(updated, left, pair_min)
+        np.minimum.at(updated, right, pair_min)
+        updated = updated[updated]  # Pointer jumping shortens long chains
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+def test_case_coverage(test_cases: List[TestCase]) -> Dict[str, Any]:
+    """Count test cases per feature, per category and per feature/category pair"""
+    by_pair = Counter((tc.feature, tc.category) for tc in test_cases)
+    by_feature: Dict[str, Dict[str, int]] = {}
+    for (feature, category), total in by_pair.items():
+        by_feature.setdefault(feature, {})[category] = total
+    return {
+        "total": len(test_cases),
+        "by_feature": dict(Counter(tc.feature for tc in test_cases)),
+        "by_category": dict(Counter(tc.category for tc in test_cases)),
+        "by_feature_and_category": by_feature,
+    }
+
+async def deduplicate_test_cases(
+    test_cases: List[TestCase],
+    api_key: str = "",
+    threshold: float = DEDUPE_SIMILARITY_THRESHOLD,
+    action: str = "flag"
+) -> Dict[str, Any]:
+    """Cluster near-duplicate test cases by embedding similarity.
+    
+    All test cases are embedded in one batch. With ``action="merge"`` only one
+    test case per cluster is kept (highest priority, then earliest); with
+    ``"flag"`` the input is returned unchanged alongside the clusters. Coverage
+    statistics describe the returned test cases.
+    """
+    if len(test_cases) < 2:
+        return {"test_cases": list(test_cases), "clusters": [], "coverage": test_case_coverage(test_cases)}
+    
+    matrix = await embed_texts_cached([test_case_embedding_text(tc) for tc in test_cases], api_key)
+    labels = near_duplicate_labels(matrix, threshold)
+    
+    # Representative per cluster: best priority, then first occurrence
+    ranks = np.array([PRIORITY_RANK.get(tc.priority.lower(), len(PRIORITY_RANK)) for tc in test_cases])
+    order = np.lexsort((np.arange(len(test_cases)), ranks, labels))
+    sorted_labels = labels[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    group_ends = np.r_[group_starts[1:], len(order)]
+    
+    clusters = []
+    keep = np.ones(len(test_cases), dtype=bool)
+    for start, end in zip(group_starts, group_ends):
+        if end - start < 2:
+            continue
+        members = order[start:end]
+        keep[members[1:]] = False
+        clusters.append({
+            "representative": test_cases[members[0]].test_case_id,
+            "duplicates": [test_cases[i].test_case_id for i in members[1:]],
+        })
+    
+    kept = [tc for tc, keep_it in zip(test_cases, keep) if keep_it] if action == "merge" else list(test_cases)
+    return {"test_cases": kept, "clusters": clusters, "coverage": test_case_coverage(kept)}
+
+def next_test_case_id(existing_ids: Iterable[str]) -> str:
+    """Return the next free TC### identifier"""
+    numbers = [int(match.group(1)) for match in (re.fullmatch(r"TC(\d+)", tc_id) for tc_id in existing_ids) if match]
+    return f"TC{max(numbers, default=0) + 1:03d}"
+
+def apply_test_case_patch(
+    test_cases: List[TestCase],
+    operations: List[Any]
+) -> Tuple[List[TestCase], Dict[str, List[str]]]:
+    """Apply add/modify/delete operations keyed by ``test_case_id``.
+    
+    Modifications are partial: only the fields present in the operation change.
+    Operations that reference unknown IDs or produce invalid test cases are skipped.
+    """
+    by_id: Dict[str, TestCase] = {tc.test_case_id: tc for tc in test_cases}
+    applied: Dict[str, List[str]] = {"added": [], "modified": [], "deleted": []}
+    
+    for operation in operations:
+        if not isinstance(operation, dict):
+            continue
+        kind = str(operation.get("op", "")).lower()
+        test_case_id = operation.get("test_case_id")
+        fields = operation.get("test_case") or {}
+        if not isinstance(fields, dict):
+            continue
+        
+        try:
+            if kind == "delete" and test_case_id in by_id:
+                del by_id[test_case_id]
+                applied["deleted"].append(test_case_id)
+            elif kind == "modify" and test_case_id in by_id:
+                merged = {**by_id[test_case_id].model_dump(), **fields, "test_case_id": test_case_id}
+                by_id[test_case_id] = TestCase(**merged)
+                applied["modified"].append(test_case_id)
+            elif kind == "add":
+                new_id = fields.get("test_case_id") or test_case_id
+                if not new_id or new_id in by_id:
+                    new_id = next_test_case_id(by_id)
+                by_id[new_id] = TestCase(**{**fields, "test_case_id": new_id})
+                applied["added"].append(new_id)
+        except (ValidationError, TypeError):
+            continue
+    
+    return list(by_id.values()), applied
+
+def salvage_refinement_patch(text: str) -> Dict[str, Any]:
+    """Recover the complete operations from a refinement patch that isn't valid JSON.
+    
+    Handles a patch wrapped in prose or code fences as well as one truncated
+    inside its ``operations`` array. Items that fail to decode are skipped.
+    """
+    operations: List[Dict[str, Any]] = []
+    summary = ""
+    for source in iter_json_objects(text):
+        try:
+            item = json.loads(source)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(item, dict):
+            continue
+        if isinstance(item.get("operations"), list):
+            operations.extend(op for op in item["operations"] if isinstance(op, dict))
+            summary = summary or str(item.get("summary") or "")
+        elif "op" in item:
+            operations.append(item)
+    if not summary:
+        match = _PATCH_SUMMARY.search(text)
+        try:
+            summary = json.loads(match.group(1)) if match else ""
+        except json.JSONDecodeError:
+            pass
+    return {"operations": operations, "summary": summary}
+
+async def generate_refinement_patch(
+    feedback: str,
+    test_cases: List[TestCase],
+    api_key: str,
+    llm: LLMClient
+) -> Tuple[List[Any], str]:
+    """Ask the model for JSON patch operations against the relevant test cases.
+    
+    Returns the raw operation list and the model's one-paragraph summary.
+    """
+    relevant = await select_relevant_test_cases(feedback, test_cases, api_key)
+    
+    model = llm.model(api_key)
+    
+    prompt = f"""You are a senior QA engineer editing an existing test suite based on user feedback.
+
+FEEDBACK: "{feedback}"
+
+RELEVANT TEST CASES (JSON, a subset of the full suite):
+{json.dumps([tc.model_dump() for tc in relevant], ensure_ascii=False)}
+
+Return ONLY a JSON object with this structure:
+{{
+    "summary": "One short paragraph describing the changes",
+    "operations": [
+        {{"op": "modify", "test_case_id": "TC001", "test_case": {{"test_steps": "only the fields that change"}}}},
+        {{"op": "add", "test_case": {{"feature": "...", "scenario": "...", "test_steps": "...", "expected_result": "...", "priority": "High", "category": "Functional"}}}},
+        {{"op": "delete", "test_case_id": "TC002"}}
+    ]
+}}
+
+Only include operations needed to address the feedback. Do not repeat unchanged test cases."""
+    
+    with timed("generation"):
+        response = await model.generate_content_async(
+            prompt,
+            generation_config={"response_mime_type": "application/json"}
+        )
+    
+    with timed("parsing"):
+        try:
+            data = json.loads(response.text)
+        except json.JSONDecodeError:
+            data = salvage_refinement_patch(response.text)
+    
+    if isinstance(data, list):
+        return data, ""
+    if not isinstance(data, dict):
+        # A bare number or string is valid JSON but holds no operations
+        return [], ""
+    operations = data.get("operations")
+    return operations if isinstance(operations, list) else [], str(data.get("summary") or "")
@@ -0,0 +1,101 @@
+"""
+Upload spooling: request bodies go to a temp file and are read through a memory map
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import mmap
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Union
+
+from fastapi import HTTPException, UploadFile
+
+from prd_api.config import MAX_UPLOAD_SIZE, UPLOAD_CHUNK_SIZE
+
+class SpooledUpload:
+    """An uploaded file spooled to a temporary file and memory-mapped read-only
+
+    The spool is reference counted: ``spool_upload`` holds one reference for the
+    request, and ``share`` adds one for work that may outlive it.
+    """
+
+    def __init__(self, handle, size: int, sha256: str):
+        self._handle = handle
+        self._references = 1
+        self.size = size
+        self.sha256 = sha256
+        self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def closed(self) -> bool:
+        return self._references == 0
+
+    def share(self, work: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Start ``work()`` as a task that keeps the spool open until it settles.
+
+        Use this for single-flight factories: the shared task can outlive the
+        request that spooled the file, e.g. when that client disconnects while
+        coalesced callers are still waiting on the result.
+        """
+        self._references += 1
+        task = asyncio.ensure_future(work())
+        task.add_done_callback(lambda _: self.close())
+        return task
+
+    def close(self) -> None:
+        """Drop one reference; the map and temp file are closed with the last one"""
+        if self._references == 0:
+            return
+        self._references -= 1
+        if self._references == 0:
+            self.data.close()
+            self._handle.close()
+
+@asynccontextmanager
+async def spool_upload(file: UploadFile, max_size: int = MAX_UPLOAD_SIZE) -> AsyncIterator[SpooledUpload]:
+    """Stream an upload to a temp file, enforcing ``max_size`` while reading.
+
+    The declared ``file.size`` is only a hint from the client; the limit here is
+    applied to the bytes actually received. The content hash is computed on the
+    fly so callers never need the whole file in memory.
+    """
+    handle = tempfile.TemporaryFile()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File too large (over {max_size/1024/1024:.0f}MB). Maximum size is {max_size/1024/1024:.0f}MB."
+                )
+            digest.update(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+        
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+        
+        handle.flush()
+        upload = SpooledUpload(handle, size, digest.hexdigest())
+    except BaseException:
+        handle.close()
+        raise
+    
+    try:
+        yield upload
+    finally:
+        upload.close()
+
+def as_stream(file_content: Union[bytes, mmap.mmap]):
+    """Return a seekable stream over upload content; memory maps are used in place"""
+    if isinstance(file_content, mmap.mmap):
+        file_content.seek(0)
+        return file_content
+    return io.BytesIO(file_content)
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from prd_api import create_app
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+
+def route_paths(app) -> set:
+    return {route.path for route in app.routes if route.path.startswith("/api/")}
+
+
+def test_create_app_mounts_only_the_chosen_routers():
+    app = create_app(["usage", "export"])
+
+    paths = route_paths(app)
+    assert {"/api/health", "/api/metrics", "/api/download-csv"} <= paths
+    assert not {"/api/upload-prd", "/api/chat", "/api/chat-with-document"} & paths
+    assert TestClient(app).post("/api/chat", json={"message": "hi"}).status_code == 404
+
+
+def test_create_app_accepts_a_comma_separated_string():
+    assert route_paths(create_app(" usage , export ")) == route_paths(create_app(["usage", "export"]))
+
+
+def test_create_app_rejects_unknown_routers():
+    with pytest.raises(ValueError, match="Unknown routers: billing"):
+        create_app(["usage", "billing"])
+
+
+def test_subset_app_does_not_import_other_routers_or_heavy_modules():
+    # A fresh interpreter, since this test session has already imported everything
+    script = (
+        "import json, sys\n"
+        "from prd_api import create_app\n"
+        "create_app(['usage', 'export'])\n"
+        "print(json.dumps(sorted(name for name in ('prd_api.routers.generation', 'prd_api.routers.chat',"
+        " 'prd_api.routers.rag', 'google.generativeai', 'PyPDF2', 'pypdf', 'PIL.Image') if name in sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], cwd=API_DIR, capture_output=True, text=True, check=True)
+
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from aimakerspace.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+CHUNKS = [
+    "Login fails with ERR-401 when the session token has expired.",
+    "Checkout shows a banner when payment_status is DECLINED.",
+    "Users can reset their password from the login page.",
+    "The export button downloads test cases as CSV.",
+]
+
+
+def test_tokenize_keeps_identifiers_whole():
+    assert tokenize("ERR-401 on v2.1 for user_id!") == ["err-401", "on", "v2.1", "for", "user_id"]
+
+
+def test_search_ranks_exact_identifier_first():
+    index = BM25Index(CHUNKS)
+
+    results = index.search("what does ERR-401 mean?", k=2)
+
+    assert results[0][0] == CHUNKS[0]
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_returns_only_positive_scores():
+    index = BM25Index(CHUNKS)
+
+    assert {text for text, _ in index.search("login", k=4)} == {CHUNKS[0], CHUNKS[2]}
+    assert index.search("nonexistent words", k=3) == []
+
+
+def test_scores_match_okapi_formula():
+    index = BM25Index(CHUNKS, k1=1.2, b=0.75)
+    lengths = np.array([len(tokenize(chunk)) for chunk in CHUNKS], dtype=float)
+    doc_freq = sum("login" in tokenize(chunk) for chunk in CHUNKS)
+    idf = np.log1p((len(CHUNKS) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    expected = [
+        idf * tokenize(chunk).count("login") * 2.2
+        / (tokenize(chunk).count("login") + 1.2 * (0.25 + 0.75 * length / lengths.mean()))
+        for chunk, length in zip(CHUNKS, lengths)
+    ]
+
+    np.testing.assert_allclose(index.get_scores("Login login"), expected, rtol=1e-5)
+
+
+def test_mask_excludes_documents():
+    index = BM25Index(CHUNKS)
+    mask = np.array([False, True, True, True])
+
+    assert [text for text, _ in index.search("login", k=4, mask=mask)] == [CHUNKS[2]]
+
+
+def test_empty_index_and_invalid_k():
+    assert BM25Index([]).search("anything", k=3) == []
+    with pytest.raises(ValueError):
+        BM25Index(CHUNKS).search("login", k=0)
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+
+    assert [item for item, _ in fused] == ["a", "c", "b"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
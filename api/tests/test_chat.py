@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from prd_api import create_app, services
+from prd_api.dependencies import get_llm_client, get_session_store, get_usage_limiter
+
+
+class FakeModel:
+    def __init__(self, text: str):
+        self.text = text
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return SimpleNamespace(text=self.text)
+
+
+class FakeLLM:
+    built_in_key = "built-in"
+    model_name = "fake-model"
+
+    def __init__(self, text: str = "## Answer"):
+        self.fake_model = FakeModel(text)
+
+    def model(self, api_key: str):
+        return self.fake_model
+
+
+def make_test_case(number: int) -> dict:
+    return {
+        "test_case_id": f"TC{number:03d}", "feature": "Login", "scenario": f"Scenario {number}",
+        "test_steps": "1. Submit", "expected_result": "Signed in", "priority": "High", "category": "Functional",
+    }
+
+
+@pytest.fixture
+def make_client():
+    def make(llm: FakeLLM):
+        app = create_app(["chat"])
+        sessions = services.TestCaseSessionStore()
+        app.dependency_overrides[get_llm_client] = lambda: llm
+        app.dependency_overrides[get_usage_limiter] = lambda: services.UsageLimiter(development_mode=True)
+        app.dependency_overrides[get_session_store] = lambda: sessions
+        return TestClient(app)
+
+    return make
+
+
+@pytest.mark.parametrize("model_output", ["42", '"no changes"', "null"])
+def test_patch_refinement_treats_json_scalar_as_no_changes(make_client, model_output):
+    client = make_client(FakeLLM(model_output))
+
+    response = client.post("/api/refine-test-cases", json={
+        "test_cases": [make_test_case(1)], "refinement_prompt": "Looks good", "mode": "patch",
+    })
+
+    body = response.json()
+    assert response.status_code == 200 and body["success"]
+    assert "No changes were needed" in body["response"]
+    assert body["updated_test_cases"] == [make_test_case(1)]
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/api/chat", {"message": "Hi", "session_id": "missing"}),
+    ("/api/refine-test-cases", {"refinement_prompt": "More edge cases", "session_id": "missing"}),
+])
+def test_unknown_session_is_a_404(make_client, path, payload):
+    response = make_client(FakeLLM()).post(path, json=payload)
+
+    assert response.status_code == 404
+
+
+def test_refinement_without_test_cases_is_a_400(make_client):
+    response = make_client(FakeLLM()).post("/api/refine-test-cases", json={"refinement_prompt": "More"})
+
+    assert response.status_code == 400
+
+
+def test_chat_awaits_async_generation(make_client):
+    llm = FakeLLM("## Login tips\n- Check lockouts")
+
+    response = make_client(llm).post(
+        "/api/chat", json={"message": "What should I test?", "test_cases": [make_test_case(1)]}
+    )
+
+    body = response.json()
+    assert body["success"] and body["response"] == "## Login tips\n- Check lockouts"
+    assert "What should I test?" in llm.fake_model.prompts[0]
@@ -0,0 +1,59 @@
+from aimakerspace.context import _merge_spans, estimate_tokens, pack_context
+
+DOCUMENT = "".join(f"Sentence {index:02d} of the PRD. " for index in range(20))
+
+
+def chunk_at(start: int, length: int = 60) -> str:
+    return DOCUMENT[start : start + length]
+
+
+def test_overlapping_chunks_merge_without_duplicated_text():
+    first, second = chunk_at(0), chunk_at(40)
+    offsets = {first: 0, second: 40}
+
+    context = pack_context([second, first], token_budget=1000, offsets=offsets)
+
+    assert context == DOCUMENT[:100]
+    assert context.count("Sentence 01") == 1
+
+
+def test_adjacent_chunks_merge_into_one_segment():
+    first, second = chunk_at(0), chunk_at(60)
+
+    assert _merge_spans([(60, second, 0.2), (0, first, 0.9)]) == [(0, DOCUMENT[:120], 0.9)]
+    assert pack_context([first, second], token_budget=1000, offsets={first: 0, second: 60}) == DOCUMENT[:120]
+
+
+def test_separate_chunks_are_emitted_in_document_order():
+    early, late = chunk_at(0, 30), chunk_at(300, 30)
+
+    context = pack_context([late, early], token_budget=1000, offsets={early: 0, late: 300}, separator="|")
+
+    assert context == f"{early}|{late}"
+
+
+def test_duplicates_and_chunks_without_offsets():
+    located = chunk_at(0, 30)
+    loose_a, loose_b = "Answer from another source.", "Second loose chunk."
+
+    context = pack_context(
+        [loose_a, located, loose_a, loose_b, located], token_budget=1000, offsets={located: 0}, separator="|"
+    )
+
+    # Located segments first, then unlocated chunks in retrieval order, each once
+    assert context == f"{located}|{loose_a}|{loose_b}"
+
+
+def test_budget_admits_best_scores_and_truncates_the_last_segment():
+    chunks = ["a" * 40, "b" * 40, "c" * 40]
+    separator_tokens = estimate_tokens("\n\n")
+    # Room for the best chunk in full plus five tokens of the next best
+    budget = estimate_tokens(chunks[0]) + separator_tokens + 5 + separator_tokens
+
+    context = pack_context(chunks, token_budget=budget, scores=[0.1, 0.9, 0.5])
+
+    assert context == "b" * 40 + "\n\n" + "c" * 20
+
+
+def test_budget_smaller_than_a_separator_yields_nothing():
+    assert pack_context(["some text"], token_budget=1) == ""
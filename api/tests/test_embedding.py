@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from aimakerspace.embedding import get_embedding_model_by_name
+from aimakerspace.gemini_utils import embedding as gemini_embedding
+from aimakerspace.gemini_utils.embedding import GeminiEmbeddingModel
+from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    monkeypatch.setattr(gemini_embedding.genai, "configure", lambda **kwargs: None)
+    monkeypatch.setattr(GeminiEmbeddingModel, "RETRY_DELAY_SECONDS", 0.0)
+    return GeminiEmbeddingModel(api_key="test-key")
+
+
+def test_batches_are_bounded_and_ordered(gemini, monkeypatch):
+    state = {"in_flight": 0, "peak": 0}
+
+    async def embed_content_async(model, content, task_type):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.001)
+        state["in_flight"] -= 1
+        return {"embedding": [[float(text)] for text in content]}
+
+    monkeypatch.setattr(gemini_embedding.genai, "embed_content_async", embed_content_async)
+    texts = [str(number) for number in range(1050)]
+
+    embeddings = asyncio.run(gemini.async_get_embeddings(texts))
+
+    assert embeddings == [[float(number)] for number in range(1050)]
+    assert state["peak"] == GeminiEmbeddingModel.MAX_CONCURRENT_BATCHES
+
+
+def test_failed_batch_is_retried(gemini, monkeypatch):
+    failures = [RuntimeError("429 Resource exhausted")] * 2
+
+    async def embed_content_async(model, content, task_type):
+        if failures:
+            raise failures.pop()
+        return {"embedding": [[1.0] for _ in content]}
+
+    monkeypatch.setattr(gemini_embedding.genai, "embed_content_async", embed_content_async)
+
+    assert asyncio.run(gemini.async_get_embeddings(["a", "b"])) == [[1.0], [1.0]]
+
+
+def test_persistent_failure_raises_instead_of_zero_vectors(gemini, monkeypatch):
+    calls = []
+
+    async def embed_content_async(model, content, task_type):
+        calls.append(content)
+        raise RuntimeError("quota exceeded")
+
+    def embed_content(model, content, task_type):
+        calls.append(content)
+        raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(gemini_embedding.genai, "embed_content_async", embed_content_async)
+    monkeypatch.setattr(gemini_embedding.genai, "embed_content", embed_content)
+
+    with pytest.raises(RuntimeError, match="quota"):
+        asyncio.run(gemini.async_get_embeddings(["a"]))
+    with pytest.raises(RuntimeError, match="quota"):
+        gemini.get_embeddings(["a"])
+    with pytest.raises(RuntimeError, match="quota"):
+        asyncio.run(gemini.async_get_embedding("a"))
+    with pytest.raises(RuntimeError, match="quota"):
+        gemini.get_embedding("a")
+    assert len(calls) == 4 * GeminiEmbeddingModel.MAX_ATTEMPTS
+
+
+def test_single_text_is_retried(gemini, monkeypatch):
+    failures = [RuntimeError("503 Service unavailable")]
+
+    async def embed_content_async(model, content, task_type):
+        if failures:
+            raise failures.pop()
+        return {"embedding": [0.5, 0.5]}
+
+    monkeypatch.setattr(gemini_embedding.genai, "embed_content_async", embed_content_async)
+
+    assert asyncio.run(gemini.async_get_embedding("query")) == [0.5, 0.5]
+
+
+def test_get_embedding_model_by_name(monkeypatch):
+    monkeypatch.setattr(gemini_embedding.genai, "configure", lambda **kwargs: None)
+
+    local = get_embedding_model_by_name("local-hash-128")
+    gemini = get_embedding_model_by_name("models/text-embedding-004", api_key="test-key")
+
+    assert isinstance(local, LocalEmbeddingModel) and local.dimension == 128
+    assert isinstance(gemini, GeminiEmbeddingModel) and gemini.embeddings_model_name == "models/text-embedding-004"
+    with pytest.raises(ValueError):
+        get_embedding_model_by_name("text-embedding-3-small")
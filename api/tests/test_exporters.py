@@ -0,0 +1,91 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import zipfile
+from xml.etree import ElementTree
+
+import pytest
+
+from prd_api import exporters, models
+
+SHEET_NS = {"s": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def make_test_cases(count: int = 3):
+    return [
+        models.TestCase(
+            test_case_id=f"TC{number:03d}",
+            feature="Login, \"SSO\" & <MFA>",
+            scenario=f"Scenario {number}\x0b with a control character",
+            test_steps="1. Open the page\n2. Submit the form",
+            expected_result=f"The user is signed in ({hashlib.sha256(str(number).encode()).hexdigest()})",
+            priority="High",
+            category="Functional",
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+@pytest.fixture
+def small_flushes(monkeypatch):
+    # Force many flushes so chunk boundaries fall mid-stream
+    monkeypatch.setattr(exporters, "EXPORT_FLUSH_SIZE", 256)
+
+
+def test_csv_export_quotes_embedded_newlines(small_flushes):
+    cases = make_test_cases(50)
+
+    chunks = list(exporters.iter_csv_export(cases))
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+
+    assert len(chunks) > 2
+    assert rows[0] == exporters.EXPORT_FIELDNAMES
+    assert rows[1:] == [exporters.test_case_row(tc) for tc in cases]
+    assert rows[1][3] == "1. Open the page\n2. Submit the form"
+
+
+def test_jsonl_export_round_trips(small_flushes):
+    cases = make_test_cases(20)
+
+    lines = b"".join(exporters.iter_jsonl_export(cases)).decode("utf-8").splitlines()
+
+    assert [models.TestCase(**json.loads(line)) for line in lines] == cases
+
+
+def test_xlsx_export_is_a_valid_workbook(small_flushes):
+    cases = make_test_cases(1000)
+
+    chunks = list(exporters.iter_xlsx_export(cases))
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+    assert len(chunks) > 2
+    assert archive.testzip() is None
+    assert set(archive.namelist()) == {*exporters._XLSX_STATIC_PARTS, "xl/worksheets/sheet1.xml"}
+    sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    rows = [
+        [cell.findtext("s:is/s:t", namespaces=SHEET_NS) for cell in row.findall("s:c", SHEET_NS)]
+        for row in sheet.findall("s:sheetData/s:row", SHEET_NS)
+    ]
+    assert rows[0] == exporters.EXPORT_FIELDNAMES
+    expected = [[value.replace("\x0b", "") for value in exporters.test_case_row(tc)] for tc in cases]
+    assert rows[1:] == expected
+    for name in exporters._XLSX_STATIC_PARTS:
+        ElementTree.fromstring(archive.read(name))
+
+
+def test_empty_xlsx_export_has_only_the_header():
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(exporters.iter_xlsx_export([]))))
+
+    sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    assert len(sheet.findall("s:sheetData/s:row", SHEET_NS)) == 1
+
+
+def test_gzip_chunks_decompress_to_the_original(small_flushes):
+    chunks = list(exporters.iter_csv_export(make_test_cases(200)))
+
+    compressed = b"".join(exporters.gzip_chunks(iter(chunks)))
+
+    assert gzip.decompress(compressed) == b"".join(chunks)
+    assert gzip.decompress(b"".join(exporters.gzip_chunks([]))) == b""
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from prd_api.config import OCR_MAX_DIMENSION
+from prd_api.extraction import preprocess_image_for_ocr
+
+
+def png_bytes(image: Image.Image) -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def transparent_screenshot(mode: str) -> bytes:
+    # Wider than OCR_MAX_DIMENSION so the image is always re-encoded
+    image = Image.new("RGBA", (OCR_MAX_DIMENSION * 2, 200), (0, 0, 0, 0))
+    ImageDraw.Draw(image).rectangle((100, 50, 400, 150), fill=(0, 0, 0, 255))
+    if mode == "P":
+        image = image.convert("P")
+        image.info["transparency"] = image.getpixel((0, 0))
+    elif mode == "LA":
+        image = image.convert("LA")
+    return png_bytes(image)
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "LA", "P"])
+def test_preprocess_composites_transparency_onto_white(mode):
+    part, stats = preprocess_image_for_ocr(transparent_screenshot(mode))
+    processed = Image.open(io.BytesIO(part["data"]))
+
+    assert part["mime_type"] == "image/jpeg"
+    assert processed.mode == "L"
+    assert max(processed.size) == OCR_MAX_DIMENSION
+    assert processed.getpixel((10, 10)) > 240  # Transparent background
+    assert processed.getpixel((125, 50)) < 15  # Opaque black text
+
+
+def test_preprocess_keeps_small_screenshots_untouched():
+    data = png_bytes(Image.new("RGB", (40, 20), "white"))
+
+    part, stats = preprocess_image_for_ocr(data)
+
+    assert part == {"mime_type": "image/png", "data": data}
+    assert stats["bytes_after"] == len(data)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from prd_api import create_app, models, services
+from prd_api.dependencies import get_llm_client, get_usage_limiter
+from prd_api.routers import generation
+
+
+class FakeLLM:
+    built_in_key = "built-in"
+    model_name = "fake-model"
+
+    def model(self, api_key: str):
+        return None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_extract(data, model):
+        return "Extracted PRD text"
+
+    async def fake_generate(text, model):
+        return [models.TestCase(
+            test_case_id="TC001", feature="Login", scenario="s", test_steps="1", expected_result="e",
+            priority="High", category="Functional",
+        )]
+
+    monkeypatch.setattr(generation, "extract_text_from_image", fake_extract)
+    monkeypatch.setattr(generation, "generate_test_cases", fake_generate)
+    limiter = services.UsageLimiter(daily_limit=2, development_mode=False)
+    app = create_app(["generation"])
+    app.dependency_overrides[get_llm_client] = FakeLLM
+    app.dependency_overrides[get_usage_limiter] = lambda: limiter
+    return TestClient(app), limiter
+
+
+def images(count: int):
+    return [("files", (f"page{index}.png", b"image %d" % index, "image/png")) for index in range(count)]
+
+
+def events(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_rejected_when_passes_exceed_remaining_quota(client):
+    client, limiter = client
+
+    response = client.post("/api/upload-prd-batch", files=images(3), data={"mode": "per_file"})
+
+    assert response.status_code == 429
+    assert "needs 3 free uses" in response.json()["detail"]
+    assert all(sum(days.values()) == 0 for days in limiter.usage.values())
+
+
+def test_batch_counts_one_use_per_generation_pass(client):
+    client, _ = client
+
+    per_file = events(client.post("/api/upload-prd-batch", files=images(2), data={"mode": "per_file"}))
+    assert per_file[-1]["generation_passes"] == 2
+    assert per_file[-1]["usage_info"]["used_today"] == 2
+
+    response = client.post("/api/upload-prd-batch", files=images(1), data={"mode": "combined"})
+    assert response.status_code == 429
+
+
+def test_combined_batch_uses_one_pass(client):
+    client, _ = client
+
+    done = events(client.post("/api/upload-prd-batch", files=images(4), data={"mode": "combined"}))[-1]
+
+    assert done["generation_passes"] == 1
+    assert done["usage_info"]["used_today"] == 1
@@ -0,0 +1,109 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from aimakerspace import ingest
+from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+from benchmarks.fixtures import make_text_pdf
+
+
+def write_pdf(path, text: str, mtime_ns: int) -> None:
+    path.write_bytes(make_text_pdf([text]))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def run(source, index) -> dict:
+    return asyncio.run(ingest.ingest_directory(str(source), str(index), LocalEmbeddingModel(), workers=1))
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    source = tmp_path / "prds"
+    source.mkdir()
+    write_pdf(source / "login.pdf", "Login fails with ERR-401 when the session token expires. " * 20, 1)
+    write_pdf(source / "billing.pdf", "Checkout shows a banner when the payment is declined. " * 20, 1)
+    return source
+
+
+def test_ingest_and_resume(corpus, tmp_path):
+    index = tmp_path / "index"
+
+    first = run(corpus, index)
+    second = run(corpus, index)
+
+    assert (first["files"], first["failed"]) == (2, 0)
+    assert (second["files"], second["skipped"]) == (0, 2)
+    database = ingest.load_index(str(index))
+    assert len(database.vectors) == first["rows"]
+    assert {entry["source"] for entry in database.metadata.values()} == {"login.pdf", "billing.pdf"}
+
+
+def test_changed_file_replaces_its_chunks(corpus, tmp_path):
+    index = tmp_path / "index"
+    run(corpus, index)
+    write_pdf(corpus / "login.pdf", "Password reset links expire after one hour. " * 5, 2)
+
+    stats = run(corpus, index)
+
+    assert (stats["files"], stats["skipped"]) == (1, 1)
+    for snapshot in (True, False):
+        if not snapshot:
+            (index / ingest.SNAPSHOT_FILE).unlink()
+        texts = list(ingest.load_index(str(index)).vectors)
+        assert not any("ERR-401" in text for text in texts)
+        assert any("Password reset" in text for text in texts)
+        assert any("Checkout" in text for text in texts)
+
+
+def test_load_index_uses_the_model_it_was_built_with(corpus, tmp_path, monkeypatch):
+    index = tmp_path / "index"
+    run(corpus, index)
+    monkeypatch.setenv("GEMINI_API_KEY", "unused")
+
+    database = ingest.load_index(str(index))
+
+    assert isinstance(database.embedding_model, LocalEmbeddingModel)
+    assert database.search_by_text("ERR-401 session token", k=1, return_as_text=True)[0].startswith("Login")
+
+
+def test_file_with_a_zero_vector_is_retried(corpus, tmp_path):
+    class FlakyModel(LocalEmbeddingModel):
+        async def async_get_embeddings(self, list_of_text):
+            vectors = np.asarray(await super().async_get_embeddings(list_of_text))
+            vectors[-1] = 0.0
+            return vectors
+
+    index = tmp_path / "index"
+    stats = asyncio.run(ingest.ingest_directory(str(corpus), str(index), FlakyModel(), workers=1))
+
+    assert (stats["files"], stats["failed"]) == (0, 2)
+    assert run(corpus, index)["files"] == 2
+
+
+def test_rebuild_deletes_only_index_files(corpus, tmp_path):
+    index = tmp_path / "index"
+    run(corpus, index)
+    (index / "notes.txt").write_text("keep me")
+
+    stats = asyncio.run(ingest.ingest_directory(
+        str(corpus), str(index), LocalEmbeddingModel(), workers=1, rebuild=True
+    ))
+
+    assert (stats["files"], stats["skipped"]) == (2, 0)
+    assert (index / "notes.txt").read_text() == "keep me"
+
+
+def test_rebuild_refuses_a_directory_that_is_not_an_index(corpus, tmp_path):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "chunks.jsonl").write_text("{}\n")
+    (project / "app.py").write_text("print('hi')\n")
+
+    with pytest.raises(ValueError, match="index directory"):
+        asyncio.run(ingest.ingest_directory(
+            str(corpus), str(project), LocalEmbeddingModel(), workers=1, rebuild=True
+        ))
+
+    assert sorted(path.name for path in project.iterdir()) == ["app.py", "chunks.jsonl"]
@@ -0,0 +1,79 @@
+import sys
+import threading
+import types
+
+import pytest
+
+from prd_api.lazy import _DeferredModule, lazy_import, load
+
+SLOW_MODULE = """
+import time
+from lazy_probe_events import events
+events.append("start")
+time.sleep(0.05)  # Other threads arrive while this module is half initialized
+VALUE = 42
+events.append("done")
+"""
+
+
+@pytest.fixture
+def probe_module(tmp_path, monkeypatch):
+    """A not-yet-imported module that records when its body runs"""
+    name = f"lazy_probe_{tmp_path.name.replace('-', '_')}"
+    (tmp_path / f"{name}.py").write_text(SLOW_MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    events = []
+    monkeypatch.setitem(sys.modules, "lazy_probe_events", types.SimpleNamespace(events=events))
+    yield name, events
+    sys.modules.pop(name, None)
+
+
+def test_module_is_imported_on_first_attribute_access(probe_module):
+    name, events = probe_module
+
+    module = lazy_import(name)
+
+    assert isinstance(module, _DeferredModule)
+    assert events == [] and name not in sys.modules
+    assert module.VALUE == 42
+    assert events == ["start", "done"]
+    assert module.VALUE == 42 and events == ["start", "done"]
+
+
+def test_concurrent_first_use_sees_the_finished_module(probe_module):
+    name, events = probe_module
+    module = lazy_import(name)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def use():
+        barrier.wait()
+        results.append(module.VALUE)
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 8
+    assert events == ["start", "done"]
+
+
+def test_load_imports_eagerly(probe_module):
+    name, events = probe_module
+
+    load(lazy_import(name))
+
+    assert events == ["start", "done"] and name in sys.modules
+
+
+def test_already_imported_module_is_returned_as_is():
+    assert lazy_import("json") is sys.modules["json"]
+
+
+def test_missing_module_fails_at_lazy_import_time():
+    with pytest.raises(ModuleNotFoundError) as error:
+        lazy_import("prd_api_no_such_module")
+
+    assert error.value.name == "prd_api_no_such_module"
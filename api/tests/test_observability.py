@@ -0,0 +1,151 @@
+import json
+import logging
+import queue
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from prd_api import create_app, observability
+from prd_api.observability import (
+    Counters, DroppingQueueHandler, Histogram, JsonLogFormatter, RequestContextFilter, server_timing_header, timed,
+)
+
+
+def make_record(message: str = "Parsed page", **extra) -> logging.LogRecord:
+    record = logging.LogRecord("prd_api", logging.INFO, __file__, 1, message, (), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo latency", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "parsing")
+
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo latency",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="parsing",le="0.1"} 2',
+        'demo_seconds_bucket{stage="parsing",le="1.0"} 3',
+        'demo_seconds_bucket{stage="parsing",le="+Inf"} 4',
+        'demo_seconds_sum{stage="parsing"} 3.65',
+        'demo_seconds_count{stage="parsing"} 4',
+    ]
+
+
+def test_counters_render_per_label():
+    counters = Counters("demo_errors_total", "Demo errors", ("stage",))
+    counters.inc("ocr")
+    counters.inc("ocr", amount=2)
+    counters.inc("embedding")
+
+    assert counters.render()[2:] == ['demo_errors_total{stage="embedding"} 1', 'demo_errors_total{stage="ocr"} 3']
+
+
+def test_timed_counts_failures():
+    before = dict(observability.stage_errors_total._values)
+    with pytest.raises(RuntimeError):
+        with timed("test-stage"):
+            raise RuntimeError("boom")
+
+    assert observability.stage_errors_total._values[("test-stage",)] == before.get(("test-stage",), 0) + 1
+
+
+@pytest.fixture
+def app():
+    app = create_app(["usage"])
+
+    @app.get("/api/test-timed")
+    async def timed_route():
+        with timed("parsing"):
+            pass
+        with timed("parsing"):
+            pass
+        return {"ok": True}
+
+    return app
+
+
+def test_metrics_endpoint_exposes_prometheus_text(app):
+    client = TestClient(app)
+    client.get("/api/test-timed")
+
+    response = client.get("/api/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    sample = re.compile(r'^[a-z_]+(\{([a-z_]+="[^"]*",?)*\})? [0-9.e+-]+$')
+    assert all(line.startswith("# HELP ") or line.startswith("# TYPE ") or sample.match(line) for line in lines)
+    assert "# TYPE prd_api_request_duration_seconds histogram" in lines
+    route_buckets = [
+        line for line in lines
+        if line.startswith('prd_api_request_duration_seconds_bucket{method="GET",route="/api/test-timed",status="200"')
+    ]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in route_buckets]
+    assert counts == sorted(counts) and route_buckets[-1].split(" ")[0].endswith('le="+Inf"}')
+    assert any(line.startswith('prd_api_stage_duration_seconds_count{stage="parsing"}') for line in lines)
+    assert any(line.startswith("prd_api_log_records_dropped_total ") for line in lines)
+
+
+def test_request_id_is_echoed_or_generated(app):
+    client = TestClient(app)
+
+    echoed = client.get("/api/health", headers={"X-Request-ID": "client-123"})
+    rejected = client.get("/api/health", headers={"X-Request-ID": "bad id\twith spaces"})
+    generated = client.get("/api/health")
+
+    assert echoed.headers["X-Request-ID"] == "client-123"
+    assert re.fullmatch(r"[0-9a-f]{16}", rejected.headers["X-Request-ID"])
+    assert generated.headers["X-Request-ID"] != rejected.headers["X-Request-ID"]
+
+
+def test_server_timing_header(app, monkeypatch):
+    monkeypatch.setattr(observability, "SERVER_TIMING_ENABLED", True)
+
+    header = TestClient(app).get("/api/test-timed").headers["Server-Timing"]
+
+    # Repeated stages are summed into one entry, and the total comes last
+    assert re.fullmatch(r"parsing;dur=\d+\.\d, total;dur=\d+\.\d", header)
+    monkeypatch.setattr(observability, "SERVER_TIMING_ENABLED", False)
+    assert "Server-Timing" not in TestClient(app).get("/api/test-timed").headers
+
+
+def test_server_timing_header_format():
+    header = server_timing_header([("ocr", 0.010), ("parsing", 0.002), ("ocr", 0.005)], 0.020)
+
+    assert header == "ocr;dur=15.0, parsing;dur=2.0, total;dur=20.0"
+
+
+def test_dropping_queue_handler_never_blocks():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+
+    for index in range(5):
+        handler.handle(make_record(f"record {index}"))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert [handler.queue.get_nowait().getMessage() for _ in range(2)] == ["record 0", "record 1"]
+
+
+def test_request_context_filter_stamps_and_samples():
+    log_filter = RequestContextFilter(sample_every=3)
+    token = observability.request_id_var.set("req-1")
+    try:
+        kept = [log_filter.filter(make_record(sampled=True)) for _ in range(7)]
+        record = make_record()
+        assert log_filter.filter(record) and record.request_id == "req-1"
+    finally:
+        observability.request_id_var.reset(token)
+
+    assert kept == [True, False, False, True, False, False, True]
+
+
+def test_json_log_formatter_includes_extra_fields():
+    record = make_record("Request handled", request_id="abc", route="/api/health", sampled=True)
+
+    entry = json.loads(JsonLogFormatter().format(record))
+
+    assert entry["message"] == "Request handled"
+    assert entry["request_id"] == "abc" and entry["route"] == "/api/health"
+    assert "sampled" not in entry and entry["level"] == "INFO"
@@ -0,0 +1,27 @@
+from prd_api.rag import decompose_question
+
+
+def test_decompose_question_keeps_simple_questions():
+    assert decompose_question("Describe checkout") == ["Describe checkout"]
+
+
+def test_decompose_question_splits_clauses():
+    queries = decompose_question("What is the export format? Who can export?")
+
+    assert queries[0] == "What is the export format? Who can export?"
+    assert queries[1:] == ["What is the export format", "Who can export"]
+
+
+def test_decompose_question_distributes_conjunctions():
+    queries = decompose_question("How does login and signup handle errors?")
+
+    assert queries[0] == "How does login and signup handle errors?"
+    assert any("login" in query and "errors" in query and "signup" not in query for query in queries)
+    assert any("signup" in query and "errors" in query and "login" not in query for query in queries)
+
+
+def test_decompose_question_respects_limit():
+    queries = decompose_question("A? B? C? D? E? F?", max_queries=3)
+
+    assert len(queries) == 3
+    assert len(set(queries)) == 3
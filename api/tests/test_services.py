@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from prd_api import models, services
+
+
+def make_test_case(number: int, steps: str = "1. Open the page") -> models.TestCase:
+    return models.TestCase(
+        test_case_id=f"TC{number:03d}",
+        feature="Login",
+        scenario=f"Scenario {number}",
+        test_steps=steps,
+        expected_result="The user is signed in",
+        priority="High",
+        category="Functional",
+    )
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(services.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_session_store_create_and_get():
+    store = services.TestCaseSessionStore()
+    session_id = store.create([make_test_case(1), make_test_case(2)])
+
+    assert [tc.test_case_id for tc in store.get(session_id)] == ["TC001", "TC002"]
+    assert store.expires_at(session_id) is not None
+    assert store.get("unknown") is None
+    assert store.expires_at("unknown") is None
+
+
+def test_session_store_apply_delta():
+    store = services.TestCaseSessionStore()
+    session_id = store.create([make_test_case(1), make_test_case(2)])
+
+    updated = store.apply_delta(session_id, upsert=[make_test_case(2, "changed"), make_test_case(3)], delete_ids=["TC001"])
+
+    assert [(tc.test_case_id, tc.test_steps) for tc in updated] == [("TC002", "changed"), ("TC003", "1. Open the page")]
+    assert store.get(session_id) == updated
+    assert store.apply_delta("unknown", delete_ids=["TC001"]) is None
+
+
+def test_session_store_evicts_least_recently_used():
+    store = services.TestCaseSessionStore(max_sessions=2)
+    first = store.create([make_test_case(1)])
+    second = store.create([make_test_case(2)])
+    store.get(first)
+    third = store.create([make_test_case(3)])
+
+    assert store.get(second) is None
+    assert store.get(first) is not None
+    assert store.get(third) is not None
+    assert len(store) == 2
+
+
+def test_session_store_never_evicts_the_session_being_stored():
+    store = services.TestCaseSessionStore(max_total_bytes=10)
+    other = store.create([make_test_case(1)])
+    session_id = store.create([make_test_case(2)])
+
+    assert store.get(other) is None
+    assert store.expires_at(session_id) is not None
+    assert store.apply_delta(session_id, upsert=[make_test_case(3)]) is not None
+    assert store.expires_at(session_id) is not None
+
+
+def test_session_store_byte_budget():
+    size = services.TestCaseSessionStore._estimate_size({"TC001": make_test_case(1)})
+    store = services.TestCaseSessionStore(max_total_bytes=2 * size)
+    ids = [store.create([make_test_case(number)]) for number in (1, 2, 3)]
+
+    assert [store.get(session_id) is not None for session_id in ids] == [False, True, True]
+    assert store.total_bytes == 2 * size
+
+
+def test_session_store_ttl(clock):
+    store = services.TestCaseSessionStore(ttl_seconds=60)
+    session_id = store.create([make_test_case(1)])
+
+    clock[0] += 59
+    assert store.get(session_id) is not None  # Reading refreshes the TTL
+    clock[0] += 59
+    assert store.get(session_id) is not None
+    clock[0] += 60
+    assert store.get(session_id) is None
+    assert store.expires_at(session_id) is None
+    assert store.total_bytes == 0
+
+
+def test_session_store_resolve():
+    store = services.TestCaseSessionStore()
+    session_id = store.create([make_test_case(1)])
+    body = [make_test_case(5)]
+
+    assert store.resolve(None, body) == body
+    assert [tc.test_case_id for tc in store.resolve(session_id, upsert=[make_test_case(2)])] == ["TC001", "TC002"]
+    with pytest.raises(HTTPException) as error:
+        store.resolve("expired")
+    assert error.value.status_code == 404
+
+
+def test_counting_executor_tracks_running_and_queued_work():
+    release = threading.Event()
+    executor = services.CountingThreadPoolExecutor(max_workers=1)
+    try:
+        running = executor.submit(release.wait, 5)
+        queued = [executor.submit(lambda: None) for _ in range(2)]
+        while executor.running == 0:
+            threading.Event().wait(0.001)
+
+        assert executor.stats() == {"max_workers": 1, "running": 1, "queued": 2, "saturated": True}
+        assert queued[1].cancel()
+        assert executor.stats()["queued"] == 1
+
+        release.set()
+        running.result(5)
+        queued[0].result(5)
+        assert executor.stats() == {"max_workers": 1, "running": 0, "queued": 0, "saturated": False}
+    finally:
+        executor.shutdown()
+
+
+def test_installed_default_executor_backs_to_thread_and_diagnostics():
+    from prd_api.diagnostics import runtime_saturation
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        assert runtime_saturation(loop)["thread_pool"] == {"started": False}
+
+        executor = services.install_default_executor(loop, max_workers=2)
+        assert services.install_default_executor(loop) is executor
+        worker = await asyncio.to_thread(threading.current_thread)
+        assert worker.name.startswith("prd-api")
+
+        return runtime_saturation(loop)["thread_pool"]
+
+    assert asyncio.run(run()) == {"started": True, "max_workers": 2, "running": 0, "queued": 0, "saturated": False}
@@ -0,0 +1,185 @@
+import asyncio
+import json
+
+import numpy as np
+
+from prd_api import models
+from prd_api.test_cases import (
+    apply_test_case_patch, deduplicate_test_cases, iter_json_objects, near_duplicate_labels, parse_test_cases,
+    salvage_refinement_patch,
+)
+
+
+def make_test_case(number: int) -> dict:
+    return {
+        "test_case_id": f"TC{number:03d}",
+        "feature": "Login",
+        "scenario": f"Scenario {number}",
+        "test_steps": "1. Open the page\n2. Submit the form",
+        "expected_result": "The user is signed in",
+        "priority": "High",
+        "category": "Functional",
+    }
+
+
+def test_iter_json_objects_yields_top_level_objects_only():
+    text = 'Sure! {"a": 1} and then ```json\n{"b": {"c": [{"d": 2}]}}\n```'
+
+    assert list(iter_json_objects(text)) == ['{"a": 1}', '{"b": {"c": [{"d": 2}]}}']
+
+
+def test_iter_json_objects_ignores_braces_inside_strings():
+    text = '{"text": "a } brace and an \\" escaped { quote"} {"next": "}"}'
+
+    assert [json.loads(source) for source in iter_json_objects(text)] == [
+        {"text": 'a } brace and an " escaped { quote'},
+        {"next": "}"},
+    ]
+
+
+def test_iter_json_objects_descends_into_truncated_wrapper():
+    text = '{"test_cases": [{"id": 1, "nested": {"x": 1}}, {"id": 2}, {"feat'
+
+    assert [json.loads(source) for source in iter_json_objects(text)] == [
+        {"id": 1, "nested": {"x": 1}},
+        {"id": 2},
+    ]
+
+
+def test_iter_json_objects_truncated_inside_string():
+    text = '{"items": [{"id": 1}, {"id": 2, "note": "cut off mid-str'
+
+    assert [json.loads(source) for source in iter_json_objects(text)] == [{"id": 1}]
+
+
+def test_parse_test_cases_fast_path_with_code_fence():
+    response = "```json\n" + json.dumps({"test_cases": [make_test_case(1), make_test_case(2)]}) + "\n```"
+
+    test_cases, skipped = parse_test_cases(response)
+
+    assert [tc.test_case_id for tc in test_cases] == ["TC001", "TC002"]
+    assert skipped == 0
+
+
+def test_parse_test_cases_salvages_truncated_wrapper():
+    complete = ", ".join(json.dumps(make_test_case(number)) for number in (1, 2))
+    response = '{"test_cases": [' + complete + ', {"test_case_id": "TC003", "feat'
+
+    test_cases, skipped = parse_test_cases(response)
+
+    assert [tc.test_case_id for tc in test_cases] == ["TC001", "TC002"]
+    assert skipped == 0
+
+
+def test_parse_test_cases_skips_invalid_entries():
+    invalid = {"test_case_id": "TC009", "feature": "Missing fields"}
+    response = "Here you go:\n" + json.dumps(make_test_case(1)) + "\n" + json.dumps(invalid)
+
+    test_cases, skipped = parse_test_cases(response)
+
+    assert [tc.test_case_id for tc in test_cases] == ["TC001"]
+    assert skipped == 1
+
+
+def test_salvage_refinement_patch_truncated_operations():
+    text = (
+        '{"summary": "Tighten login", "operations": ['
+        '{"op": "modify", "test_case_id": "TC001", "test_case": {"priority": "Low"}}, '
+        '{"op": "delete", "test_case_id": "TC002"}, '
+        '{"op": "add", "test_case": {"feature": "Log'
+    )
+
+    patch = salvage_refinement_patch(text)
+
+    assert patch["summary"] == "Tighten login"
+    assert patch["operations"] == [
+        {"op": "modify", "test_case_id": "TC001", "test_case": {"priority": "Low"}},
+        {"op": "delete", "test_case_id": "TC002"},
+    ]
+
+
+def test_salvage_refinement_patch_skips_malformed_items():
+    text = 'Changes:\n{"op": "delete", "test_case_id": "TC001"}\n{"op": "modify", oops}\n{"op": "delete", "test_case_id": "TC003"}'
+
+    patch = salvage_refinement_patch(text)
+
+    assert [op["test_case_id"] for op in patch["operations"]] == ["TC001", "TC003"]
+
+
+def test_salvage_refinement_patch_unwraps_fenced_patch():
+    text = '```json\n{"summary": "s", "operations": [{"op": "delete", "test_case_id": "TC001"}]}\n```'
+
+    assert salvage_refinement_patch(text)["operations"] == [{"op": "delete", "test_case_id": "TC001"}]
+
+
+def test_apply_test_case_patch():
+    test_cases = [models.TestCase(**make_test_case(number)) for number in (1, 2, 3)]
+    new_case = {key: value for key, value in make_test_case(9).items() if key != "test_case_id"}
+    operations = [
+        {"op": "modify", "test_case_id": "TC001", "test_case": {"priority": "Low"}},
+        {"op": "delete", "test_case_id": "TC002"},
+        {"op": "add", "test_case": new_case},
+        {"op": "modify", "test_case_id": "TC404", "test_case": {"priority": "Low"}},
+        {"op": "add", "test_case": {"feature": "Missing required fields"}},
+        "not an operation",
+    ]
+
+    updated, applied = apply_test_case_patch(test_cases, operations)
+
+    assert applied == {"added": ["TC004"], "modified": ["TC001"], "deleted": ["TC002"]}
+    assert [tc.test_case_id for tc in updated] == ["TC001", "TC003", "TC004"]
+    assert updated[0].priority == "Low"
+    assert updated[0].scenario == "Scenario 1"
+    assert updated[2].scenario == "Scenario 9"
+
+
+def unit_vectors(degrees) -> np.ndarray:
+    radians = np.deg2rad(degrees)
+    return np.stack([np.cos(radians), np.sin(radians)], axis=1)
+
+
+def test_near_duplicate_labels_follow_chains_across_blocks():
+    # C~B and B~A are within 20 degrees, C and A are 40 apart; the threshold is 25 degrees
+    matrix = unit_vectors([40, 180, 20, 0, 200])
+    threshold = np.cos(np.deg2rad(25))
+
+    for block_size in (1, 2, 3, 5):
+        labels = near_duplicate_labels(matrix, threshold, block_size=block_size)
+        assert labels.tolist() == [0, 1, 0, 0, 1]
+
+
+def test_near_duplicate_labels_long_chain_converges_to_smallest_index():
+    # Neighbours 10 degrees apart, listed back to front so labels must travel the whole chain
+    matrix = unit_vectors(np.arange(0, 200, 10)[::-1])
+
+    labels = near_duplicate_labels(matrix, np.cos(np.deg2rad(12)), block_size=3)
+
+    assert labels.tolist() == [0] * 20
+
+
+def test_near_duplicate_labels_threshold_is_inclusive():
+    matrix = np.array([[1, 0, 0, 0], [1, 1, 1, 1], [0, 0, 0, 0]], dtype=np.float32)  # cosine exactly 0.5
+
+    assert near_duplicate_labels(matrix, 0.5).tolist() == [0, 0, 2]
+    assert near_duplicate_labels(matrix, float(np.nextafter(np.float32(0.5), np.float32(1)))).tolist() == [0, 1, 2]
+
+
+def test_deduplicate_keeps_best_priority_then_earliest(monkeypatch):
+    cases = [models.TestCase(**{**make_test_case(number), "priority": priority})
+             for number, priority in enumerate(["Low", "High", "High", "Medium"], start=1)]
+    # TC001-TC003 are near-duplicates, TC004 stands alone
+    matrix = unit_vectors([0, 5, 10, 90])
+
+    async def fake_embed(texts, api_key):
+        return matrix
+
+    monkeypatch.setattr("prd_api.test_cases.embed_texts_cached", fake_embed)
+    threshold = float(np.cos(np.deg2rad(15)))
+
+    flagged = asyncio.run(deduplicate_test_cases(cases, threshold=threshold))
+    merged = asyncio.run(deduplicate_test_cases(cases, threshold=threshold, action="merge"))
+
+    assert flagged["clusters"] == [{"representative": "TC002", "duplicates": ["TC003", "TC001"]}]
+    assert flagged["test_cases"] == cases
+    assert [tc.test_case_id for tc in merged["test_cases"]] == ["TC002", "TC004"]
+    assert merged["coverage"]["total"] == 2
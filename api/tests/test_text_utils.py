@@ -0,0 +1,182 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+from aimakerspace.text_utils import CharacterTextSplitter, PDFLoader, TextFileLoader, stream_files
+from aimakerspace.vectordatabase import VectorDatabase
+from benchmarks.fixtures import make_text_pdf
+
+
+async def collect(stream):
+    return [item async for item in stream]
+
+
+def test_stream_files_bounds_reads_in_flight():
+    state = {"in_flight": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def read(path):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        threading.Event().wait(0.005)
+        with lock:
+            state["in_flight"] -= 1
+        return path.name
+
+    async def run():
+        submitted = []
+
+        def paths():
+            for index in range(20):
+                submitted.append(index)
+                yield Path(f"{index}.txt")
+
+        stream = stream_files(paths(), read, executor, max_in_flight=3)
+        first = await stream.__anext__()
+        # Reading ahead stops at the in-flight limit until the consumer catches up
+        assert len(submitted) <= 4
+        rest = await collect(stream)
+        return [first, *rest]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = asyncio.run(run())
+
+    assert sorted(name for _, name in results) == sorted(f"{index}.txt" for index in range(20))
+    assert state["peak"] <= 3
+
+
+def test_stream_files_yields_in_completion_order():
+    delays = {"slow.txt": 0.2, "fast.txt": 0.0}
+
+    def read(path):
+        threading.Event().wait(delays[path.name])
+        return path.name
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = asyncio.run(collect(stream_files([Path("slow.txt"), Path("fast.txt")], read, executor, 2)))
+
+    assert [name for _, name in results] == ["fast.txt", "slow.txt"]
+
+
+def test_stream_files_raises_failed_read():
+    def read(path):
+        if path.name == "bad.txt":
+            raise OSError("unreadable")
+        return path.name
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        with pytest.raises(OSError, match="unreadable"):
+            asyncio.run(collect(stream_files([Path("bad.txt"), Path("good.txt")], read, executor, 1)))
+
+
+def test_closing_stream_cancels_queued_reads():
+    gate, b_started = threading.Event(), threading.Event()
+    reads = []
+
+    def read(path):
+        reads.append(path.name)
+        if path.name == "b":
+            b_started.set()
+            gate.wait(5)
+        return path.name
+
+    async def run():
+        stream = stream_files([Path(name) for name in "abcd"], read, executor, max_in_flight=3)
+        assert (await stream.__anext__())[1] == "a"
+        await asyncio.to_thread(b_started.wait, 5)
+        await stream.aclose()
+        await asyncio.sleep(0)  # cancellation reaches the executor futures on the next loop pass
+        gate.set()
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    asyncio.run(run())
+    executor.shutdown(wait=True)
+
+    # "b" was already running; "c" and "d" were queued behind it and never read
+    assert reads == ["a", "b"]
+
+
+@pytest.fixture
+def text_dir(tmp_path):
+    for name, text in {"b.txt": "second", "a.txt": "first", "nested/c.txt": "third", "skip.md": "no"}.items():
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(text)
+    return tmp_path
+
+
+def test_text_loader_astream_and_aload(text_dir):
+    loader = TextFileLoader(str(text_dir))
+
+    streamed = asyncio.run(collect(loader.astream(max_workers=2)))
+    documents = asyncio.run(loader.aload(max_workers=2))
+
+    assert {path.name: text for path, text in streamed} == {"a.txt": "first", "b.txt": "second", "c.txt": "third"}
+    # aload keeps load()'s sorted path order regardless of completion order
+    assert documents == TextFileLoader(str(text_dir)).load_documents() == ["first", "second", "third"]
+    loader.load_directory()
+    assert loader.documents == documents
+
+
+def test_pdf_loader_astream_on_shared_executor(tmp_path):
+    (tmp_path / "one.pdf").write_bytes(make_text_pdf(["Login fails with ERR-401"]))
+    (tmp_path / "two.pdf").write_bytes(make_text_pdf(["Checkout banner"]))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        streamed = asyncio.run(collect(PDFLoader(str(tmp_path)).astream(executor=executor)))
+
+    texts = {path.name: text for path, text in streamed}
+    assert "ERR-401" in texts["one.pdf"] and "Checkout" in texts["two.pdf"]
+
+
+def test_asplit_stream_records_source_and_offsets():
+    async def documents():
+        yield Path("a.txt"), "abcdefghij"
+        yield Path("b.txt"), "xyz"
+
+    splitter = CharacterTextSplitter(chunk_size=4, chunk_overlap=1)
+    chunks = asyncio.run(collect(splitter.asplit_stream(documents())))
+
+    assert chunks == [
+        ("abcd", {"source": "a.txt", "chunk_offset": 0}),
+        ("defg", {"source": "a.txt", "chunk_offset": 3}),
+        ("ghij", {"source": "a.txt", "chunk_offset": 6}),
+        ("j", {"source": "a.txt", "chunk_offset": 9}),
+        ("xyz", {"source": "b.txt", "chunk_offset": 0}),
+    ]
+    for chunk, metadata in chunks[:4]:
+        assert "abcdefghij"[metadata["chunk_offset"]:].startswith(chunk)
+
+
+def test_abuild_from_stream_embeds_every_chunk():
+    model = LocalEmbeddingModel(dimension=64)
+    texts = [f"requirement {index} about login and checkout" for index in range(7)]
+
+    async def chunks():
+        for index, text in enumerate(texts):
+            yield text, {"position": index}
+
+    database = asyncio.run(VectorDatabase(embedding_model=model).abuild_from_stream(chunks(), batch_size=3))
+
+    assert list(database.vectors) == texts
+    assert [database.metadata[text]["position"] for text in texts] == list(range(7))
+    np.testing.assert_allclose(np.vstack(list(database.vectors.values())), model.get_embeddings(texts), atol=1e-6)
+
+
+def test_abuild_from_stream_propagates_embedding_failure():
+    class FailingModel(LocalEmbeddingModel):
+        async def async_get_embeddings(self, list_of_text):
+            raise RuntimeError("quota exceeded")
+
+    async def chunks():
+        for index in range(5):
+            yield f"chunk {index}", None
+
+    with pytest.raises(RuntimeError, match="quota"):
+        asyncio.run(VectorDatabase(embedding_model=FailingModel()).abuild_from_stream(chunks(), batch_size=2))
@@ -0,0 +1,207 @@
+import asyncio
+import hashlib
+import io
+import threading
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.requests import Request
+
+from prd_api import models, services
+from prd_api.config import UPLOAD_CHUNK_SIZE
+from prd_api.routers import generation
+from prd_api.uploads import as_stream, spool_upload
+
+
+def make_upload(data: bytes, filename: str = "prd.pdf", content_type: str = "application/pdf") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename, headers={"content-type": content_type})
+
+
+def test_spool_upload_maps_content_and_closes_on_exit():
+    data = b"%PDF-1.4 " + bytes(range(256)) * 4096
+
+    async def spool():
+        async with spool_upload(make_upload(data)) as upload:
+            assert upload.size == len(data)
+            assert upload.sha256 == hashlib.sha256(data).hexdigest()
+            assert as_stream(upload.data).read() == data
+            return upload
+
+    upload = asyncio.run(spool())
+
+    assert upload.closed
+    with pytest.raises(ValueError):
+        upload.data[:1]
+
+
+def test_spool_upload_rejects_oversize_while_streaming():
+    source = io.BytesIO(b"x" * (10 * UPLOAD_CHUNK_SIZE))
+    file = UploadFile(source, filename="big.pdf", size=None)
+
+    async def spool():
+        async with spool_upload(file, max_size=2 * UPLOAD_CHUNK_SIZE):
+            pass
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(spool())
+
+    assert error.value.status_code == 413
+    # Stopped at the first chunk over the limit instead of reading everything
+    assert source.tell() == 3 * UPLOAD_CHUNK_SIZE
+
+
+def test_spool_upload_rejects_empty_file():
+    async def spool():
+        async with spool_upload(make_upload(b"")):
+            pass
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(spool())
+    assert error.value.status_code == 400
+
+
+def test_shared_work_keeps_spool_open_after_request_exits():
+    async def run():
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return bytes(upload.data[:4])
+
+        async with spool_upload(make_upload(b"data")) as upload:
+            task = upload.share(work)
+        assert not upload.closed
+        release.set()
+        assert await task == b"data"
+        assert upload.closed
+
+    asyncio.run(run())
+
+
+def test_single_flight_coalesces_and_releases_key():
+    async def run():
+        flights = services.SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.ensure_future(flights.run("key", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*waiters) == ["result"] * 3
+        assert len(calls) == 1
+        assert flights.stats == {"started": 1, "coalesced": 2}
+        assert len(flights) == 0
+
+        async def fail():
+            raise RuntimeError("upstream")
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                await flights.run("key", fail)
+        assert flights.stats["started"] == 3
+
+    asyncio.run(run())
+
+
+class FakeLLM:
+    built_in_key = "built-in"
+    model_name = "fake-model"
+
+    def model(self, api_key: str):
+        return None
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/api/upload-prd", "headers": [], "client": ("127.0.0.1", 1234)})
+
+
+def test_cancelled_first_upload_does_not_break_coalesced_waiters(monkeypatch):
+    """Two identical uploads share one extraction; the first client disconnects mid-flight."""
+    extraction_started = threading.Event()
+    release_extraction = threading.Event()
+    extractions = []
+
+    def fake_extract(data, filename):
+        extractions.append(filename)
+        extraction_started.set()
+        release_extraction.wait(5)
+        return as_stream(data).read().decode()
+
+    async def fake_generate(text, model):
+        return [models.TestCase(
+            test_case_id="TC001", feature=text, scenario="s", test_steps="1", expected_result="e",
+            priority="High", category="Functional",
+        )]
+
+    monkeypatch.setattr(generation, "extract_text_from_pdf", fake_extract)
+    monkeypatch.setattr(generation, "generate_test_cases", fake_generate)
+
+    async def run():
+        flights = services.SingleFlight()
+        limiter = services.UsageLimiter(development_mode=True)
+        sessions = services.TestCaseSessionStore()
+
+        def upload():
+            return generation.upload_prd(
+                make_request(), make_upload(b"Same PRD"), None, False, FakeLLM(), limiter, sessions, flights
+            )
+
+        first = asyncio.ensure_future(upload())
+        await asyncio.to_thread(extraction_started.wait, 5)
+        second = asyncio.ensure_future(upload())
+        while flights.stats["coalesced"] == 0:
+            await asyncio.sleep(0.01)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release_extraction.set()
+
+        response = await second
+        assert [tc.feature for tc in response.test_cases] == ["Same PRD"]
+        assert extractions == ["prd.pdf"]
+
+    asyncio.run(run())
+
+
+def test_uploads_with_different_api_keys_do_not_share_a_flight(monkeypatch):
+    """Each tenant's request runs on its own key, even when the file is identical."""
+    both_started = threading.Barrier(2, timeout=5)
+
+    def fake_extract(data, filename):
+        both_started.wait()
+        return as_stream(data).read().decode()
+
+    async def fake_generate(text, model):
+        return [models.TestCase(
+            test_case_id="TC001", feature=model, scenario="s", test_steps="1", expected_result="e",
+            priority="High", category="Functional",
+        )]
+
+    class KeyedLLM(FakeLLM):
+        def model(self, api_key: str):
+            return api_key
+
+    monkeypatch.setattr(generation, "extract_text_from_pdf", fake_extract)
+    monkeypatch.setattr(generation, "generate_test_cases", fake_generate)
+
+    async def run():
+        flights = services.SingleFlight()
+        limiter = services.UsageLimiter(development_mode=True)
+        sessions = services.TestCaseSessionStore()
+
+        def upload(api_key):
+            return generation.upload_prd(
+                make_request(), make_upload(b"Same PRD"), api_key, False, KeyedLLM(), limiter, sessions, flights
+            )
+
+        responses = await asyncio.gather(upload("tenant-a"), upload(None))
+        assert [response.test_cases[0].feature for response in responses] == ["tenant-a", "built-in"]
+        assert flights.stats == {"started": 2, "coalesced": 0}
+
+    asyncio.run(run())
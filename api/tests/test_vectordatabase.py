@@ -0,0 +1,216 @@
+import struct
+
+import numpy as np
+import pytest
+
+from aimakerspace.local_utils.embedding import LocalEmbeddingModel
+from aimakerspace.vectordatabase import SNAPSHOT_VERSION, VectorDatabase, read_snapshot_info
+
+
+def make_database(vectors, metadata=None) -> VectorDatabase:
+    database = VectorDatabase(embedding_model=LocalEmbeddingModel())
+    for index, vector in enumerate(vectors):
+        database.insert(f"chunk {index}", vector, (metadata or {}).get(index))
+    return database
+
+
+def test_search_returns_cosine_ranking():
+    database = make_database([[1, 0], [0.8, 0.6], [0, 1]])
+
+    results = database.search([1, 0], k=2)
+
+    assert [key for key, _ in results] == ["chunk 0", "chunk 1"]
+    assert results[1][1] == pytest.approx(0.8)
+
+
+def test_search_mmr_prefers_diverse_results():
+    # Two near-duplicates close to the query and one distinct, slightly less relevant vector
+    database = make_database([[1, 0.05], [1, 0.06], [0.7, -0.7]])
+
+    plain = database.search_mmr([1, 0], k=2, lambda_mult=1.0)
+    diverse = database.search_mmr([1, 0], k=2, lambda_mult=0.3)
+
+    assert [key for key, _ in plain] == [key for key, _ in database.search([1, 0], k=2)]
+    assert [key for key, _ in diverse] == ["chunk 0", "chunk 2"]
+    assert diverse[1][1] == pytest.approx(np.cos(np.pi / 4), abs=1e-6)
+
+
+def test_search_mmr_validates_arguments():
+    database = make_database([[1, 0]])
+
+    with pytest.raises(ValueError):
+        database.search_mmr([1, 0], k=0)
+    with pytest.raises(ValueError):
+        database.search_mmr([1, 0], k=1, lambda_mult=1.5)
+    assert make_database([]).search_mmr([1, 0], k=3) == []
+
+
+FILTER_METADATA = {
+    0: {"document_id": "doc_1", "section": "Login", "page": 1},
+    1: {"document_id": "doc_1", "section": "Checkout", "page": 3},
+    2: {"document_id": "doc_2", "section": "Login", "page": 5},
+    3: {"document_id": "doc_2", "section": "Export", "page": 8, "tags": ["unhashable"]},
+}
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"document_id": "doc_1"}, [0, 1]),
+    ({"section": {"$ne": "Login"}}, [1, 3]),
+    ({"section": {"$in": ["Login", "Export"]}}, [0, 2, 3]),
+    ({"page": {"$gte": 3, "$lt": 8}}, [1, 2]),
+    ({"document_id": "doc_2", "page": {"$lte": 5}}, [2]),
+    ({"$or": [{"section": "Checkout"}, {"page": {"$gt": 6}}]}, [1, 3]),
+    ({"$and": [{"section": "Login"}, {"document_id": "doc_2"}]}, [2]),
+    ({"missing_field": "x"}, []),
+])
+def test_filter_mask(filter, expected):
+    database = make_database([[1, 0]] * 4, FILTER_METADATA)
+
+    assert np.flatnonzero(database.filter_mask(filter)).tolist() == expected
+
+
+def test_filter_mask_rejects_invalid_conditions():
+    database = make_database([[1, 0]], FILTER_METADATA)
+
+    with pytest.raises(ValueError):
+        database.filter_mask({"page": {"$regex": "1"}})
+    with pytest.raises(ValueError):
+        database.filter_mask({"page": {"$gt": "not a number"}})
+
+
+def test_filtered_searches_only_return_matches():
+    database = make_database([[1, 0], [0.9, 0.1], [0.8, 0.2], [0.7, 0.3]], FILTER_METADATA)
+    login = {"section": "Login"}
+
+    assert [key for key, _ in database.search([1, 0], k=4, filter=login)] == ["chunk 0", "chunk 2"]
+    assert [key for key, _ in database.search_mmr([1, 0], k=4, filter=login)] == ["chunk 0", "chunk 2"]
+    assert {key for key, _ in database.search_multi([[1, 0], [0, 1]], k=4, filter=login)} == {"chunk 0", "chunk 2"}
+    assert database.search([1, 0], k=4, filter={"document_id": "doc_9"}) == []
+
+
+def test_filter_indexes_are_rebuilt_after_insert():
+    database = make_database([[1, 0]], FILTER_METADATA)
+    assert database.filter_mask({"section": "Checkout"}).tolist() == [False]
+
+    database.insert("late chunk", [0, 1], {"section": "Checkout"})
+
+    assert [key for key, _ in database.search([0, 1], k=2, filter={"section": "Checkout"})] == ["late chunk"]
+
+
+def test_search_multi_fuses_rankings():
+    database = make_database([[1, 0], [0, 1], [0.7, 0.7], [-1, 0]])
+
+    results = database.search_multi([[1, 0], [0, 1]], k=2, fetch_k=2, rrf_k=60)
+
+    # chunk 2 ranks second for both queries, which beats ranking first for one
+    assert results[0] == ("chunk 2", pytest.approx(2 / 62))
+    assert results[1][0] in ("chunk 0", "chunk 1")
+    assert results[1][1] == pytest.approx(1 / 61)
+
+
+def test_search_multi_with_one_query_matches_search():
+    database = make_database(np.random.default_rng(0).normal(size=(20, 8)))
+    query = np.random.default_rng(1).normal(size=8)
+
+    assert [key for key, _ in database.search_multi([query], k=5)] == [key for key, _ in database.search(query, k=5)]
+
+
+def test_multi_search_by_text_embeds_queries_in_one_batch():
+    class CountingModel(LocalEmbeddingModel):
+        batches = 0
+
+        def get_embeddings(self, list_of_text):
+            CountingModel.batches += 1
+            return super().get_embeddings(list_of_text)
+
+    model = CountingModel()
+    texts = ["Login fails with ERR-401", "Checkout shows a banner", "Export downloads a CSV"]
+    database = VectorDatabase(embedding_model=model)
+    for text, vector in zip(texts, model.get_embeddings(texts)):
+        database.insert(text, vector)
+
+    results = database.multi_search_by_text(["login error", "csv export"], k=2, return_as_text=True)
+
+    assert set(results) == {texts[0], texts[2]}
+    assert CountingModel.batches == 2  # One for the inserts, one for both queries
+
+
+def make_snapshot_database() -> VectorDatabase:
+    rng = np.random.default_rng(7)
+    database = VectorDatabase(embedding_model=LocalEmbeddingModel(dimension=16))
+    for index, vector in enumerate(rng.normal(size=(50, 16))):
+        key = f"chunk {index}" if index % 5 else f"chunk {index} – naïve café"  # Non-ASCII keys too
+        database.insert(key, vector, {"page": index % 7, "section": f"S{index % 3}"} if index % 4 else None)
+    return database
+
+
+def test_snapshot_round_trip():
+    database = make_snapshot_database()
+    query = np.random.default_rng(8).normal(size=16)
+
+    restored = VectorDatabase.from_snapshot(database.to_snapshot(), LocalEmbeddingModel(dimension=16))
+
+    assert list(restored.vectors) == list(database.vectors)
+    assert restored.metadata == database.metadata
+    for key, vector in database.vectors.items():
+        np.testing.assert_allclose(restored.vectors[key], vector, rtol=1e-6)
+    assert [key for key, _ in restored.search(query, k=5)] == [key for key, _ in database.search(query, k=5)]
+    assert restored.filter_mask({"page": {"$gte": 3}}).tolist() == database.filter_mask({"page": {"$gte": 3}}).tolist()
+
+
+def test_snapshot_int8_keeps_rankings():
+    database = make_snapshot_database()
+    queries = np.random.default_rng(9).normal(size=(10, 16))
+
+    data = database.to_snapshot(quantize="int8")
+    restored = VectorDatabase.from_snapshot(data, LocalEmbeddingModel(dimension=16))
+
+    assert len(data) < len(database.to_snapshot())
+    for query in queries:
+        expected = database.search(query, k=3)
+        actual = restored.search(query, k=3)
+        assert [key for key, _ in actual] == [key for key, _ in expected]
+        np.testing.assert_allclose([score for _, score in actual], [score for _, score in expected], atol=0.02)
+
+
+def test_snapshot_empty_database():
+    database = VectorDatabase(embedding_model=LocalEmbeddingModel())
+
+    restored = VectorDatabase.from_snapshot(database.to_snapshot(), LocalEmbeddingModel())
+
+    assert restored.vectors == {}
+    assert restored.search([1.0, 0.0], k=3) == []
+
+
+def test_snapshot_save_load_and_info(tmp_path):
+    database = make_snapshot_database()
+    path = tmp_path / "index.vdb"
+
+    database.save(path, info={"rows": 50, "document_id": "kb"})
+    restored = VectorDatabase.load(path, LocalEmbeddingModel(dimension=16))
+
+    assert read_snapshot_info(path) == {"rows": 50, "document_id": "kb", "embedding_model": "local-hash-16"}
+    assert list(restored.vectors) == list(database.vectors)
+    assert not (tmp_path / "index.vdb.tmp").exists()
+
+
+def test_snapshot_rejects_other_embedding_model():
+    data = make_snapshot_database().to_snapshot()
+
+    with pytest.raises(ValueError, match="local-hash-16"):
+        VectorDatabase.from_snapshot(data, LocalEmbeddingModel(dimension=32))
+
+
+def test_snapshot_rejects_invalid_data():
+    data = bytearray(make_snapshot_database().to_snapshot())
+
+    with pytest.raises(ValueError, match="too short"):
+        VectorDatabase.from_snapshot(bytes(data[:64]))
+    with pytest.raises(ValueError, match="bad magic"):
+        VectorDatabase.from_snapshot(b"NOTAVDB\x00" + bytes(data[8:]))
+    newer = bytearray(data)
+    struct.pack_into("<H", newer, 8, SNAPSHOT_VERSION + 1)
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        VectorDatabase.from_snapshot(bytes(newer))
+    with pytest.raises(ValueError, match="Truncated"):
+        VectorDatabase.from_snapshot(bytes(data[:len(data) // 2]))